@@ -30,6 +30,16 @@ def parse_args():
       dest='enable_assertion',
       action='store_true',
       default=False)
+  parser.add_argument(
+      '--device',
+      default=None,
+      help='Device to run on, as accepted by make_interpreter(). With "cpu", '
+      'only the models that are not compiled for the Edge TPU are run.')
+  parser.add_argument(
+      '--num_threads',
+      type=int,
+      default=None,
+      help='Number of threads for the operations that run on the CPU.')
   return parser.parse_args()
 
 
@@ -0,0 +1,87 @@
+# Lint as: python3
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmark of the time to import pycoral modules.
+
+Each import runs in a new Python process, so nothing is cached between runs.
+The import of numpy, which all pycoral modules need, is measured as the
+baseline. For each module, the script also reports whether the import loaded
+GStreamer (gi) or the native pycoral extension, which should only be loaded
+when first used.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks import benchmark_utils
+
+_SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+{}
+elapsed = time.perf_counter() - start
+heavy = [m for m in ('gi', 'pycoral.pybind._pywrap_coral') if m in sys.modules]
+print(elapsed, ','.join(heavy) or '-')
+'''
+
+_MODULES = [
+    'pycoral.adapters.common',
+    'pycoral.adapters.classify',
+    'pycoral.adapters.detect',
+    'pycoral.utils.edgetpu',
+    'pycoral.utils.pool',
+    'pycoral.utils.dispatch',
+]
+
+
+def _time_import(statement):
+  """Returns the import time in ms and the heavy modules it loaded."""
+  root = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..')
+  output = subprocess.check_output(
+      [sys.executable, '-c', _SCRIPT.format(statement)], cwd=root)
+  elapsed, heavy = output.decode().split()
+  return 1000 * float(elapsed), heavy
+
+
+def _benchmark_import(statement, iterations=10):
+  """Returns the median import time in ms and the heavy modules it loaded."""
+  times = []
+  for _ in range(iterations):
+    elapsed, heavy = _time_import(statement)
+    times.append(elapsed)
+  return statistics.median(times), heavy
+
+
+def main():
+  print('Python version: ', sys.version)
+  machine = benchmark_utils.machine_info()
+  benchmark_utils.check_cpu_scaling_governor_status()
+  results = [('MODULE', 'IMPORT_TIME(ms)', 'NATIVE_MODULES')]
+  baseline, _ = _benchmark_import('import numpy')
+  print('numpy: %.2f ms' % baseline)
+  results.append(('numpy', baseline, '-'))
+  for module in _MODULES:
+    elapsed, heavy = _benchmark_import('import ' + module)
+    print('%s: %.2f ms (loaded: %s)' % (module, elapsed, heavy))
+    results.append((module, elapsed, heavy))
+  benchmark_utils.save_as_csv(
+      'import_benchmarks_%s_%s.csv' %
+      (machine, time.strftime('%Y%m%d-%H%M%S')), results)
+
+
+if __name__ == '__main__':
+  main()
@@ -35,13 +35,16 @@ from benchmarks import benchmark_utils
 from pycoral.utils import edgetpu
 
 
-def run_benchmark(model, delegate):
+def run_benchmark(model, delegate, device=None, num_threads=None):
   """Returns average inference time in ms on specified model with random input."""
 
   print('Benchmark for [%s]' % model)
   print('model path = %s' % benchmark_utils.test_data_path(model))
   interpreter = edgetpu.make_interpreter(
-      benchmark_utils.test_data_path(model), delegate=delegate)
+      benchmark_utils.test_data_path(model),
+      device=device,
+      delegate=delegate,
+      num_threads=num_threads)
   interpreter.allocate_tensors()
   iterations = 200 if 'edgetpu' in model else 20
 
@@ -65,10 +68,17 @@ def main():
       'inference_reference_%s.csv' % machine)
 
   results = [('MODEL', 'INFERENCE_TIME')]
-  delegate = edgetpu.load_edgetpu_delegate()
+  if args.device == 'cpu':
+    delegate = None
+    models = [model for model in models if 'edgetpu' not in model]
+  else:
+    delegate = edgetpu.load_edgetpu_delegate(
+        {'device': args.device} if args.device else {})
   for i, model in enumerate(models, start=1):
     print('-------------- Model %d / %d ---------------' % (i, len(models)))
-    results.append((model, run_benchmark(model, delegate)))
+    results.append((model,
+                    run_benchmark(model, delegate, args.device,
+                                  args.num_threads)))
   benchmark_utils.save_as_csv(
       'inference_benchmarks_%s_%s.csv' %
       (machine, time.strftime('%Y%m%d-%H%M%S')), results)
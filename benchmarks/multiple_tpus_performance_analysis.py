@@ -42,10 +42,11 @@ from pycoral.adapters import classify
 from pycoral.adapters import common
 from pycoral.adapters import detect
 from pycoral.utils import edgetpu
+from pycoral.utils import pool
 
 
 def run_inference_job(model_name, input_filename, num_inferences, num_threads,
-                      task_type, delegates):
+                      task_type, devices, interpreter_pool):
   """Runs classification or detection job with `num_threads`.
 
   Args:
@@ -54,23 +55,23 @@ def run_inference_job(model_name, input_filename, num_inferences, num_threads,
     num_inferences: int
     num_threads: int
     task_type: string, `classification` or `detection`
-    delegates: list of Delegate objects, all aviable edgtpu devices.
+    devices: list of strings, all available Edge TPU devices.
+    interpreter_pool: InterpreterPool, shared by all jobs of the model.
 
   Returns:
     double, wall time (in seconds) for running the job.
   """
 
   def thread_job(model_name, input_filename, num_inferences, task_type,
-                 delegate):
+                 device):
     """Runs classification or detection job on one Python thread."""
     tid = threading.get_ident()
     logging.info('Thread: %d, # inferences: %d, model: %s', tid, num_inferences,
                  model_name)
 
-    interpreter = edgetpu.make_interpreter(
-        benchmark_utils.test_data_path(model_name), delegate=delegate)
-    interpreter.allocate_tensors()
-    with benchmark_utils.test_image(input_filename) as img:
+    model_path = benchmark_utils.test_data_path(model_name)
+    with interpreter_pool.interpreter(model_path, device) as interpreter, \
+        benchmark_utils.test_image(input_filename) as img:
       if task_type == 'classification':
         resize_image = img.resize(common.input_size(interpreter), Image.NEAREST)
         common.set_input(interpreter, resize_image)
@@ -89,6 +90,12 @@ def run_inference_job(model_name, input_filename, num_inferences, num_threads,
           detect.get_objects(interpreter)
     logging.info('Thread: %d, model: %s done', tid, model_name)
 
+  # Create the interpreters of all the devices used before timing, so that no
+  # run pays for it.
+  model_path = benchmark_utils.test_data_path(model_name)
+  for device in devices[:num_threads]:
+    interpreter_pool.preload(model_path, device)
+
   start_time = time.perf_counter()
   # Round up a bit if not divisible.
   num_inferences_per_thread = (num_inferences + num_threads - 1) // num_threads
@@ -98,7 +105,7 @@ def run_inference_job(model_name, input_filename, num_inferences, num_threads,
         threading.Thread(
             target=thread_job,
             args=(model_name, input_filename, num_inferences_per_thread,
-                  task_type, delegates[i])))
+                  task_type, devices[i])))
 
   for worker in workers:
     worker.start()
@@ -116,7 +123,6 @@ def main():
   devices = ['pci:%d' % i for i in range(min(num_devices, num_pci_devices))] + [
       'usb:%d' % i for i in range(max(0, num_devices - num_pci_devices))
   ]
-  delegates = [edgetpu.load_edgetpu_delegate({'device': d}) for d in devices]
   model_names = [
       'mobilenet_v1_1.0_224_quant_edgetpu.tflite',
       'mobilenet_v2_1.0_224_quant_edgetpu.tflite',
@@ -140,12 +146,15 @@ def main():
     if 'ssd' in model_name:
       task_type = 'detection'
     inference_costs_map[model_name] = [0.0] * num_devices
-    for num_threads in range(num_devices, 0, -1):
-      cost = run_inference_job(model_name, input_filename, num_inferences,
-                               num_threads, task_type, delegates)
-      inference_costs_map[model_name][num_threads - 1] = cost
-      logging.info('model: %s, # threads: %d, cost: %f seconds', model_name,
-                   num_threads, cost)
+    # One pool per model, so its interpreters are released before the next.
+    with pool.InterpreterPool() as interpreter_pool:
+      for num_threads in range(num_devices, 0, -1):
+        cost = run_inference_job(model_name, input_filename, num_inferences,
+                                 num_threads, task_type, devices,
+                                 interpreter_pool)
+        inference_costs_map[model_name][num_threads - 1] = cost
+        logging.info('model: %s, # threads: %d, cost: %f seconds', model_name,
+                     num_threads, cost)
     show_speedup(inference_costs_map[model_name])
 
   logging.info('============Summary==========')
@@ -0,0 +1,126 @@
+# Lint as: python3
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Benchmark non-maximum suppression on random boxes.
+
+Compares `pycoral.adapters.detect.nms` and `batched_nms` with the list-based
+implementation previously used by examples/small_object_detection.py.
+"""
+
+import collections
+import sys
+import time
+import timeit
+
+import numpy as np
+
+from benchmarks import benchmark_utils
+from pycoral.adapters import detect
+
+Object = collections.namedtuple('Object', ['label', 'score', 'bbox'])
+
+
+def _reference_nms(objects, threshold):
+  """NMS from examples/small_object_detection.py, used as the baseline."""
+  if len(objects) == 1:
+    return [0]
+
+  boxes = np.array([o.bbox for o in objects])
+  xmins = boxes[:, 0]
+  ymins = boxes[:, 1]
+  xmaxs = boxes[:, 2]
+  ymaxs = boxes[:, 3]
+
+  areas = (xmaxs - xmins) * (ymaxs - ymins)
+  scores = [o.score for o in objects]
+  idxs = np.argsort(scores)
+
+  selected_idxs = []
+  while idxs.size != 0:
+    selected_idx = idxs[-1]
+    selected_idxs.append(selected_idx)
+
+    overlapped_xmins = np.maximum(xmins[selected_idx], xmins[idxs[:-1]])
+    overlapped_ymins = np.maximum(ymins[selected_idx], ymins[idxs[:-1]])
+    overlapped_xmaxs = np.minimum(xmaxs[selected_idx], xmaxs[idxs[:-1]])
+    overlapped_ymaxs = np.minimum(ymaxs[selected_idx], ymaxs[idxs[:-1]])
+
+    w = np.maximum(0, overlapped_xmaxs - overlapped_xmins)
+    h = np.maximum(0, overlapped_ymaxs - overlapped_ymins)
+
+    intersections = w * h
+    unions = areas[idxs[:-1]] + areas[selected_idx] - intersections
+    ious = intersections / unions
+
+    idxs = np.delete(
+        idxs, np.concatenate(([len(idxs) - 1], np.where(ious > threshold)[0])))
+
+  return selected_idxs
+
+
+def _random_detections(num_boxes, num_classes):
+  """Returns random (boxes, scores, class_ids) on a 1920x1080 image."""
+  np.random.seed(12345)
+  xy = np.random.rand(num_boxes, 2) * [1920, 1080]
+  wh = np.random.rand(num_boxes, 2) * 200 + 10
+  boxes = np.concatenate([xy, xy + wh], axis=1)
+  scores = np.random.rand(num_boxes)
+  class_ids = np.random.randint(0, num_classes, num_boxes)
+  return boxes, scores, class_ids
+
+
+def _benchmark_nms(num_boxes, num_classes, iou_threshold=0.5):
+  """Returns time in ms of (reference, nms, batched_nms) for one case."""
+  boxes, scores, class_ids = _random_detections(num_boxes, num_classes)
+  labels = [str(i) for i in class_ids]
+  iterations = 100
+
+  def reference():
+    objects_by_label = {}
+    for label, score, box in zip(labels, scores, boxes):
+      objects_by_label.setdefault(label, []).append(Object(label, score, box))
+    for objects in objects_by_label.values():
+      _reference_nms(objects, iou_threshold)
+
+  def vectorized():
+    detect.nms(boxes, scores, iou_threshold)
+
+  def batched():
+    detect.batched_nms(boxes, scores, class_ids, iou_threshold)
+
+  return tuple(
+      1000 * timeit.timeit(f, number=iterations) / iterations
+      for f in (reference, vectorized, batched))
+
+
+def main():
+  print('Python version: ', sys.version)
+  machine = benchmark_utils.machine_info()
+  benchmark_utils.check_cpu_scaling_governor_status()
+  # cases are defined by parameter pairs [num_boxes, num_classes].
+  cases = [[10, 1], [100, 1], [100, 10], [1000, 1], [1000, 10], [5000, 90]]
+  results = [('CASE', 'REFERENCE(ms)', 'NMS(ms)', 'BATCHED_NMS(ms)')]
+  for num_boxes, num_classes in cases:
+    print('-------- num_boxes=%d / num_classes=%d --------' %
+          (num_boxes, num_classes))
+    times = _benchmark_nms(num_boxes, num_classes)
+    print('reference: %.3f ms, nms: %.3f ms, batched_nms: %.3f ms' % times)
+    results.append(('%d:%d' % (num_boxes, num_classes),) + times)
+  benchmark_utils.save_as_csv(
+      'nms_benchmarks_%s_%s.csv' % (machine, time.strftime('%Y%m%d-%H%M%S')),
+      results)
+
+
+if __name__ == '__main__':
+  main()
@@ -46,123 +46,28 @@ setting the iou_threshold to 1. By doing so, we see an overall speedup of about
 """
 
 import argparse
-import collections
 
 import numpy as np
 from PIL import Image
 from PIL import ImageDraw
 
-from pycoral.adapters import common
-from pycoral.adapters import detect
+from pycoral.adapters import tiling
 from pycoral.utils.dataset import read_label_file
 from pycoral.utils.edgetpu import make_interpreter
 
-Object = collections.namedtuple('Object', ['label', 'score', 'bbox'])
 
-
-def tiles_location_gen(img_size, tile_size, overlap):
-  """Generates location of tiles after splitting the given image according the tile_size and overlap.
-
-  Args:
-    img_size (int, int): size of original image as width x height.
-    tile_size (int, int): size of the returned tiles as width x height.
-    overlap (int): The number of pixels to overlap the tiles.
-
-  Yields:
-    A list of points representing the coordinates of the tile in xmin, ymin,
-    xmax, ymax.
-  """
-
-  tile_width, tile_height = tile_size
-  img_width, img_height = img_size
-  h_stride = tile_height - overlap
-  w_stride = tile_width - overlap
-  for h in range(0, img_height, h_stride):
-    for w in range(0, img_width, w_stride):
-      xmin = w
-      ymin = h
-      xmax = min(img_width, w + tile_width)
-      ymax = min(img_height, h + tile_height)
-      yield [xmin, ymin, xmax, ymax]
-
-
-def non_max_suppression(objects, threshold):
-  """Returns a list of indexes of objects passing the NMS.
-
-  Args:
-    objects: result candidates.
-    threshold: the threshold of overlapping IoU to merge the boxes.
-
-  Returns:
-    A list of indexes containings the objects that pass the NMS.
-  """
-  if len(objects) == 1:
-    return [0]
-
-  boxes = np.array([o.bbox for o in objects])
-  xmins = boxes[:, 0]
-  ymins = boxes[:, 1]
-  xmaxs = boxes[:, 2]
-  ymaxs = boxes[:, 3]
-
-  areas = (xmaxs - xmins) * (ymaxs - ymins)
-  scores = [o.score for o in objects]
-  idxs = np.argsort(scores)
-
-  selected_idxs = []
-  while idxs.size != 0:
-
-    selected_idx = idxs[-1]
-    selected_idxs.append(selected_idx)
-
-    overlapped_xmins = np.maximum(xmins[selected_idx], xmins[idxs[:-1]])
-    overlapped_ymins = np.maximum(ymins[selected_idx], ymins[idxs[:-1]])
-    overlapped_xmaxs = np.minimum(xmaxs[selected_idx], xmaxs[idxs[:-1]])
-    overlapped_ymaxs = np.minimum(ymaxs[selected_idx], ymaxs[idxs[:-1]])
-
-    w = np.maximum(0, overlapped_xmaxs - overlapped_xmins)
-    h = np.maximum(0, overlapped_ymaxs - overlapped_ymins)
-
-    intersections = w * h
-    unions = areas[idxs[:-1]] + areas[selected_idx] - intersections
-    ious = intersections / unions
-
-    idxs = np.delete(
-        idxs, np.concatenate(([len(idxs) - 1], np.where(ious > threshold)[0])))
-
-  return selected_idxs
-
-
-def draw_object(draw, obj):
+def draw_object(draw, obj, labels):
   """Draws detection candidate on the image.
 
   Args:
     draw: the PIL.ImageDraw object that draw on the image.
     obj: The detection candidate.
+    labels: dict mapping class ids to labels.
   """
-  draw.rectangle(obj.bbox, outline='red')
-  draw.text((obj.bbox[0], obj.bbox[3]), obj.label, fill='#0000')
-  draw.text((obj.bbox[0], obj.bbox[3] + 10), str(obj.score), fill='#0000')
-
-
-def reposition_bounding_box(bbox, tile_location):
-  """Relocates bbox to the relative location to the original image.
-
-  Args:
-    bbox (int, int, int, int): bounding box relative to tile_location as xmin,
-      ymin, xmax, ymax.
-    tile_location (int, int, int, int): tile_location in the original image as
-      xmin, ymin, xmax, ymax.
-
-  Returns:
-    A list of points representing the location of the bounding box relative to
-    the original image as xmin, ymin, xmax, ymax.
-  """
-  bbox[0] = bbox[0] + tile_location[0]
-  bbox[1] = bbox[1] + tile_location[1]
-  bbox[2] = bbox[2] + tile_location[0]
-  bbox[3] = bbox[3] + tile_location[1]
-  return bbox
+  bbox = list(obj.bbox)
+  draw.rectangle(bbox, outline='red')
+  draw.text((bbox[0], bbox[3]), labels.get(obj.id, ''), fill='#0000')
+  draw.text((bbox[0], bbox[3] + 10), str(obj.score), fill='#0000')
 
 
 def main():
@@ -207,33 +112,17 @@ def main():
   img = Image.open(args.input).convert('RGB')
   draw = ImageDraw.Draw(img)
 
-  objects_by_label = dict()
-  img_size = img.size
   tile_sizes = [
-      map(int, tile_size.split('x')) for tile_size in args.tile_sizes.split(',')
+      tuple(map(int, tile_size.split('x')))
+      for tile_size in args.tile_sizes.split(',')
   ]
-  for tile_size in tile_sizes:
-    for tile_location in tiles_location_gen(img_size, tile_size,
-                                            args.tile_overlap):
-      tile = img.crop(tile_location)
-      _, scale = common.set_resized_input(
-          interpreter, tile.size,
-          lambda size, img=tile: img.resize(size, Image.NEAREST))
-      interpreter.invoke()
-      objs = detect.get_objects(interpreter, args.score_threshold, scale)
-
-      for obj in objs:
-        bbox = [obj.bbox.xmin, obj.bbox.ymin, obj.bbox.xmax, obj.bbox.ymax]
-        bbox = reposition_bounding_box(bbox, tile_location)
-
-        label = labels.get(obj.id, '')
-        objects_by_label.setdefault(label,
-                                    []).append(Object(label, obj.score, bbox))
-
-  for label, objects in objects_by_label.items():
-    idxs = non_max_suppression(objects, args.iou_threshold)
-    for idx in idxs:
-      draw_object(draw, objects[idx])
+  with tiling.TiledDetector([interpreter], img.size, tile_sizes,
+                            args.tile_overlap) as detector:
+    detections = detector.detect(
+        np.asarray(img), args.score_threshold, args.iou_threshold)
+
+  for obj in detections.to_objects():
+    draw_object(draw, obj, labels)
 
   img.show()
   if args.output:
@@ -48,7 +48,8 @@ def get_scores(interpreter):
   """Gets the output (all scores) from a classification model, dequantizing it if necessary.
 
   Args:
-    interpreter: The ``tf.lite.Interpreter`` to query for output.
+    interpreter: The ``tf.lite.Interpreter`` to query for output, or a
+      :obj:`~pycoral.adapters.common.InterpreterView` of it.
 
   Returns:
     The output tensor (flattened and dequantized) as :obj:`numpy.array`.
@@ -89,11 +90,69 @@ def get_classes_from_scores(scores,
   return sorted(classes, key=operator.itemgetter(1), reverse=True)
 
 
+def get_batched_classes_from_scores(scores,
+                                    top_k=float('inf'),
+                                    score_threshold=-float('inf'),
+                                    sort=True):
+  """Gets the top classes of many classifications at once, as arrays.
+
+  This is the batched counterpart of :func:`get_classes_from_scores`, for the
+  scores of many images, tiles or crops. Instead of building :obj:`Class`
+  objects, it selects the top classes of all rows with a single row-wise
+  ``argpartition``.
+
+  Args:
+    scores: The dequantized scores as :obj:`numpy.array` of shape (N, C),
+      one row per classification.
+    top_k (int): The number of top results to return per row.
+    score_threshold: The score threshold for results, either as a float for
+      all rows or as an array of N floats, one per row.
+    sort (bool): Whether to order the results of each row by decreasing
+      score. Otherwise, their order is arbitrary.
+
+  Returns:
+    A tuple (ids, scores) of :obj:`numpy.array` objects of shape (N, K),
+    where K is ``top_k`` (or C if it's larger, or 0 if it's not positive).
+    Results below the score threshold have id -1 and score ``-inf``; when
+    sorted, they come last.
+  """
+  scores = np.asarray(scores)
+  if scores.ndim != 2:
+    raise ValueError('Expected scores of shape (N, C), but got {}'.format(
+        scores.shape))
+  num_rows, num_cols = scores.shape
+  top_k = int(max(0, min(top_k, num_cols)))
+  if top_k == 0:
+    ids = np.zeros((num_rows, 0), dtype=np.intp)
+  elif top_k < num_cols:
+    ids = np.argpartition(scores, num_cols - top_k, axis=1)[:, -top_k:]
+  else:
+    ids = np.tile(np.arange(num_cols), (num_rows, 1))
+  top_scores = np.take_along_axis(scores, ids, axis=1)
+
+  if sort:
+    order = np.argsort(top_scores, axis=1)[:, ::-1]
+    ids = np.take_along_axis(ids, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+  threshold = np.asarray(score_threshold)
+  if threshold.ndim == 1:
+    threshold = threshold[:, np.newaxis]
+  below = top_scores < threshold
+  return (np.where(below, -1, ids),
+          np.where(below, -np.inf, top_scores))
+
+
 def get_classes(interpreter, top_k=float('inf'), score_threshold=-float('inf')):
   """Gets results from a classification model as a list of ordered classes.
 
+  For quantized models, the top-k selection and the threshold comparison run
+  directly on the raw output tensor (the threshold is converted into the
+  quantized domain once), and only the winning scores are dequantized.
+
   Args:
-    interpreter: The ``tf.lite.Interpreter`` to query for results.
+    interpreter: The ``tf.lite.Interpreter`` to query for results, or a
+      :obj:`~pycoral.adapters.common.InterpreterView` of it.
     top_k (int): The number of top results to return.
     score_threshold (float): The score threshold for results. All returned
       results have a score greater-than-or-equal-to this value.
@@ -102,5 +161,35 @@ def get_classes(interpreter, top_k=float('inf'), score_threshold=-float('inf')):
     A list of :obj:`Class` objects representing the classification results,
     ordered by scores.
   """
-  return get_classes_from_scores(
-      get_scores(interpreter), top_k, score_threshold)
+  output_details = interpreter.get_output_details()[0]
+  scale, zero_point = output_details['quantization']
+  if not np.issubdtype(output_details['dtype'], np.integer) or scale <= 0:
+    return get_classes_from_scores(
+        get_scores(interpreter), top_k, score_threshold)
+
+  output_data = interpreter.tensor(output_details['index'])().ravel()
+  ids = None
+  if score_threshold > -float('inf'):
+    # Rounded down with a quantum of slack, so this only drops values that
+    # are surely below the threshold. The exact comparison happens after
+    # dequantizing.
+    raw_threshold = np.floor(zero_point + score_threshold / scale) - 1
+    ids = np.flatnonzero(output_data >= raw_threshold)
+    if not len(ids):  # pylint: disable=g-explicit-length-test
+      return []
+    values = output_data[ids]
+  else:
+    values = output_data
+
+  top_k = min(top_k, len(values))
+  top = np.argpartition(values, -top_k)[-top_k:]
+  if ids is not None:
+    top = ids[top]
+  # Always convert to np.int64 to avoid overflow on subtraction.
+  scores = scale * (output_data[top].astype(np.int64) - zero_point)
+  classes = [
+      Class(i, score)
+      for i, score in zip(top, scores)
+      if score >= score_threshold
+  ]
+  return sorted(classes, key=operator.itemgetter(1), reverse=True)
@@ -17,15 +17,122 @@
 import numpy as np
 
 
+class InterpreterView:
+  """Caches a model's tensor metadata so it isn't rebuilt on every inference.
+
+  ``tf.lite.Interpreter.get_input_details()`` and ``get_output_details()``
+  build new lists of dicts on each call, and all the adapter functions call
+  them at least once per frame. An ``InterpreterView`` resolves the tensor
+  details, tensor accessors and input size once, and then behaves like the
+  interpreter it wraps, so it can be passed to any function that accepts a
+  ``tf.lite.Interpreter``::
+
+    interpreter = edgetpu.make_interpreter(model_file)
+    interpreter.allocate_tensors()
+    view = common.InterpreterView(interpreter)
+    while True:
+      common.set_input(view, next_frame())
+      view.invoke()
+      objs = detect.get_objects(view, score_threshold=0.5)
+
+  The view holds the accessor functions returned by
+  ``tf.lite.Interpreter.tensor()`` rather than the numpy arrays themselves,
+  because the interpreter refuses to ``invoke()`` while any numpy view of its
+  internal buffers is alive.
+
+  **Note:** Create the view after calling ``allocate_tensors()``, and create a
+  new one if you later resize the model's input tensors.
+  """
+
+  def __init__(self, interpreter):
+    """
+    Args:
+      interpreter: The ``tf.lite.Interpreter`` holding the model, with its
+        tensors already allocated.
+    """
+    self._interpreter = interpreter
+    self._input_details = interpreter.get_input_details()
+    self._output_details = interpreter.get_output_details()
+    # pylint: disable=protected-access
+    self._signature_list = interpreter._get_full_signature_list()
+    # pylint: enable=protected-access
+    self._tensors = {}
+    for details in self._input_details + self._output_details:
+      self._tensors[details['index']] = interpreter.tensor(details['index'])
+    self._input_tensor = self._tensors[self._input_details[0]['index']]
+    self._output_tensors = [
+        self._tensors[details['index']] for details in self._output_details
+    ]
+    shape = self._input_details[0]['shape']
+    self._input_size = None
+    if len(shape) == 4:
+      self._input_size = (int(shape[2]), int(shape[1]))
+
+  def __getattr__(self, name):
+    return getattr(self._interpreter, name)
+
+  @property
+  def interpreter(self):
+    """The wrapped ``tf.lite.Interpreter``."""
+    return self._interpreter
+
+  @property
+  def input_size(self):
+    """The model's input size as (width, height) tuple."""
+    if self._input_size is None:
+      raise ValueError('Input tensor is not of shape (1, height, width, c).')
+    return self._input_size
+
+  def get_input_details(self):
+    """Returns the cached result of ``get_input_details()``.
+
+    The returned list is shared, so don't modify it.
+    """
+    return self._input_details
+
+  def get_output_details(self):
+    """Returns the cached result of ``get_output_details()``.
+
+    The returned list is shared, so don't modify it.
+    """
+    return self._output_details
+
+  def _get_full_signature_list(self):
+    return self._signature_list
+
+  def tensor(self, tensor_index):
+    """Returns the cached accessor function for the given tensor.
+
+    Same as ``tf.lite.Interpreter.tensor()``, so don't hold on to the arrays
+    returned by the accessor across calls to ``invoke()``.
+    """
+    accessor = self._tensors.get(tensor_index)
+    if accessor is None:
+      accessor = self._interpreter.tensor(tensor_index)
+      self._tensors[tensor_index] = accessor
+    return accessor
+
+  def input_tensor(self):
+    """Returns the first input tensor, including batch dimension."""
+    return self._input_tensor()
+
+  def output_tensor(self, i):
+    """Returns the ith output tensor as :obj:`numpy.array`."""
+    return self._output_tensors[i]()
+
+
 def output_tensor(interpreter, i):
   """Gets a model's ith output tensor.
 
   Args:
-    interpreter: The ``tf.lite.Interpreter`` holding the model.
+    interpreter: The ``tf.lite.Interpreter`` holding the model, or an
+      :obj:`InterpreterView` of it.
     i (int): The index position of an output tensor.
   Returns:
     The output tensor at the specified position.
   """
+  if isinstance(interpreter, InterpreterView):
+    return interpreter.output_tensor(i)
   return interpreter.tensor(interpreter.get_output_details()[i]['index'])()
 
 
@@ -45,10 +152,13 @@ def input_size(interpreter):
   """Gets a model's input size as (width, height) tuple.
 
   Args:
-    interpreter: The ``tf.lite.Interpreter`` holding the model.
+    interpreter: The ``tf.lite.Interpreter`` holding the model, or an
+      :obj:`InterpreterView` of it.
   Returns:
     The input tensor size as (width, height) tuple.
   """
+  if isinstance(interpreter, InterpreterView):
+    return interpreter.input_size
   _, height, width, _ = input_details(interpreter, 'shape')
   return width, height
 
@@ -57,10 +167,13 @@ def input_tensor(interpreter):
   """Gets a model's input tensor view as numpy array of shape (height, width, 3).
 
   Args:
-    interpreter: The ``tf.lite.Interpreter`` holding the model.
+    interpreter: The ``tf.lite.Interpreter`` holding the model, or an
+      :obj:`InterpreterView` of it.
   Returns:
     The input tensor view as :obj:`numpy.array` (height, width, 3).
   """
+  if isinstance(interpreter, InterpreterView):
+    return interpreter.input_tensor()[0]
   tensor_index = input_details(interpreter, 'index')
   return interpreter.tensor(tensor_index)()[0]
 
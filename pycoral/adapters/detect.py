@@ -15,6 +15,9 @@
 """Functions to work with a detection model."""
 
 import collections
+
+import numpy as np
+
 from pycoral.adapters import common
 
 Object = collections.namedtuple('Object', ['id', 'score', 'bbox'])
@@ -181,57 +184,583 @@ class BBox(collections.namedtuple('BBox', ['xmin', 'ymin', 'xmax', 'ymax'])):
     return area / (a.area + b.area - area)
 
 
-def get_objects(interpreter,
-                score_threshold=-float('inf'),
-                image_scale=(1.0, 1.0)):
-  """Gets results from a detection model as a list of detected objects.
+class BBoxArray:
+  """A set of bounding boxes backed by a numpy array of shape (N, 4).
+
+  Each row holds one box as (xmin, ymin, xmax, ymax), the same layout as
+  :obj:`BBox`. All operations work on every box at once, and :func:`iou` and
+  :func:`intersection` compare two sets of boxes pairwise, which makes this
+  class the better choice than :obj:`BBox` when matching or merging many
+  boxes.
+
+  To create an instance::
+
+    boxes = BBoxArray([[0, 0, 10, 10], [5, 5, 20, 20]])
+    boxes = BBoxArray.from_bboxes([obj.bbox for obj in objs])
+    boxes = BBoxArray(detect.get_detections(interpreter).boxes)
+  """
+
+  def __init__(self, boxes):
+    """
+    Args:
+      boxes: An array-like of shape (N, 4), where each row is (xmin, ymin,
+        xmax, ymax). Numpy arrays are used without a copy.
+    """
+    boxes = np.asarray(boxes)
+    if boxes.size == 0:
+      boxes = boxes.reshape(0, 4)
+    if boxes.ndim != 2 or boxes.shape[1] != 4:
+      raise ValueError(
+          'Expected boxes of shape (N, 4), but got {}'.format(boxes.shape))
+    self._boxes = boxes
+
+  @staticmethod
+  def from_bboxes(bboxes):
+    """Creates a :obj:`BBoxArray` from a list of :obj:`BBox` objects.
+
+    Args:
+      bboxes: A list of :obj:`BBox` objects.
+
+    Returns:
+      A :obj:`BBoxArray` holding the same boxes, in the same order.
+    """
+    return BBoxArray(np.array(bboxes).reshape(-1, 4))
+
+  def to_bboxes(self):
+    """Converts the boxes to a list of :obj:`BBox` objects."""
+    return [BBox(*box) for box in self._boxes.tolist()]
+
+  @property
+  def boxes(self):
+    """The underlying :obj:`numpy.array` of shape (N, 4)."""
+    return self._boxes
+
+  @property
+  def xmin(self):
+    """X-axis start points as :obj:`numpy.array` of shape (N,)."""
+    return self._boxes[:, 0]
+
+  @property
+  def ymin(self):
+    """Y-axis start points as :obj:`numpy.array` of shape (N,)."""
+    return self._boxes[:, 1]
+
+  @property
+  def xmax(self):
+    """X-axis end points as :obj:`numpy.array` of shape (N,)."""
+    return self._boxes[:, 2]
+
+  @property
+  def ymax(self):
+    """Y-axis end points as :obj:`numpy.array` of shape (N,)."""
+    return self._boxes[:, 3]
+
+  @property
+  def width(self):
+    """The bounding box widths."""
+    return self.xmax - self.xmin
+
+  @property
+  def height(self):
+    """The bounding box heights."""
+    return self.ymax - self.ymin
+
+  @property
+  def area(self):
+    """The bounding box areas."""
+    return self.width * self.height
+
+  @property
+  def valid(self):
+    """A boolean :obj:`numpy.array` indicating which boxes are valid.
+
+    See :attr:`BBox.valid`.
+    """
+    return (self.width >= 0) & (self.height >= 0)
+
+  def __len__(self):
+    return len(self._boxes)
+
+  def __getitem__(self, index):
+    """Returns a :obj:`BBox` for an integer index, else a :obj:`BBoxArray`."""
+    if isinstance(index, (int, np.integer)):
+      return BBox(*self._boxes[index].tolist())
+    return BBoxArray(self._boxes[index])
+
+  def __repr__(self):
+    return 'BBoxArray({!r})'.format(self._boxes)
+
+  def scale(self, sx, sy):
+    """Scales the bounding boxes.
+
+    Args:
+      sx (float): Scale factor for the x-axis.
+      sy (float): Scale factor for the y-axis.
+
+    Returns:
+      A :obj:`BBoxArray` with the rescaled dimensions.
+    """
+    return BBoxArray(self._boxes * np.array([sx, sy, sx, sy]))
+
+  def translate(self, dx, dy):
+    """Translates the bounding box positions.
+
+    Args:
+      dx (int): Number of pixels to move the boxes on the x-axis.
+      dy (int): Number of pixels to move the boxes on the y-axis.
+
+    Returns:
+      A :obj:`BBoxArray` at the new positions.
+    """
+    return BBoxArray(self._boxes + np.array([dx, dy, dx, dy]))
+
+  def clip(self, bbox):
+    """Clips the bounding boxes to the given area.
+
+    Args:
+      bbox: A :obj:`BBox` defining the area to clip to, such as
+        ``BBox(0, 0, image_width, image_height)``.
+
+    Returns:
+      A :obj:`BBoxArray` with every coordinate inside the given area. Boxes
+      that were entirely outside the area end up with zero width or height.
+    """
+    low = np.array([bbox.xmin, bbox.ymin, bbox.xmin, bbox.ymin])
+    high = np.array([bbox.xmax, bbox.ymax, bbox.xmax, bbox.ymax])
+    return BBoxArray(np.clip(self._boxes, low, high))
+
+  def astype(self, dtype):
+    """Returns a :obj:`BBoxArray` with coordinates cast to the given dtype.
+
+    For example, ``astype(int)`` truncates the coordinates the same way as
+    ``BBox.map(int)``.
+    """
+    return BBoxArray(self._boxes.astype(dtype))
+
+  @staticmethod
+  def intersection(a, b):
+    """Gets the pairwise intersection areas between two sets of boxes.
+
+    Args:
+      a: :obj:`BBoxArray` A, with N boxes.
+      b: :obj:`BBoxArray` B, with M boxes.
+
+    Returns:
+      A :obj:`numpy.array` of shape (N, M), where element (i, j) is the area
+      where ``a[i]`` and ``b[j]`` intersect, or 0 if they don't overlap.
+    """
+    a, b = a.boxes, b.boxes
+    xmin = np.maximum(a[:, None, 0], b[None, :, 0])
+    ymin = np.maximum(a[:, None, 1], b[None, :, 1])
+    xmax = np.minimum(a[:, None, 2], b[None, :, 2])
+    ymax = np.minimum(a[:, None, 3], b[None, :, 3])
+    return np.maximum(xmax - xmin, 0) * np.maximum(ymax - ymin, 0)
+
+  @staticmethod
+  def iou(a, b):
+    """Gets the pairwise intersection-over-union values for two sets of boxes.
+
+    Args:
+      a: :obj:`BBoxArray` A, with N boxes.
+      b: :obj:`BBoxArray` B, with M boxes.
+
+    Returns:
+      A :obj:`numpy.array` of shape (N, M), where element (i, j) is the same
+      value as ``BBox.iou(a[i], b[j])``.
+    """
+    intersection = BBoxArray.intersection(a, b)
+    union = a.area[:, None] + b.area[None, :] - intersection
+    with np.errstate(divide='ignore', invalid='ignore'):
+      iou = intersection / union
+    return np.where(union > 0, iou, 0.0)
+
+
+class Detections(
+    collections.namedtuple('Detections', ['ids', 'scores', 'boxes'])):
+  """All objects detected in one inference, stored as parallel arrays.
+
+  This is the array-based counterpart of a list of :obj:`Object`, as returned
+  by :func:`get_detections`. Element ``i`` of each array describes the same
+  object.
+
+  .. py:attribute:: ids
+
+      The objects' class ids as :obj:`numpy.array` of shape (N,).
+
+  .. py:attribute:: scores
+
+      The objects' prediction scores as :obj:`numpy.array` of shape (N,).
+
+  .. py:attribute:: boxes
+
+      The objects' bounding boxes as :obj:`numpy.array` of shape (N, 4),
+      where each row is (xmin, ymin, xmax, ymax).
+  """
+  __slots__ = ()
+
+  def select(self, indices):
+    """Selects a subset of the detections.
+
+    Args:
+      indices: Integer indices or a boolean mask, such as the result of
+        :func:`nms`.
+
+    Returns:
+      A :obj:`Detections` object holding only the selected detections, in the
+      order given by ``indices``.
+    """
+    return Detections(
+        ids=self.ids[indices],
+        scores=self.scores[indices],
+        boxes=self.boxes[indices])
+
+  def to_objects(self):
+    """Converts the detections to a list of :obj:`Object`.
+
+    Returns:
+      A list of :obj:`Object` objects, in the same order as the arrays.
+    """
+    return [
+        Object(id=class_id, score=score, bbox=BBox(*box))
+        for class_id, score, box in zip(self.ids.tolist(), self.scores.tolist(),
+                                        self.boxes.tolist())
+    ]
+
+
+def _box_array(boxes):
+  """Returns boxes as a float (N, 4) numpy array."""
+  if isinstance(boxes, BBoxArray):
+    boxes = boxes.boxes
+  return np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+
+
+def _iou_with(boxes, areas, i, others):
+  """Returns the IoU between box i and each of the boxes in others."""
+  xmin = np.maximum(boxes[i, 0], boxes[others, 0])
+  ymin = np.maximum(boxes[i, 1], boxes[others, 1])
+  xmax = np.minimum(boxes[i, 2], boxes[others, 2])
+  ymax = np.minimum(boxes[i, 3], boxes[others, 3])
+  intersection = np.maximum(xmax - xmin, 0) * np.maximum(ymax - ymin, 0)
+  union = areas[i] + areas[others] - intersection
+  return np.divide(
+      intersection, union, out=np.zeros_like(union), where=union > 0)
+
+
+# Number of boxes whose overlaps are computed at once by nms(), which bounds
+# its temporary arrays to _NMS_BLOCK_SIZE * N elements.
+_NMS_BLOCK_SIZE = 128
+
+
+def nms(boxes, scores, iou_threshold, top_k=None):
+  """Performs class-agnostic non-maximum suppression (NMS).
+
+  Selects boxes in order of decreasing score, and discards every box that
+  overlaps an already selected box by more than ``iou_threshold``.
+
+  Args:
+    boxes: The bounding boxes as a :obj:`BBoxArray` or an array-like of shape
+      (N, 4), where each row is (xmin, ymin, xmax, ymax).
+    scores: The box scores as an array-like of shape (N,).
+    iou_threshold (float): Boxes with an IoU greater than this value with a
+      selected box are suppressed.
+    top_k (int): The maximum number of boxes to select. If None, selects all
+      boxes that survive suppression.
+
+  Returns:
+    The indices of the selected boxes as :obj:`numpy.array`, ordered by
+    decreasing score.
+  """
+  boxes = _box_array(boxes)
+  scores = np.asarray(scores).reshape(-1)
+  order = np.argsort(-scores, kind='stable')
+  xmin, ymin, xmax, ymax = np.ascontiguousarray(boxes[order].T)
+  areas = (xmax - xmin) * (ymax - ymin)
+  n = len(order)
+  suppressed = np.zeros(n, dtype=bool)
+  for start in range(0, n - 1, _NMS_BLOCK_SIZE):
+    # Compare each box in the block only with the lower-scored boxes after it.
+    rows = slice(start, min(start + _NMS_BLOCK_SIZE, n))
+    cols = slice(start + 1, n)
+    intersection = np.minimum.outer(xmax[rows], xmax[cols])
+    intersection -= np.maximum.outer(xmin[rows], xmin[cols])
+    np.maximum(intersection, 0, out=intersection)
+    height = np.minimum.outer(ymax[rows], ymax[cols])
+    height -= np.maximum.outer(ymin[rows], ymin[cols])
+    np.maximum(height, 0, out=height)
+    intersection *= height
+    # iou > t is the same as intersection > t * union, without the division.
+    union = np.add.outer(areas[rows], areas[cols])
+    union -= intersection
+    overlaps = np.triu(intersection > iou_threshold * union)
+    # Boxes are in score order, so by the time a row is reached, whether that
+    # box is suppressed is final. Only rows that overlap some box need a visit.
+    for row in np.flatnonzero(overlaps.any(axis=1)):
+      if not suppressed[start + row]:
+        suppressed[start + 1:] |= overlaps[row]
+  return order[~suppressed][:top_k]
+
+
+def batched_nms(boxes, scores, class_ids, iou_threshold, top_k=None):
+  """Performs non-maximum suppression independently for each class.
+
+  Boxes of different classes never suppress each other. All classes are
+  processed in a single :func:`nms` call, by moving the boxes of each class
+  into a separate region of the coordinate space so they can't overlap.
+
+  Args:
+    boxes: The bounding boxes as a :obj:`BBoxArray` or an array-like of shape
+      (N, 4), where each row is (xmin, ymin, xmax, ymax).
+    scores: The box scores as an array-like of shape (N,).
+    class_ids: The box class ids as an array-like of shape (N,).
+    iou_threshold (float): Boxes with an IoU greater than this value with a
+      selected box of the same class are suppressed.
+    top_k (int): The maximum number of boxes to select, over all classes. If
+      None, selects all boxes that survive suppression.
+
+  Returns:
+    The indices of the selected boxes as :obj:`numpy.array`, ordered by
+    decreasing score.
+  """
+  boxes = _box_array(boxes)
+  if not boxes.size:
+    return np.zeros(0, dtype=int)
+  class_ids = np.asarray(class_ids).reshape(-1)
+  # Unique class index per box, so large or negative ids don't matter.
+  _, class_index = np.unique(class_ids, return_inverse=True)
+  span = boxes.max() - boxes.min() + 1
+  offsets = (class_index.reshape(-1) * span)[:, None]
+  return nms(boxes - boxes.min() + offsets, scores, iou_threshold, top_k)
+
+
+def soft_nms(boxes,
+             scores,
+             iou_threshold=0.3,
+             sigma=0.5,
+             method='gaussian',
+             score_threshold=0.001,
+             top_k=None):
+  """Performs soft non-maximum suppression (Soft-NMS).
+
+  Instead of discarding the boxes that overlap a selected box, Soft-NMS
+  decays their scores according to the overlap, and only discards boxes whose
+  score drops below ``score_threshold``. See `Bodla et al., 2017
+  <https://arxiv.org/abs/1704.04503>`_.
+
+  Args:
+    boxes: The bounding boxes as a :obj:`BBoxArray` or an array-like of shape
+      (N, 4), where each row is (xmin, ymin, xmax, ymax).
+    scores: The box scores as an array-like of shape (N,).
+    iou_threshold (float): For the 'linear' method, only boxes with an IoU
+      greater than this value with a selected box have their score decayed.
+      Unused by the 'gaussian' method.
+    sigma (float): The variance of the Gaussian decay, for the 'gaussian'
+      method.
+    method (str): The score decay function, either 'gaussian' (score is
+      multiplied by ``exp(-iou^2 / sigma)``) or 'linear' (score is
+      multiplied by ``1 - iou``).
+    score_threshold (float): Boxes whose decayed score is lower than this
+      value are discarded.
+    top_k (int): The maximum number of boxes to select. If None, selects all
+      boxes that stay above ``score_threshold``.
+
+  Returns:
+    A tuple (indices, scores), where indices are the selected boxes as
+    :obj:`numpy.array`, in the order they were selected, and scores are their
+    decayed scores.
+  """
+  if method not in ('gaussian', 'linear'):
+    raise ValueError('Unsupported soft-NMS method: {}'.format(method))
+  boxes = _box_array(boxes)
+  scores = np.array(scores, dtype=np.float64).reshape(-1)
+  if top_k is None:
+    top_k = len(scores)
+  areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+  remaining = np.flatnonzero(scores >= score_threshold)
+  keep = []
+  keep_scores = []
+  while remaining.size and len(keep) < top_k:
+    best = np.argmax(scores[remaining])
+    i = remaining[best]
+    keep.append(i)
+    keep_scores.append(scores[i])
+    remaining = np.delete(remaining, best)
+    iou = _iou_with(boxes, areas, i, remaining)
+    if method == 'gaussian':
+      weights = np.exp(-(iou * iou) / sigma)
+    else:
+      weights = np.where(iou > iou_threshold, 1.0 - iou, 1.0)
+    scores[remaining] *= weights
+    remaining = remaining[scores[remaining] >= score_threshold]
+  return np.array(keep, dtype=int), np.array(keep_scores)
+
+
+class DetectionOutputLayout:
+  """The output tensors of a detection model, resolved once per interpreter.
+
+  Detection models order their four output tensors (boxes, class ids, scores
+  and count) in one of several ways, so finding them requires querying the
+  model's signature and output details. That never changes for a given
+  model, so the layout resolves the tensors once and keeps their accessor
+  functions ready for every inference::
+
+    layout = detect.DetectionOutputLayout(interpreter)
+    while True:
+      common.set_input(interpreter, next_frame())
+      interpreter.invoke()
+      boxes, class_ids, scores = layout.tensors()
+
+  :func:`get_objects` and :func:`get_detections` use the layout returned by
+  :func:`get_output_layout`, so they don't repeat this work on every frame.
+  """
+
+  def __init__(self, interpreter):
+    """
+    Args:
+      interpreter: The ``tf.lite.Interpreter`` holding the detection model,
+        with its tensors already allocated, or a
+        :obj:`~pycoral.adapters.common.InterpreterView` of it.
+    """
+    # If a model has signature, we use the signature output tensor names to
+    # parse the results. Otherwise, we parse the results based on some
+    # assumption of the output tensor order and size.
+    # pylint: disable=protected-access
+    signature_list = interpreter._get_full_signature_list()
+    # pylint: enable=protected-access
+    if signature_list:
+      if len(signature_list) > 1:
+        raise ValueError('Only support model with one signature.')
+      signature = signature_list[next(iter(signature_list))]
+      outputs = signature['outputs']
+      indices = (outputs['output_3'], outputs['output_2'],
+                 outputs['output_1'], outputs.get('output_0'))
+    else:
+      details = interpreter.get_output_details()
+      output = [d['index'] for d in details]
+      if np.prod(details[3]['shape']) == 1:
+        indices = (output[0], output[1], output[2], output[3])
+      else:
+        indices = (output[1], output[3], output[0], output[2])
+    (self._boxes_index, self._class_ids_index, self._scores_index,
+     self._count_index) = indices
+    self._boxes = interpreter.tensor(self._boxes_index)
+    self._class_ids = interpreter.tensor(self._class_ids_index)
+    self._scores = interpreter.tensor(self._scores_index)
+
+  @property
+  def boxes_index(self):
+    """The tensor index of the boxes output."""
+    return self._boxes_index
+
+  @property
+  def class_ids_index(self):
+    """The tensor index of the class ids output."""
+    return self._class_ids_index
+
+  @property
+  def scores_index(self):
+    """The tensor index of the scores output."""
+    return self._scores_index
+
+  @property
+  def count_index(self):
+    """The tensor index of the detection count output, or None if unknown."""
+    return self._count_index
+
+  def boxes(self):
+    """Returns the boxes as (ymin, xmin, ymax, xmax), normalized to [0, 1]."""
+    return self._boxes()[0]
+
+  def class_ids(self):
+    """Returns the class ids of the detections."""
+    return self._class_ids()[0]
+
+  def scores(self):
+    """Returns the scores of the detections."""
+    return self._scores()[0]
+
+  def tensors(self):
+    """Returns the (boxes, class_ids, scores) output tensors.
+
+    As with ``tf.lite.Interpreter.tensor()``, these are views of the
+    interpreter's buffers, so don't hold on to them across calls to
+    ``invoke()``.
+    """
+    return self._boxes()[0], self._class_ids()[0], self._scores()[0]
+
+
+def get_output_layout(interpreter):
+  """Gets the :obj:`DetectionOutputLayout` of an interpreter.
+
+  The layout is created on the first call and then cached on the interpreter
+  object itself, so it lives exactly as long as the interpreter does. (A
+  weak-keyed cache wouldn't work, because the layout's tensor accessors refer
+  back to the interpreter and would keep it alive forever.)
+
+  Args:
+    interpreter: The ``tf.lite.Interpreter`` holding the detection model, or a
+      :obj:`~pycoral.adapters.common.InterpreterView` of it.
+
+  Returns:
+    The interpreter's :obj:`DetectionOutputLayout`.
+  """
+  layout = getattr(interpreter, '_coral_detection_layout', None)
+  if layout is None:
+    layout = DetectionOutputLayout(interpreter)
+    interpreter._coral_detection_layout = layout  # pylint: disable=protected-access
+  return layout
+
+
+def get_detections(interpreter,
+                   score_threshold=-float('inf'),
+                   image_scale=(1.0, 1.0)):
+  """Gets results from a detection model as arrays of ids, scores and boxes.
+
+  This returns the same results as :func:`get_objects`, but it applies the
+  score threshold and scales the bounding boxes with numpy operations over all
+  detections at once, instead of building Python objects for each one.
 
   Args:
-    interpreter: The ``tf.lite.Interpreter`` to query for results.
+    interpreter: The ``tf.lite.Interpreter`` to query for results, or a
+      :obj:`~pycoral.adapters.common.InterpreterView` of it.
     score_threshold (float): The score threshold for results. All returned
       results have a score greater-than-or-equal-to this value.
     image_scale (float, float): Scaling factor to apply to the bounding boxes as
       (x-scale-factor, y-scale-factor), where each factor is from 0 to 1.0.
 
   Returns:
-    A list of :obj:`Object` objects, which each contains the detected object's
-    id, score, and bounding box as :obj:`BBox`.
+    A :obj:`Detections` object. Its arrays are copies, so they stay valid
+    after the next inference.
   """
-  # If a model has signature, we use the signature output tensor names to parse
-  # the results. Otherwise, we parse the results based on some assumption of the
-  # output tensor order and size.
-  # pylint: disable=protected-access
-  signature_list = interpreter._get_full_signature_list()
-  # pylint: enable=protected-access
-  if signature_list:
-    if len(signature_list) > 1:
-      raise ValueError('Only support model with one signature.')
-    signature = signature_list[next(iter(signature_list))]
-    count = int(interpreter.tensor(signature['outputs']['output_0'])()[0])
-    scores = interpreter.tensor(signature['outputs']['output_1'])()[0]
-    class_ids = interpreter.tensor(signature['outputs']['output_2'])()[0]
-    boxes = interpreter.tensor(signature['outputs']['output_3'])()[0]
-  elif common.output_tensor(interpreter, 3).size == 1:
-    boxes = common.output_tensor(interpreter, 0)[0]
-    class_ids = common.output_tensor(interpreter, 1)[0]
-    scores = common.output_tensor(interpreter, 2)[0]
-    count = int(common.output_tensor(interpreter, 3)[0])
-  else:
-    scores = common.output_tensor(interpreter, 0)[0]
-    boxes = common.output_tensor(interpreter, 1)[0]
-    count = (int)(common.output_tensor(interpreter, 2)[0])
-    class_ids = common.output_tensor(interpreter, 3)[0]
+  boxes, class_ids, scores = get_output_layout(interpreter).tensors()
 
   width, height = common.input_size(interpreter)
   image_scale_x, image_scale_y = image_scale
   sx, sy = width / image_scale_x, height / image_scale_y
 
-  def make(i):
-    ymin, xmin, ymax, xmax = boxes[i]
-    return Object(
-        id=int(class_ids[i]),
-        score=float(scores[i]),
-        bbox=BBox(xmin=xmin, ymin=ymin, xmax=xmax,
-                  ymax=ymax).scale(sx, sy).map(int))
+  keep = scores >= score_threshold
+  # Reorder (ymin, xmin, ymax, xmax) to (xmin, ymin, xmax, ymax) and scale.
+  boxes = boxes[keep][:, [1, 0, 3, 2]] * np.array([sx, sy, sx, sy])
+  return Detections(
+      ids=class_ids[keep].astype(int),
+      scores=scores[keep],
+      boxes=boxes.astype(int))
+
 
-  return [make(i) for i in range(len(scores)) if scores[i] >= score_threshold]
+def get_objects(interpreter,
+                score_threshold=-float('inf'),
+                image_scale=(1.0, 1.0)):
+  """Gets results from a detection model as a list of detected objects.
+
+  Args:
+    interpreter: The ``tf.lite.Interpreter`` to query for results, or a
+      :obj:`~pycoral.adapters.common.InterpreterView` of it.
+    score_threshold (float): The score threshold for results. All returned
+      results have a score greater-than-or-equal-to this value.
+    image_scale (float, float): Scaling factor to apply to the bounding boxes as
+      (x-scale-factor, y-scale-factor), where each factor is from 0 to 1.0.
+
+  Returns:
+    A list of :obj:`Object` objects, which each contains the detected object's
+    id, score, and bounding box as :obj:`BBox`.
+  """
+  return get_detections(interpreter, score_threshold, image_scale).to_objects()
@@ -0,0 +1,284 @@
+# Lint as: python3
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Functions to resize and normalize images straight into the input tensor.
+
+:func:`~pycoral.adapters.common.set_resized_input` zero-fills the whole input
+tensor, lets a callback resize the image (usually with PIL), and then copies
+the result into the tensor. A :obj:`Preprocessor` instead precomputes the
+resize for a given image size once, and then resizes, letterboxes and
+normalizes each frame with numpy, writing directly into the input tensor::
+
+  preprocessor = preprocess.Preprocessor(
+      (640, 480), common.input_size(interpreter), method='bilinear',
+      align='center')
+  while True:
+    transform = preprocessor.set_input(interpreter, next_frame())
+    interpreter.invoke()
+    detections = detect.get_detections(interpreter)
+    boxes = transform.to_image(detections.boxes)
+"""
+
+import collections
+
+import numpy as np
+
+from pycoral.adapters import common
+
+
+def make_lut(quantization=(0.0, 0), mean=0.0, std=1.0, dtype=np.uint8):
+  """Makes a lookup table that normalizes and quantizes uint8 pixel values.
+
+  The table folds both transforms an input usually goes through:
+
+  1. normalization: ``f = (pixel - mean) / std``
+  2. quantization: ``q = f / scale + zero_point``
+
+  so applying it to a frame is a single gather, ``lut[frame]``.
+
+  Args:
+    quantization: The input tensor's quantization parameters as (scale,
+      zero_point), as found in its ``'quantization'`` details. A scale of 0
+      means the input isn't quantized, so the table only normalizes.
+    mean (float): The mean to subtract from each pixel value.
+    std (float): The standard deviation to divide each pixel value by.
+    dtype: The input tensor's dtype.
+
+  Returns:
+    A :obj:`numpy.array` of 256 values of type ``dtype``.
+  """
+  values = (np.arange(256, dtype=np.float64) - mean) / std
+  scale, zero_point = quantization
+  if not scale:
+    return values.astype(dtype)
+  values = np.round(values / scale + zero_point)
+  info = np.iinfo(dtype)
+  return np.clip(values, info.min, info.max).astype(dtype)
+
+
+class InputTransform(
+    collections.namedtuple('InputTransform', ['scale', 'offset'])):
+  """Maps the location of an image in the input tensor.
+
+  An image pixel (x, y) is found at input tensor pixel
+  ``(x * scale + offset[0], y * scale + offset[1])``.
+
+  .. py:attribute:: scale
+
+      The resize ratio applied to the image.
+
+  .. py:attribute:: offset
+
+      The image position in the input tensor as (x, y), non-zero when the
+      image is centered.
+  """
+  __slots__ = ()
+
+  @property
+  def image_scale(self):
+    """The resize ratio as (x-scale-factor, y-scale-factor).
+
+    This can be passed as ``image_scale`` to
+    :func:`~pycoral.adapters.detect.get_objects` when the image isn't
+    centered.
+    """
+    return self.scale, self.scale
+
+  def to_image(self, boxes):
+    """Maps boxes from input tensor coordinates to image coordinates.
+
+    Args:
+      boxes: The boxes as :obj:`numpy.array` of shape (N, 4), where each row
+        is (xmin, ymin, xmax, ymax) in input tensor pixels.
+
+    Returns:
+      A float :obj:`numpy.array` of shape (N, 4) with the boxes in image
+      pixels.
+    """
+    dx, dy = self.offset
+    return (np.asarray(boxes) - np.array([dx, dy, dx, dy])) / self.scale
+
+
+def _bilinear_weights(size, size_out):
+  """Returns the source indices and 8-bit weights of a bilinear resize."""
+  # Sample under the center of each output pixel.
+  src = (np.arange(size_out) + 0.5) * (size / size_out) - 0.5
+  src = np.clip(src, 0, size - 1)
+  index0 = src.astype(int)
+  index1 = np.minimum(index0 + 1, size - 1)
+  weight1 = np.round((src - index0) * 256).astype(np.uint16)
+  return index0, index1, 256 - weight1, weight1
+
+
+class Preprocessor:
+  """Resizes, letterboxes and normalizes frames of a fixed size.
+
+  All sampling indices and interpolation weights are computed once in the
+  constructor. For each frame, the resize is one numpy gather (nearest) or
+  two 16-bit fixed-point passes (bilinear), the normalization is a lookup
+  table gather, and only the padding around the image is cleared.
+  """
+
+  def __init__(self,
+               image_size,
+               input_size,
+               method='bilinear',
+               align='top-left',
+               lut=None):
+    """
+    Args:
+      image_size (int, int): The size of the frames as (width, height).
+      input_size (int, int): The model's input size as (width, height), as
+        returned by :func:`~pycoral.adapters.common.input_size`.
+      method (str): The resize method: 'nearest' or 'bilinear'.
+      align (str): Where the resized image goes in the input tensor:
+        'top-left' (as with
+        :func:`~pycoral.adapters.common.set_resized_input`) or 'center'.
+      lut: An optional lookup table of 256 values applied to the resized
+        pixels, as returned by :func:`make_lut`.
+    """
+    if method not in ('nearest', 'bilinear'):
+      raise ValueError('Unsupported resize method: {}'.format(method))
+    if align not in ('top-left', 'center'):
+      raise ValueError('Unsupported alignment: {}'.format(align))
+    if lut is not None and len(lut) != 256:
+      raise ValueError('Expected a lookup table of 256 values')
+
+    self._image_size = tuple(image_size)
+    self._input_size = tuple(input_size)
+    self._method = method
+    self._lut = None if lut is None else np.asarray(lut)
+
+    w, h = image_size
+    width, height = input_size
+    scale = min(width / w, height / h)
+    # At least one pixel, even for very skewed frames.
+    w_out, h_out = max(1, int(w * scale)), max(1, int(h * scale))
+    dx, dy = 0, 0
+    if align == 'center':
+      dx, dy = (width - w_out) // 2, (height - h_out) // 2
+    self._transform = InputTransform(scale, (dx, dy))
+    self._region = (slice(dy, dy + h_out), slice(dx, dx + w_out))
+    self._pads = [(slice(0, dy), slice(None)),
+                  (slice(dy + h_out, None), slice(None)),
+                  (slice(dy, dy + h_out), slice(0, dx)),
+                  (slice(dy, dy + h_out), slice(dx + w_out, None))]
+
+    self._identity = (w_out, h_out) == (w, h)
+    if method == 'nearest':
+      self._rows = ((np.arange(h_out) + 0.5) * (h / h_out)).astype(int)
+      self._cols = ((np.arange(w_out) + 0.5) * (w / w_out)).astype(int)
+      self._rows = self._rows[:, np.newaxis]
+    else:
+      self._y0, self._y1, self._wy0, self._wy1 = _bilinear_weights(h, h_out)
+      self._x0, self._x1, self._wx0, self._wx1 = _bilinear_weights(w, w_out)
+      self._wy0 = self._wy0[:, np.newaxis, np.newaxis]
+      self._wy1 = self._wy1[:, np.newaxis, np.newaxis]
+      self._wx0 = self._wx0[:, np.newaxis]
+      self._wx1 = self._wx1[:, np.newaxis]
+
+  @property
+  def transform(self):
+    """The :obj:`InputTransform` applied to every frame."""
+    return self._transform
+
+  def _resize(self, image):
+    if self._identity:
+      return image
+    if self._method == 'nearest':
+      return image[self._rows, self._cols]
+    # Fixed-point weights sum to 256, so a weighted sum of uint8 values fits
+    # in uint16. Rows are interpolated first, on the original width.
+    rows = (image[self._y0] * self._wy0 + image[self._y1] * self._wy1 +
+            128) >> 8
+    return ((rows[:, self._x0] * self._wx0 + rows[:, self._x1] * self._wx1 +
+             128) >> 8).astype(np.uint8)
+
+  def apply(self, image, tensor):
+    """Writes a resized, letterboxed and normalized frame into an array.
+
+    Args:
+      image: The frame as uint8 :obj:`numpy.array` of shape (height, width,
+        channels), with the size given to the constructor.
+      tensor: The destination array of shape (input height, input width,
+        channels), such as the view returned by
+        :func:`~pycoral.adapters.common.input_tensor`.
+
+    Returns:
+      The :obj:`InputTransform` mapping the frame into the tensor.
+    """
+    image = np.asarray(image)
+    w, h = self._image_size
+    if (image.ndim != 3 or image.shape[:2] != (h, w) or
+        image.dtype != np.uint8):
+      raise ValueError(
+          'Expected uint8 image of shape ({}, {}, channels), but got {} image '
+          'of shape {}'.format(h, w, image.dtype, image.shape))
+    if tensor.shape[:2] != self._input_size[::-1]:
+      raise ValueError('Expected tensor of size {}, but got {}'.format(
+          self._input_size, tensor.shape[1::-1]))
+
+    resized = self._resize(image)
+    if self._lut is not None:
+      resized = self._lut[resized]
+    tensor[self._region] = resized
+    for pad in self._pads:
+      tensor[pad] = 0
+    return self._transform
+
+  def set_input(self, interpreter, image):
+    """Writes a resized, letterboxed and normalized frame into the input tensor.
+
+    Args:
+      interpreter: The ``tf.lite.Interpreter`` to update, or a
+        :obj:`~pycoral.adapters.common.InterpreterView` of it.
+      image: The frame as uint8 :obj:`numpy.array` of shape (height, width,
+        channels), with the size given to the constructor.
+
+    Returns:
+      The :obj:`InputTransform` mapping the frame into the input tensor, to
+      map results back to the frame.
+    """
+    return self.apply(image, common.input_tensor(interpreter))
+
+
+def set_image_input(interpreter,
+                    image,
+                    method='bilinear',
+                    align='top-left',
+                    lut=None):
+  """Resizes, letterboxes and normalizes an image into the input tensor.
+
+  This builds a one-off :obj:`Preprocessor`; for a stream of frames of the
+  same size, create a :obj:`Preprocessor` once and reuse it instead.
+
+  Args:
+    interpreter: The ``tf.lite.Interpreter`` to update, or a
+      :obj:`~pycoral.adapters.common.InterpreterView` of it.
+    image: The image as uint8 :obj:`numpy.array` of shape (height, width,
+      channels).
+    method (str): The resize method: 'nearest' or 'bilinear'.
+    align (str): Where the resized image goes in the input tensor:
+      'top-left' or 'center'.
+    lut: An optional lookup table of 256 values applied to the resized
+      pixels, as returned by :func:`make_lut`.
+
+  Returns:
+    The :obj:`InputTransform` mapping the image into the input tensor.
+  """
+  image = np.asarray(image)
+  preprocessor = Preprocessor(image.shape[1::-1],
+                              common.input_size(interpreter), method, align,
+                              lut)
+  return preprocessor.set_input(interpreter, image)
@@ -0,0 +1,334 @@
+# Lint as: python3
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Functions to decode the raw outputs of an SSD detection model on the CPU.
+
+SSD models exported without the ``TFLite_Detection_PostProcess`` operator
+output raw box encodings of shape (1, N, 4) and class predictions of shape
+(1, N, num_classes), one row per anchor. :obj:`SsdDecoder` turns them into
+:obj:`~pycoral.adapters.detect.Detections`, so you can choose the score
+threshold, IoU threshold and number of results per deployment::
+
+  decoder = ssd.SsdDecoder(ssd.generate_anchors([19, 10, 5, 3, 2, 1]))
+  interpreter.invoke()
+  detections = decoder.decode(interpreter, score_threshold=0.5)
+"""
+
+import math
+
+import numpy as np
+
+from pycoral.adapters import common
+from pycoral.adapters import detect
+
+
+def generate_anchors(feature_map_sizes,
+                     min_scale=0.2,
+                     max_scale=0.95,
+                     aspect_ratios=(1.0, 2.0, 0.5, 3.0, 1.0 / 3.0),
+                     interpolated_scale_aspect_ratio=1.0,
+                     reduce_boxes_in_lowest_layer=True):
+  """Generates the anchors of an SSD model from its anchor generator config.
+
+  The arguments match the ``ssd_anchor_generator`` config of the TensorFlow
+  Object Detection API, and anchors are generated in the same order. The
+  defaults are those of the SSD MobileNet models, whose 300x300 input gives
+  feature maps of sizes [19, 10, 5, 3, 2, 1] and 1917 anchors.
+
+  Args:
+    feature_map_sizes: The size of each feature map layer, either as an int
+      for square feature maps or as (height, width).
+    min_scale (float): The anchor scale of the first layer.
+    max_scale (float): The anchor scale of the last layer.
+    aspect_ratios: The anchor aspect ratios (width / height) of each layer.
+    interpolated_scale_aspect_ratio (float): The aspect ratio of an extra
+      anchor per location, with a scale between the scales of this layer and
+      the next one. Set to 0 to disable.
+    reduce_boxes_in_lowest_layer (bool): Whether the first layer only uses
+      three anchors per location.
+
+  Returns:
+    The anchors as :obj:`numpy.array` of shape (N, 4), where each row is
+    (ycenter, xcenter, height, width), normalized to [0, 1].
+  """
+  num_layers = len(feature_map_sizes)
+  if num_layers == 1:
+    scales = [(min_scale + max_scale) / 2]
+  else:
+    scales = [
+        min_scale + (max_scale - min_scale) * i / (num_layers - 1)
+        for i in range(num_layers)
+    ]
+  scales.append(1.0)
+
+  anchors = []
+  for layer, size in enumerate(feature_map_sizes):
+    height, width = (size, size) if isinstance(size, int) else size
+    scale = scales[layer]
+    if layer == 0 and reduce_boxes_in_lowest_layer:
+      specs = [(0.1, 1.0), (scale, 2.0), (scale, 0.5)]
+    else:
+      specs = [(scale, ratio) for ratio in aspect_ratios]
+      if interpolated_scale_aspect_ratio > 0:
+        specs.append((math.sqrt(scale * scales[layer + 1]),
+                      interpolated_scale_aspect_ratio))
+    sizes = np.array([(s / math.sqrt(r), s * math.sqrt(r)) for s, r in specs])
+    ycenter, xcenter = np.meshgrid((np.arange(height) + 0.5) / height,
+                                   (np.arange(width) + 0.5) / width,
+                                   indexing='ij')
+    # Ordered by location (row-major), then by anchor spec.
+    centers = np.stack([ycenter.ravel(), xcenter.ravel()], axis=1)
+    centers = np.repeat(centers, len(specs), axis=0)
+    sizes = np.tile(sizes, (height * width, 1))
+    anchors.append(np.concatenate([centers, sizes], axis=1))
+  return np.concatenate(anchors)
+
+
+def load_anchors(path):
+  """Loads SSD anchors from a file.
+
+  Args:
+    path (str): Path to a ``.npy`` file, or to a text file with one anchor
+      per line as four numbers separated by commas or whitespace.
+
+  Returns:
+    The anchors as :obj:`numpy.array` of shape (N, 4), where each row is
+    (ycenter, xcenter, height, width), normalized to [0, 1].
+  """
+  if path.endswith('.npy'):
+    anchors = np.load(path)
+  else:
+    with open(path, 'r') as f:
+      anchors = np.array(
+          [line.replace(',', ' ').split() for line in f if line.strip()],
+          dtype=np.float64)
+  anchors = np.asarray(anchors, dtype=np.float64)
+  if anchors.ndim != 2 or anchors.shape[1] != 4:
+    raise ValueError('Expected anchors of shape (N, 4), but got {}'.format(
+        anchors.shape))
+  return anchors
+
+
+def decode_boxes(box_encodings, anchors, scales=(10.0, 10.0, 5.0, 5.0)):
+  """Decodes SSD box encodings relative to their anchors.
+
+  Args:
+    box_encodings: The dequantized box encodings as :obj:`numpy.array` of
+      shape (N, 4), where each row is (ty, tx, th, tw).
+    anchors: The anchors of the boxes as :obj:`numpy.array` of shape (N, 4),
+      where each row is (ycenter, xcenter, height, width).
+    scales: The box coder scales as (y_scale, x_scale, h_scale, w_scale).
+
+  Returns:
+    The boxes as :obj:`numpy.array` of shape (N, 4), where each row is
+    (ymin, xmin, ymax, xmax), normalized to [0, 1].
+  """
+  encodings = box_encodings / np.asarray(scales)
+  center = encodings[:, :2] * anchors[:, 2:] + anchors[:, :2]
+  half_size = 0.5 * np.exp(encodings[:, 2:]) * anchors[:, 2:]
+  return np.concatenate([center - half_size, center + half_size], axis=1)
+
+
+def _dequantize(data, quantization):
+  scale, zero_point = quantization
+  if not scale:
+    return data.astype(np.float64)
+  return scale * (data.astype(np.float64) - zero_point)
+
+
+class SsdDecoder:
+  """Decodes the raw outputs of an SSD model: scores, boxes and NMS.
+
+  All the work is done with numpy operations over all anchors. Because the
+  score conversion and dequantization are monotonic, the score threshold is
+  converted into the raw output domain once, so only the anchors that pass
+  it are dequantized and decoded.
+  """
+
+  def __init__(self,
+               anchors,
+               box_scales=(10.0, 10.0, 5.0, 5.0),
+               score_converter='sigmoid',
+               has_background=True):
+    """
+    Args:
+      anchors: The model's anchors as :obj:`numpy.array` of shape (N, 4),
+        as returned by :func:`generate_anchors` or :func:`load_anchors`.
+      box_scales: The box coder scales as (y_scale, x_scale, h_scale,
+        w_scale).
+      score_converter (str): How class predictions convert to scores: one of
+        'sigmoid', 'softmax' or 'identity'.
+      has_background (bool): Whether the first class is the background class,
+        which is dropped. Returned class ids don't count it, the same as with
+        the ``TFLite_Detection_PostProcess`` operator.
+    """
+    if score_converter not in ('sigmoid', 'softmax', 'identity'):
+      raise ValueError(
+          'Unsupported score converter: {}'.format(score_converter))
+    self._anchors = np.asarray(anchors, dtype=np.float64)
+    self._box_scales = box_scales
+    self._score_converter = score_converter
+    self._class_offset = 1 if has_background else 0
+
+  @property
+  def anchors(self):
+    """The anchors as :obj:`numpy.array` of shape (N, 4)."""
+    return self._anchors
+
+  def _output_details(self, interpreter):
+    """Returns the output details for (box_encodings, class_predictions).
+
+    They are resolved once per interpreter and number of anchors, and cached
+    on the interpreter, the same as :func:`detect.get_output_layout`.
+    """
+    num_anchors = len(self._anchors)
+    cache = getattr(interpreter, '_coral_ssd_outputs', None)
+    if cache is None:
+      cache = {}
+      interpreter._coral_ssd_outputs = cache  # pylint: disable=protected-access
+    details = cache.get(num_anchors)
+    if details is None:
+      details = self._find_output_details(interpreter)
+      cache[num_anchors] = details
+    return details
+
+  def _find_output_details(self, interpreter):
+    num_anchors = len(self._anchors)
+    boxes = classes = None
+    for details in interpreter.get_output_details():
+      shape = tuple(details['shape'])
+      if len(shape) != 3 or shape[:2] != (1, num_anchors):
+        continue
+      if shape[2] == 4 and boxes is None:
+        boxes = details
+      else:
+        classes = details
+    if boxes is None or classes is None:
+      raise ValueError(
+          'Model outputs don\'t match {} anchors; expected box encodings of '
+          'shape (1, N, 4) and class predictions of shape (1, N, C)'.format(
+              num_anchors))
+    return boxes, classes
+
+  def _raw_threshold(self, score_threshold, quantization):
+    """Converts a score threshold into the raw class prediction domain.
+
+    For quantized predictions, returns the smallest raw value whose score
+    passes the threshold, so the result is the same as thresholding the
+    dequantized scores.
+    """
+    if score_threshold == -float('inf'):
+      return -float('inf')
+    if self._score_converter == 'sigmoid':
+      if score_threshold <= 0:
+        return -float('inf')
+      if score_threshold >= 1:
+        return float('inf')
+      threshold = math.log(score_threshold / (1 - score_threshold))
+    else:
+      threshold = score_threshold
+    scale, zero_point = quantization
+    if not scale:
+      return threshold
+    raw = math.ceil(zero_point + threshold / scale)
+
+    def passes(value):
+      score = self._convert_scores(_dequantize(np.array([value]), quantization))
+      return score[0] >= score_threshold
+
+    # The conversion may round across an integer when the threshold is the
+    # exact score of a raw value.
+    if passes(raw - 1):
+      return raw - 1
+    if not passes(raw):
+      return raw + 1
+    return raw
+
+  def _convert_scores(self, logits):
+    if self._score_converter == 'sigmoid':
+      return 1 / (1 + np.exp(-logits))
+    return logits
+
+  def decode(self,
+             interpreter,
+             score_threshold=-float('inf'),
+             iou_threshold=0.5,
+             top_k=100,
+             image_scale=(1.0, 1.0),
+             class_agnostic=False):
+    """Decodes the current outputs of an SSD model.
+
+    For each anchor, only the best scoring class is kept (the same as the
+    fast mode of ``TFLite_Detection_PostProcess``).
+
+    Args:
+      interpreter: The ``tf.lite.Interpreter`` to query for results, or a
+        :obj:`~pycoral.adapters.common.InterpreterView` of it.
+      score_threshold (float): The score threshold for results. All returned
+        results have a score greater-than-or-equal-to this value.
+      iou_threshold (float): The non-maximum suppression IoU threshold. Set
+        to 1.0 to disable NMS.
+      top_k (int): The maximum number of results, or None for no limit.
+      image_scale (float, float): Scaling factor to apply to the bounding
+        boxes as (x-scale-factor, y-scale-factor), where each factor is from 0
+        to 1.0.
+      class_agnostic (bool): Whether objects of different classes suppress
+        each other during NMS.
+
+    Returns:
+      A :obj:`~pycoral.adapters.detect.Detections` object, ordered by
+      decreasing score.
+    """
+    box_details, class_details = self._output_details(interpreter)
+    raw_boxes = interpreter.tensor(box_details['index'])()[0]
+    raw_classes = interpreter.tensor(class_details['index'])()[0]
+
+    if self._score_converter == 'softmax':
+      logits = _dequantize(raw_classes, class_details['quantization'])
+      logits = np.exp(logits - logits.max(axis=1, keepdims=True))
+      all_scores = logits / logits.sum(axis=1, keepdims=True)
+      all_scores = all_scores[:, self._class_offset:]
+      class_ids = np.argmax(all_scores, axis=1)
+      scores = all_scores[np.arange(len(class_ids)), class_ids]
+      keep = np.flatnonzero(scores >= score_threshold)
+      class_ids, scores = class_ids[keep], scores[keep]
+    else:
+      raw_classes = raw_classes[:, self._class_offset:]
+      class_ids = np.argmax(raw_classes, axis=1)
+      best = raw_classes[np.arange(len(class_ids)), class_ids]
+      keep = np.flatnonzero(best >= self._raw_threshold(
+          score_threshold, class_details['quantization']))
+      class_ids = class_ids[keep]
+      scores = self._convert_scores(
+          _dequantize(best[keep], class_details['quantization']))
+
+    boxes = decode_boxes(
+        _dequantize(raw_boxes[keep], box_details['quantization']),
+        self._anchors[keep], self._box_scales)
+    # Reorder (ymin, xmin, ymax, xmax) to (xmin, ymin, xmax, ymax).
+    boxes = boxes[:, [1, 0, 3, 2]]
+
+    if class_agnostic:
+      selected = detect.nms(boxes, scores, iou_threshold, top_k)
+    else:
+      selected = detect.batched_nms(boxes, scores, class_ids, iou_threshold,
+                                    top_k)
+
+    width, height = common.input_size(interpreter)
+    image_scale_x, image_scale_y = image_scale
+    sx, sy = width / image_scale_x, height / image_scale_y
+    return detect.Detections(
+        ids=class_ids[selected],
+        scores=scores[selected],
+        boxes=(boxes[selected] * np.array([sx, sy, sx, sy])).astype(int))
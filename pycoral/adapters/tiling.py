@@ -0,0 +1,270 @@
+# Lint as: python3
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Functions to run a detection model over tiles of a large image.
+
+Small objects in a large image often shrink to a few pixels once the image is
+resized to the model's input size. Splitting the image into overlapping
+tiles, running the model on each tile and merging the results with
+non-maximum suppression finds many more of them. For example::
+
+  detector = tiling.TiledDetector([interpreter], image.size,
+                                  tile_sizes=[(1352, 900), (500, 500)],
+                                  tile_overlap=50)
+  detections = detector.detect(np.asarray(image), score_threshold=0.5)
+"""
+
+import concurrent.futures
+import threading
+
+import numpy as np
+
+from pycoral.adapters import common
+from pycoral.adapters import detect
+
+
+def tile_locations(image_size, tile_size, overlap):
+  """Gets the locations of the tiles that cover an image.
+
+  Tiles are laid out row by row, starting at the top-left corner. Tiles on the
+  right and bottom edges are cropped to the image, so they may be smaller
+  than ``tile_size``.
+
+  Args:
+    image_size (int, int): The image size as (width, height).
+    tile_size (int, int): The tile size as (width, height).
+    overlap (int): The number of pixels that consecutive tiles overlap.
+
+  Returns:
+    A :obj:`numpy.array` of shape (N, 4), where each row is the location of a
+    tile in the image as (xmin, ymin, xmax, ymax).
+  """
+  img_width, img_height = image_size
+  tile_width, tile_height = tile_size
+  if tile_width <= overlap or tile_height <= overlap:
+    raise ValueError('Tile size {} must be larger than overlap {}'.format(
+        tile_size, overlap))
+  xmin, ymin = np.meshgrid(
+      np.arange(0, img_width, tile_width - overlap),
+      np.arange(0, img_height, tile_height - overlap))
+  xmin, ymin = xmin.ravel(), ymin.ravel()
+  return np.stack([
+      xmin, ymin,
+      np.minimum(xmin + tile_width, img_width),
+      np.minimum(ymin + tile_height, img_height)
+  ], axis=1)
+
+
+class TileGrid:
+  """Tiles covering an image, with everything needed to feed them to a model.
+
+  For every tile, the grid precomputes the size it's resized to, the resize
+  scale and the (nearest neighbor) pixel indices to sample, so copying a tile
+  into the input tensor is a single numpy gather with no PIL round-trip.
+  """
+
+  def __init__(self, image_size, tile_sizes, overlap, input_size):
+    """
+    Args:
+      image_size (int, int): The image size as (width, height).
+      tile_sizes: A list of tile sizes, each as (width, height). Each size
+        adds a layer of tiles covering the whole image.
+      overlap (int): The number of pixels that consecutive tiles overlap.
+      input_size (int, int): The model's input size as (width, height), as
+        returned by :func:`~pycoral.adapters.common.input_size`.
+    """
+    self._image_size = tuple(image_size)
+    self._tiles = detect.BBoxArray(
+        np.concatenate([
+            tile_locations(image_size, tile_size, overlap)
+            for tile_size in tile_sizes
+        ]))
+    width, height = input_size
+    self._sampling = []
+    for xmin, ymin, xmax, ymax in self._tiles.boxes.tolist():
+      w, h = xmax - xmin, ymax - ymin
+      scale = min(width / w, height / h)
+      w_out, h_out = int(w * scale), int(h * scale)
+      if (w_out, h_out) == (w, h):
+        rows, cols = slice(ymin, ymax), slice(xmin, xmax)
+      else:
+        # Sample the pixel under the center of each output pixel, in integer
+        # arithmetic so centers that fall exactly on a pixel edge round the
+        # same way on every platform.
+        rows = ymin + (2 * np.arange(h_out) + 1) * h // (2 * h_out)
+        cols = xmin + (2 * np.arange(w_out) + 1) * w // (2 * w_out)
+        rows = rows[:, None]
+      self._sampling.append((rows, cols, w_out, h_out, scale))
+
+  def __len__(self):
+    return len(self._tiles)
+
+  @property
+  def image_size(self):
+    """The image size as (width, height)."""
+    return self._image_size
+
+  @property
+  def tiles(self):
+    """The tile locations in the image as :obj:`~detect.BBoxArray`."""
+    return self._tiles
+
+  def set_input(self, interpreter, image, index):
+    """Copies a resized and zero-padded tile of an image to the input tensor.
+
+    Args:
+      interpreter: The ``tf.lite.Interpreter`` to update, or a
+        :obj:`~pycoral.adapters.common.InterpreterView` of it.
+      image: The whole image as :obj:`numpy.array` of shape (height, width,
+        channels), with the input tensor's dtype.
+      index (int): The index of the tile to copy.
+
+    Returns:
+      The resize ratio of the tile as (x-scale-factor, y-scale-factor), to
+      pass as ``image_scale`` to :func:`~pycoral.adapters.detect.get_objects`.
+    """
+    rows, cols, w, h, scale = self._sampling[index]
+    tensor = common.input_tensor(interpreter)
+    tensor[:h, :w] = image[rows, cols]
+    # Only clear the padding, instead of the whole tensor.
+    tensor[h:] = 0
+    tensor[:h, w:] = 0
+    return scale, scale
+
+
+class TiledDetector:
+  """Runs a detection model over a :obj:`TileGrid` and merges the results.
+
+  Tiles can be spread over several interpreters of the same model (usually
+  each one bound to a different Edge TPU), in which case each interpreter
+  runs in its own thread and takes the next pending tile as soon as it's
+  done with the previous one.
+
+  Use the detector as a context manager, or call :func:`close` when done, to
+  stop the threads it creates for multiple interpreters.
+  """
+
+  def __init__(self, interpreters, image_size, tile_sizes, tile_overlap):
+    """
+    Args:
+      interpreters: A list of ``tf.lite.Interpreter`` objects (or
+        :obj:`~pycoral.adapters.common.InterpreterView` objects) for the same
+        detection model, with their tensors already allocated.
+      image_size (int, int): The size of the images to detect, as (width,
+        height).
+      tile_sizes: A list of tile sizes, each as (width, height).
+      tile_overlap (int): The number of pixels that consecutive tiles overlap.
+        It should be at least half the size of the smallest object to detect,
+        otherwise objects on a tile boundary can be missed.
+    """
+    if not interpreters:
+      raise ValueError('At least one interpreter expected')
+    self._views = [
+        i if isinstance(i, common.InterpreterView) else
+        common.InterpreterView(i) for i in interpreters
+    ]
+    self._grid = TileGrid(image_size, tile_sizes, tile_overlap,
+                          common.input_size(self._views[0]))
+    self._executor = None
+    if len(self._views) > 1:
+      self._executor = concurrent.futures.ThreadPoolExecutor(
+          max_workers=len(self._views))
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def close(self):
+    """Stops the worker threads, if any."""
+    if self._executor:
+      self._executor.shutdown()
+      self._executor = None
+
+  @property
+  def grid(self):
+    """The :obj:`TileGrid` this detector runs over."""
+    return self._grid
+
+  def _detect_tile(self, view, image, index, score_threshold):
+    scale = self._grid.set_input(view, image, index)
+    view.invoke()
+    detections = detect.get_detections(view, score_threshold, scale)
+    xmin, ymin = self._grid.tiles.boxes[index, :2]
+    return detections._replace(
+        boxes=detections.boxes + np.array([xmin, ymin, xmin, ymin]))
+
+  def _detect_tiles(self, view, image, next_tile, score_threshold):
+    results = []
+    while True:
+      index = next_tile()
+      if index is None:
+        return results
+      results.append(self._detect_tile(view, image, index, score_threshold))
+
+  def detect(self,
+             image,
+             score_threshold=-float('inf'),
+             iou_threshold=0.1,
+             top_k=None):
+    """Detects objects in all tiles of an image.
+
+    Args:
+      image: The image as :obj:`numpy.array` of shape (height, width,
+        channels), or an object convertible to one such as a PIL image. It
+        must have the size given to the constructor.
+      score_threshold (float): The score threshold for results. All returned
+        results have a score greater-than-or-equal-to this value.
+      iou_threshold (float): Objects of the same class found in different
+        tiles are merged (with non-maximum suppression) when their IoU is
+        greater than this value.
+      top_k (int): The maximum number of objects to return.
+
+    Returns:
+      A :obj:`~pycoral.adapters.detect.Detections` object, with boxes in
+      image coordinates and ordered by decreasing score.
+    """
+    image = np.asarray(image)
+    width, height = self._grid.image_size
+    if image.shape[:2] != (height, width):
+      raise ValueError('Expected image of size {}, but got {}'.format(
+          self._grid.image_size, image.shape[1::-1]))
+
+    if self._executor:
+      tiles = iter(range(len(self._grid)))
+      lock = threading.Lock()
+
+      def next_tile():
+        with lock:
+          return next(tiles, None)
+
+      futures = [
+          self._executor.submit(self._detect_tiles, view, image, next_tile,
+                                score_threshold) for view in self._views
+      ]
+      results = [r for f in futures for r in f.result()]
+    else:
+      results = [
+          self._detect_tile(self._views[0], image, i, score_threshold)
+          for i in range(len(self._grid))
+      ]
+
+    detections = detect.Detections(
+        ids=np.concatenate([r.ids for r in results]),
+        scores=np.concatenate([r.scores for r in results]),
+        boxes=np.concatenate([r.boxes for r in results]))
+    keep = detect.batched_nms(detections.boxes, detections.scores,
+                              detections.ids, iou_threshold, top_k)
+    return detections.select(keep)
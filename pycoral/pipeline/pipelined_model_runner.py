@@ -18,16 +18,199 @@ For more information, see `Pipeline a model with multiple Edge
 TPUs </docs/edgetpu/pipeline/>`_.
 """
 
+import collections
+import concurrent.futures
+import threading
+import time
+
 import numpy as np
 
 from pycoral.pybind import _pywrap_coral
 
+PoolStats = collections.namedtuple('PoolStats', ['hits', 'misses', 'idle'])
+"""Statistics of a pool of tensor buffers.
+
+  .. py:attribute:: hits
+
+      The number of buffers that were reused.
+
+  .. py:attribute:: misses
+
+      The number of buffers that had to be allocated.
+
+  .. py:attribute:: idle
+
+      The number of buffers currently kept for reuse.
+"""
+
+
+PipelineResult = collections.namedtuple('PipelineResult',
+                                        ['outputs', 'tag', 'latency'])
+"""The result of a request submitted with
+:func:`PipelinedModelRunner.submit`.
+
+  .. py:attribute:: outputs
+
+      Dictionary of the model's output tensors, as returned by
+      :func:`PipelinedModelRunner.pop`.
+
+  .. py:attribute:: tag
+
+      The tag given to :func:`PipelinedModelRunner.submit`.
+
+  .. py:attribute:: latency
+
+      The time from the submission of the request to its result, in seconds.
+"""
+
+SegmentStats = collections.namedtuple('SegmentStats',
+                                      ['busy_time', 'count', 'queue_size'])
+"""Statistics of one segment of a pipeline.
+
+  .. py:attribute:: busy_time
+
+      The total time the segment spent on inferences, in seconds.
+
+  .. py:attribute:: count
+
+      The number of inferences the segment completed.
+
+  .. py:attribute:: queue_size
+
+      The number of requests waiting for the segment, or running on it.
+"""
+
+PipelineStats = collections.namedtuple('PipelineStats', [
+    'segments', 'input_queue_size', 'output_queue_size', 'pushes',
+    'blocked_pushes', 'push_time', 'pops', 'waiting_pops', 'pop_wait_time',
+    'full_outputs', 'output_full_time'
+])
+"""Statistics of a :obj:`PipelinedModelRunner`.
+
+The segment with the largest ``busy_time`` is the bottleneck. Pushes that block
+mean that the pipeline can't keep up with the input, while full outputs mean
+that results aren't consumed fast enough.
+
+  .. py:attribute:: segments
+
+      A list of :obj:`SegmentStats`, one per segment.
+
+  .. py:attribute:: input_queue_size
+
+      The number of requests waiting for the first segment, or running on it.
+
+  .. py:attribute:: output_queue_size
+
+      The number of results not retrieved yet.
+
+  .. py:attribute:: pushes
+
+      The number of requests pushed.
+
+  .. py:attribute:: blocked_pushes
+
+      The number of pushes blocked by the input queue size limit set with
+      :func:`PipelinedModelRunner.set_input_queue_size`. A push counts as
+      blocked when it takes longer than 100 microseconds, while pushes that
+      find room in the queue take a few microseconds.
+
+  .. py:attribute:: push_time
+
+      The total time spent pushing, in seconds, which is mostly time blocked
+      by the input queue size limit.
+
+  .. py:attribute:: pops
+
+      The number of results retrieved.
+
+  .. py:attribute:: waiting_pops
+
+      The number of pops that had to wait for a result.
+
+  .. py:attribute:: pop_wait_time
+
+      The total time pops waited for results, in seconds.
+
+  .. py:attribute:: full_outputs
+
+      The number of times the results ready to pop reached the limit set with
+      :func:`PipelinedModelRunner.set_output_queue_size`.
+
+  .. py:attribute:: output_full_time
+
+      The total time the results ready to pop were at their limit, in seconds.
+      Meanwhile the pipeline's own output queue fills up, and then blocks the
+      last segment.
+"""
+
+# The maximum number of results the consumer thread pops at once.
+_MAX_CONSUMER_BATCH = 16
+
 
 def _get_names(details):
   """Returns a set of names given input/output tensor details."""
   return {d['name'] for d in details}
 
 
+def _make_stats(native_stats):
+  """Returns a PipelineStats from the native stats dictionary."""
+  segments = []
+  queued = native_stats['pushes']
+  for busy_time, count in native_stats['segments']:
+    segments.append(SegmentStats(busy_time, count, max(0, queued - count)))
+    queued = count
+  return PipelineStats(
+      segments=segments,
+      input_queue_size=segments[0].queue_size,
+      output_queue_size=max(0, queued - native_stats['pops']),
+      pushes=native_stats['pushes'],
+      blocked_pushes=native_stats['blocked_pushes'],
+      push_time=native_stats['push_time'],
+      pops=native_stats['pops'],
+      waiting_pops=native_stats['waiting_pops'],
+      pop_wait_time=native_stats['pop_wait_time'],
+      full_outputs=native_stats['full_outputs'],
+      output_full_time=native_stats['output_full_time'])
+
+
+def _report_stats(runner, callback, interval, stop):
+  """Calls `callback` with stats every `interval` seconds until stopped."""
+  while not stop.wait(interval):
+    native_stats = runner.Stats()
+    callback(_make_stats(native_stats))
+    if native_stats['done']:
+      break
+
+
+def _consume_results(runner, pending, lock):
+  """Resolves the futures of submitted requests with their results, in order.
+
+  This doesn't reference the :obj:`PipelinedModelRunner`, so that it can be
+  garbage collected (which ends the pipeline, and so this function).
+  """
+  error = None
+  while True:
+    try:
+      results = runner.PopMany(_MAX_CONSUMER_BATCH, -1.0)
+    except RuntimeError as e:
+      error = e
+      break
+    if results is None:
+      break
+    end = time.perf_counter()
+    with lock:
+      requests = [pending.popleft() for _ in results]
+    for (future, tag, start), outputs in zip(requests, results):
+      future.set_result(PipelineResult(outputs, tag, end - start))
+
+  with lock:
+    requests = list(pending)
+    pending.clear()
+  for future, _, _ in requests:
+    future.set_exception(error or RuntimeError(
+        'The pipeline ended before the request completed'))
+
+
 class PipelinedModelRunner:
   """Manages the model pipeline.
 
@@ -43,14 +226,22 @@ class PipelinedModelRunner:
     runner = PipelinedModelRunner(interpreters)
   """
 
-  def __init__(self, interpreters):
+  def __init__(self, interpreters, input_pool_size=8, output_pool_size=8):
     """Be sure you first call ``allocate_tensors()`` on each interpreter.
 
     Args:
       interpreters: A list of ``tf.lite.Interpreter`` objects, one for each
         segment in the pipeline.
+      input_pool_size (int): The number of input buffers of each size to keep
+        for reuse once the pipeline has consumed them, so that steady-state
+        calls to ``push()`` don't allocate memory.
+      output_pool_size (int): The number of output buffers of each size to
+        keep for reuse once the arrays returned by ``pop()`` are released, or
+        once ``pop_into()`` has copied them.
     """
     self._runner = None
+    self._consumer = None
+    self._stop_stats_reporter = None
 
     if not interpreters:
       raise ValueError('At least one interpreter expected')
@@ -67,18 +258,32 @@ class PipelinedModelRunner:
 
     self._interpreters = interpreters
     self._runner = _pywrap_coral.PipelinedModelRunnerWrapper(
-        [i._native_handle() for i in interpreters])
+        [i._native_handle() for i in interpreters], input_pool_size,
+        output_pool_size)
 
     self._input_types = {}
     for d in self._interpreters[0].get_input_details():
       self._input_types[d['name']] = d['dtype']
 
     self._output_shapes = {}
+    self._output_types = {}
     for d in self._interpreters[-1].get_output_details():
       self._output_shapes[d['name']] = d['shape']
+      self._output_types[d['name']] = d['dtype']
+
+    self._submit_lock = threading.Lock()
+    self._pending_lock = threading.Lock()
+    self._pending = collections.deque()
+    # The number of results of push() not popped yet.
+    self._unpopped_lock = threading.Lock()
+    self._unpopped = 0
 
   def __del__(self):
-    if self._runner:
+    if self._stop_stats_reporter:
+      self._stop_stats_reporter.set()
+    if self._runner and self._consumer:
+      self.close()
+    elif self._runner:
       # Push empty request to stop the pipeline in case user forgot.
       try:
         print("Push empty request to stop the pipeline...")
@@ -119,12 +324,25 @@ class PipelinedModelRunner:
     active. If the new max is smaller than current queue size, pushes to the
     queue are blocked until the current queue size drops below the new max.
 
+    Note: Results are moved from the output queue to a queue of results ready
+    to pop, with the same size max, so up to twice as many results may be
+    unconsumed.
+
     Args:
       size (int): The output queue size max
     """
     self._runner.SetOutputQueueSize(size)
 
-  def push(self, input_tensors):
+  def _add_unpopped(self, count):
+    with self._unpopped_lock:
+      self._unpopped += count
+
+  def _check_not_submitting(self):
+    if self._consumer is not None:
+      raise RuntimeError('Requests were submitted with submit(), so results '
+                         'can only be retrieved through their futures')
+
+  def push(self, input_tensors, copy=True):
     """Pushes input tensors to trigger inference.
 
     Pushing an empty dict is allowed, which signals the class that no more
@@ -136,14 +354,33 @@ class PipelinedModelRunner:
     queue size max (use ``set_input_queue_size()``). By default, input queue
     size threshold is unlimited, in this case, call to push() is non-blocking.
 
+    By default, the input tensors are copied into buffers from a pool. With
+    ``copy=False``, the pipeline instead references the arrays' memory, and
+    keeps the arrays alive until the first segment has consumed them. The
+    caller must then not modify the arrays after pushing them: push a new
+    array for each request, such as a freshly decoded frame.
+
     Args:
       input_tensors: A dictionary with key of type string, and value of type
         :obj:`numpy.array` representing the model's input tensors, where keys
         are the tensor names.
+      copy (bool): Whether to copy the input tensors. If False, the arrays
+        must be C-contiguous.
 
     Raises:
       RuntimeError: error during pushing pipelined model inference request.
     """
+    if not input_tensors:
+      self._push(input_tensors, copy)
+      return
+    # Under the lock submit() holds, so that its consumer thread can't start
+    # between the check and the push, and take this push's result.
+    with self._submit_lock:
+      self._check_not_submitting()
+      self._push(input_tensors, copy)
+      self._add_unpopped(1)
+
+  def _push(self, input_tensors, copy):
     if input_tensors and len(input_tensors) != len(self._input_types):
       raise ValueError('Expected input of length {}, but got {}'.format(
           len(self._input_types), len(input_tensors)))
@@ -154,13 +391,25 @@ class PipelinedModelRunner:
         raise ValueError(
             'Input should be a list of numpy array of type {}'.format(
                 input_type))
+      if not copy and not tensor.flags.c_contiguous:
+        raise ValueError('Input {} must be C-contiguous with copy=False'.format(
+            key))
 
-    self._runner.Push(input_tensors)
+    self._runner.Push(input_tensors, copy)
 
-  def pop(self):
+  def pop(self, timeout=None):
     """Returns a single inference result.
 
-    This function blocks the calling thread until a result is returned.
+    This function blocks the calling thread until a result is returned, or
+    until the timeout expires.
+
+    The returned arrays have the shapes of the model's output tensors. They use
+    buffers from a pool, which they give back when they are released. To reuse
+    your own arrays instead, use ``pop_into()``.
+
+    Args:
+      timeout (float): The maximum time to wait for a result, in seconds, or
+        None to wait forever.
 
     Returns:
       Dictionary with key of type string, and value of type :obj:`numpy.array`
@@ -170,11 +419,210 @@ class PipelinedModelRunner:
 
     Raises:
       RuntimeError: error during retrieving pipelined model inference results.
+      TimeoutError: If no result became available in time.
+    """
+    self._check_not_submitting()
+    results = self._runner.PopMany(1, -1.0 if timeout is None else timeout)
+    if results is None:
+      return None
+    if not results:
+      raise TimeoutError(
+          'No result available after {} seconds'.format(timeout))
+    self._add_unpopped(-1)
+    return results[0]
+
+  def try_pop(self):
+    """Returns a single inference result if one is ready, without blocking.
+
+    Returns:
+      The result as returned by ``pop()``, or None if no result is ready or
+      there are no more output tensors available.
+
+    Raises:
+      RuntimeError: error during retrieving pipelined model inference results.
+    """
+    self._check_not_submitting()
+    results = self._runner.PopMany(1, 0.0)
+    if not results:
+      return None
+    self._add_unpopped(-1)
+    return results[0]
+
+  def pop_many(self, max_n, timeout=None):
+    """Returns up to ``max_n`` inference results at once.
+
+    This function blocks the calling thread until at least one result is
+    available, or until the timeout expires, and then returns all the results
+    that are ready, up to ``max_n``. Waiting for the results doesn't hold the
+    GIL, and all of them are retrieved in one native call.
+
+    Args:
+      max_n (int): The maximum number of results to return.
+      timeout (float): The maximum time to wait for the first result, in
+        seconds, or None to wait forever.
+
+    Returns:
+      A list of results as returned by ``pop()``, in order, which is empty if
+      the timeout expired. Returns None when a ``push()`` receives an empty dict
+      input, and all the results before it have been returned.
+
+    Raises:
+      RuntimeError: error during retrieving pipelined model inference results.
+    """
+    self._check_not_submitting()
+    if max_n < 1:
+      raise ValueError('max_n must be at least 1, but got {}'.format(max_n))
+    results = self._runner.PopMany(max_n, -1.0 if timeout is None else timeout)
+    if results:
+      self._add_unpopped(-len(results))
+    return results
+
+  def pop_into(self, output_tensors):
+    """Copies a single inference result into preallocated arrays.
+
+    This function blocks the calling thread until a result is available. The
+    result's buffers go back to the pool right after the copy.
+
+    Args:
+      output_tensors: A dictionary with key of type string, and value of type
+        :obj:`numpy.array`, with one C-contiguous, writable array of the
+        right shape and type for each of the model's output tensors, where
+        keys are the tensor names.
+
+    Returns:
+      True if a result was copied, or False when a ``push()`` received an
+      empty dict input, indicating there are no more output tensors available.
+
+    Raises:
+      RuntimeError: error during retrieving pipelined model inference results.
+    """
+    self._check_not_submitting()
+    if set(output_tensors) != set(self._output_shapes):
+      raise ValueError('Expected outputs {}, but got {}'.format(
+          sorted(self._output_shapes), sorted(output_tensors)))
+    for key, tensor in output_tensors.items():
+      shape = tuple(self._output_shapes[key])
+      dtype = self._output_types[key]
+      if (not isinstance(tensor, np.ndarray) or tensor.shape != shape or
+          tensor.dtype != dtype):
+        raise ValueError('Output {} should be a numpy array of shape {} and '
+                         'type {}'.format(key, shape, dtype))
+      if not tensor.flags.c_contiguous or not tensor.flags.writeable:
+        raise ValueError(
+            'Output {} must be C-contiguous and writable'.format(key))
+    if not self._runner.PopInto(output_tensors):
+      return False
+    self._add_unpopped(-1)
+    return True
+
+  def submit(self, input_tensors, tag=None, copy=True):
+    """Pushes input tensors, and returns a future of their result.
+
+    The results are popped by an internal thread, which resolves the futures
+    in order, so many threads can submit requests to the same pipeline. Once a
+    request is submitted, results can only be retrieved through futures: the
+    pop methods raise a ``RuntimeError``. Likewise, requests can't be
+    submitted while results of ``push()`` are left to pop. Call ``close()``
+    when done.
+
+    Args:
+      input_tensors: A dictionary of the model's input tensors, as accepted by
+        ``push()``. It can't be empty.
+      tag: Any object to attach to the request, such as a camera id or a
+        frame timestamp, which is returned in the result.
+      copy (bool): Whether to copy the input tensors, as with ``push()``.
+
+    Returns:
+      A :obj:`concurrent.futures.Future` of a :obj:`PipelineResult`.
+
+    Raises:
+      RuntimeError: error during pushing pipelined model inference request, or
+        results of ``push()`` are left to pop.
+    """
+    if not input_tensors:
+      raise ValueError('Expected input tensors; call close() to end the '
+                       'pipeline')
+    future = concurrent.futures.Future()
+    future.set_running_or_notify_cancel()
+    request = (future, tag, time.perf_counter())
+    # Requests must be queued in the same order as their inputs are pushed.
+    with self._submit_lock:
+      if self._consumer is None:
+        with self._unpopped_lock:
+          unpopped = self._unpopped
+        if unpopped > 0:
+          # The consumer would hand their results to the wrong futures.
+          raise RuntimeError(
+              '{} results of push() were not popped; pop them before calling '
+              'submit()'.format(unpopped))
+        self._consumer = threading.Thread(
+            target=_consume_results,
+            args=(self._runner, self._pending, self._pending_lock))
+        self._consumer.daemon = True
+        self._consumer.start()
+      with self._pending_lock:
+        self._pending.append(request)
+      try:
+        self._push(input_tensors, copy)
+      except Exception:
+        with self._pending_lock:
+          if request in self._pending:
+            self._pending.remove(request)
+        raise
+    return future
+
+  def close(self):
+    """Ends the pipeline, and waits for the futures of submitted requests.
+
+    This pushes an empty dict input if that wasn't done yet.
+    """
+    try:
+      self._runner.Push({}, True)
+    except RuntimeError:
+      pass  # The pipeline has already been turned off.
+    if self._consumer:
+      self._consumer.join()
+
+  def pool_stats(self):
+    """Returns the statistics of the input and output buffer pools.
+
+    Returns:
+      A dictionary with keys 'input' and 'output', and values of type
+      :obj:`PoolStats`.
+    """
+    return {k: PoolStats(**v) for k, v in self._runner.PoolStats().items()}
+
+  def stats(self):
+    """Returns a snapshot of the pipeline statistics.
+
+    Returns:
+      A :obj:`PipelineStats`.
+    """
+    return _make_stats(self._runner.Stats())
+
+  def set_stats_callback(self, callback, interval=1.0):
+    """Reports snapshots of the pipeline statistics periodically.
+
+    The callback is called from a dedicated thread, until the pipeline has
+    ended and all the results are retrieved, or until another callback is
+    set.
+
+    Args:
+      callback: A function that takes a :obj:`PipelineStats`, or None to stop
+        reporting.
+      interval (float): The time between snapshots, in seconds.
     """
-    result = self._runner.Pop()
-    if result:
-      result = {k: v.reshape(self._output_shapes[k]) for k, v in result.items()}
-    return result
+    if self._stop_stats_reporter:
+      self._stop_stats_reporter.set()
+      self._stop_stats_reporter = None
+    if callback is None:
+      return
+    stop = threading.Event()
+    reporter = threading.Thread(
+        target=_report_stats, args=(self._runner, callback, interval, stop))
+    reporter.daemon = True
+    reporter.start()
+    self._stop_stats_reporter = stop
 
   def interpreters(self):
     """Returns list of interpreters that constructed PipelinedModelRunner."""
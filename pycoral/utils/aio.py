@@ -0,0 +1,204 @@
+# Lint as: python3
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Asyncio wrappers for the blocking inference functions.
+
+``interpreter.invoke()``, :func:`~pycoral.utils.edgetpu.run_inference` and
+:obj:`~pycoral.pipeline.pipelined_model_runner.PipelinedModelRunner` all
+block the calling thread until the Edge TPU is done, which would stall an
+event loop. The coroutines in this module run them on executor threads
+instead, so other tasks keep running meanwhile (the native inference calls
+release the GIL)::
+
+  pool = aio.AsyncInterpreterPool(size=2)
+
+  async def handle(frame):
+
+    def classify_frame(interpreter):
+      common.set_input(interpreter, frame)
+      interpreter.invoke()
+      return classify.get_classes(interpreter, top_k=1)
+
+    return await pool.run(model_file, classify_frame, device='usb:0')
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+
+from pycoral.utils import edgetpu
+from pycoral.utils import pool as pool_lib
+
+# get_event_loop() is deprecated in coroutines, but get_running_loop() only
+# exists from Python 3.7.
+_get_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+
+async def run_inference(interpreter, input_data, executor=None):
+  """Runs :func:`~pycoral.utils.edgetpu.run_inference` on an executor thread.
+
+  The interpreter must not be used by anything else until this returns.
+
+  Args:
+    interpreter: The ``tf.lite.Interpreter`` to invoke.
+    input_data: The raw input tensor, as accepted by
+      :func:`~pycoral.utils.edgetpu.run_inference`.
+    executor: The :obj:`concurrent.futures.Executor` to run on, or None for
+      the event loop's default executor.
+  """
+  loop = _get_running_loop()
+  await loop.run_in_executor(executor, edgetpu.run_inference, interpreter,
+                             input_data)
+
+
+class AsyncInterpreterPool:
+  """An :obj:`~pycoral.utils.pool.InterpreterPool` for asyncio code.
+
+  Each device gets a dedicated thread pool executor with as many threads as
+  there are interpreters per (model, device) pair, so requests for one device
+  never wait behind requests for another one, and the event loop's default
+  executor stays free for other work.
+  """
+
+  def __init__(self, size=1, interpreter_pool=None):
+    """
+    Args:
+      size (int): The number of interpreters to keep for each (model,
+        device) pair. Ignored if ``interpreter_pool`` is given.
+      interpreter_pool: An existing
+        :obj:`~pycoral.utils.pool.InterpreterPool` to take interpreters from.
+    """
+    self._pool = interpreter_pool or pool_lib.InterpreterPool(size)
+    self._lock = threading.Lock()
+    self._executors = {}
+
+  async def __aenter__(self):
+    return self
+
+  async def __aexit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  @property
+  def interpreter_pool(self):
+    """The underlying :obj:`~pycoral.utils.pool.InterpreterPool`."""
+    return self._pool
+
+  def _executor(self, device):
+    with self._lock:
+      executor = self._executors.get(device)
+      if executor is None:
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self._pool.size)
+        self._executors[device] = executor
+      return executor
+
+  def _run(self, model_path_or_content, device, fn):
+    with self._pool.interpreter(model_path_or_content, device) as interpreter:
+      return fn(interpreter)
+
+  async def run(self, model_path_or_content, fn, device=None):
+    """Checks out an interpreter and calls a function with it.
+
+    Both the checkout and the function run on the device's executor, so the
+    function can freely set inputs, invoke and read outputs.
+
+    Args:
+      model_path_or_content (str or bytes): The model, as accepted by
+        :func:`~pycoral.utils.edgetpu.make_interpreter`.
+      fn: A function that takes the ``tf.lite.Interpreter`` and returns the
+        result of the request.
+      device (str): The Edge TPU device to run the model on, or 'cpu'.
+
+    Returns:
+      What ``fn`` returns.
+    """
+    loop = _get_running_loop()
+    return await loop.run_in_executor(
+        self._executor(device), self._run, model_path_or_content, device, fn)
+
+  async def run_inference(self,
+                          model_path_or_content,
+                          input_data,
+                          postprocess=None,
+                          device=None):
+    """Runs an inference with a raw input tensor.
+
+    Args:
+      model_path_or_content (str or bytes): The model, as accepted by
+        :func:`~pycoral.utils.edgetpu.make_interpreter`.
+      input_data: The raw input tensor, as accepted by
+        :func:`~pycoral.utils.edgetpu.run_inference`.
+      postprocess: An optional function that takes the interpreter after the
+        inference and returns the result, such as
+        ``lambda interpreter: classify.get_classes(interpreter, top_k=1)``.
+      device (str): The Edge TPU device to run the model on, or 'cpu'.
+
+    Returns:
+      What ``postprocess`` returns, or by default a list of copies of the
+      output tensors.
+    """
+
+    def fn(interpreter):
+      edgetpu.run_inference(interpreter, input_data)
+      if postprocess:
+        return postprocess(interpreter)
+      return [
+          interpreter.tensor(d['index'])().copy()
+          for d in interpreter.get_output_details()
+      ]
+
+    return await self.run(model_path_or_content, fn, device)
+
+  def close(self):
+    """Waits for pending requests, then releases executors and interpreters."""
+    with self._lock:
+      executors, self._executors = self._executors, {}
+    for executor in executors.values():
+      executor.shutdown()
+    self._pool.close()
+
+
+class PipelineResults:
+  """Iterates asynchronously over the results of a pipelined model runner.
+
+  Each ``pop()`` runs on a dedicated thread, and iteration stops when the
+  runner signals the end of its results (after an empty ``push()``)::
+
+    async for result in aio.PipelineResults(runner):
+      handle(result)
+  """
+
+  def __init__(self, runner):
+    """
+    Args:
+      runner: The
+        :obj:`~pycoral.pipeline.pipelined_model_runner.PipelinedModelRunner`
+        to pop results from.
+    """
+    self._runner = runner
+    self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+  def __aiter__(self):
+    return self
+
+  async def __anext__(self):
+    if self._executor is None:
+      raise StopAsyncIteration
+    loop = _get_running_loop()
+    result = await loop.run_in_executor(self._executor, self._runner.pop)
+    if result is None:
+      self._executor.shutdown(wait=False)
+      self._executor = None
+      raise StopAsyncIteration
+    return result
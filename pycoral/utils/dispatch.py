@@ -0,0 +1,519 @@
+# Lint as: python3
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Schedules inferences over several devices or several models.
+
+A :obj:`MultiDeviceRunner` keeps one interpreter and one worker thread per
+device, and sends each request to the device with the fewest pending
+requests, so faster or less loaded devices take more of the work::
+
+  with dispatch.MultiDeviceRunner(model_file) as runner:
+    futures = [runner.submit(frame) for frame in frames]
+    results = [future.result() for future in futures]
+    print(runner.stats())
+
+A :obj:`ModelScheduler` instead runs several models on one device, grouping
+their requests into runs of the same model to limit Edge TPU parameter cache
+swaps::
+
+  with dispatch.ModelScheduler({'detector': detector_file,
+                                'classifier': classifier_file}) as scheduler:
+    detections = scheduler.submit('detector', frame)
+    ...
+    print(scheduler.stats().switches)
+"""
+
+import collections
+import concurrent.futures
+import queue
+import threading
+import time
+
+import numpy as np
+
+from pycoral.adapters import common
+from pycoral.utils import edgetpu
+
+DeviceStats = collections.namedtuple(
+    'DeviceStats',
+    ['device', 'queue_depth', 'completed', 'busy_time', 'throughput'])
+"""Statistics of one device of a :obj:`MultiDeviceRunner`.
+
+  .. py:attribute:: device
+
+      The device string.
+
+  .. py:attribute:: queue_depth
+
+      The number of requests waiting or running on the device.
+
+  .. py:attribute:: completed
+
+      The number of requests completed by the device.
+
+  .. py:attribute:: busy_time
+
+      The total time the device spent on requests, in seconds.
+
+  .. py:attribute:: throughput
+
+      The number of requests completed per second since the runner started.
+"""
+
+
+def list_edge_tpu_devices():
+  """Lists the device strings of all Edge TPUs.
+
+  Returns:
+    A list of device strings such as ``'pci:0'`` or ``'usb:1'``, as accepted
+    by :func:`~pycoral.utils.edgetpu.make_interpreter`, in the order of
+    :func:`~pycoral.utils.edgetpu.list_edge_tpus`.
+  """
+  counts = collections.Counter()
+  devices = []
+  for tpu in edgetpu.list_edge_tpus():
+    devices.append('{}:{}'.format(tpu['type'], counts[tpu['type']]))
+    counts[tpu['type']] += 1
+  return devices
+
+
+def _make_edgetpu_interpreter(model_path_or_content, device):
+  return edgetpu.make_interpreter(model_path_or_content, device=device)
+
+
+def _set_inputs(view, inputs):
+  details = view.get_input_details()
+  if not isinstance(inputs, dict):
+    inputs = {details[0]['name']: inputs}
+  if len(inputs) != len(details):
+    raise ValueError('Expected {} inputs, but got {}'.format(
+        len(details), len(inputs)))
+  for d in details:
+    view.tensor(d['index'])()[...] = np.reshape(inputs[d['name']], d['shape'])
+
+
+def _get_outputs(view):
+  return {
+      d['name']: view.tensor(d['index'])().copy()
+      for d in view.get_output_details()
+  }
+
+
+def _run_request(view, inputs, postprocess, future):
+  """Runs a request and sets its future, unless it was cancelled.
+
+  Returns:
+    True if the request ran, False if it was cancelled.
+  """
+  if not future.set_running_or_notify_cancel():
+    return False
+  try:
+    _set_inputs(view, inputs)
+    view.invoke()
+    result = postprocess(view) if postprocess else _get_outputs(view)
+  except Exception as e:  # pylint: disable=broad-except
+    future.set_exception(e)
+  else:
+    future.set_result(result)
+  return True
+
+
+class _Device:
+  """An interpreter with its request queue and worker thread."""
+
+  def __init__(self, name, interpreter):
+    self.name = name
+    self.view = common.InterpreterView(interpreter)
+    self.requests = queue.Queue()
+    self.pending = 0
+    self.completed = 0
+    self.busy_time = 0.0
+    self.thread = None
+
+
+class MultiDeviceRunner:
+  """Runs inferences of one model on the least busy of several devices.
+
+  Each request is queued on the device with the fewest pending requests
+  (waiting or running), and its result is delivered through a
+  :obj:`concurrent.futures.Future`. Use the runner as a context manager, or
+  call :func:`close` when done, to stop its worker threads.
+  """
+
+  def __init__(self,
+               model_path_or_content,
+               devices=None,
+               interpreter_factory=None):
+    """
+    Args:
+      model_path_or_content (str or bytes): The model, as accepted by
+        :func:`~pycoral.utils.edgetpu.make_interpreter`.
+      devices: A list of device strings, one per device to use. Defaults to
+        all Edge TPUs, as returned by :func:`list_edge_tpu_devices`. Each
+        'cpu' entry adds a CPU interpreter, so a CPU model can run on
+        machines without an Edge TPU.
+      interpreter_factory: A function that takes the model and a device
+        string and returns a ``tf.lite.Interpreter`` for that device. Defaults
+        to :func:`~pycoral.utils.edgetpu.make_interpreter`. Use it to run on
+        CPU interpreters, for instance.
+    """
+    if devices is None:
+      devices = list_edge_tpu_devices()
+    if not devices:
+      raise ValueError('At least one device expected')
+    if interpreter_factory is None:
+      interpreter_factory = _make_edgetpu_interpreter
+
+    self._lock = threading.Lock()
+    self._start_time = time.perf_counter()
+    self._closed = False
+    self._devices = []
+    for name in devices:
+      interpreter = interpreter_factory(model_path_or_content, name)
+      interpreter.allocate_tensors()
+      self._devices.append(_Device(name, interpreter))
+    for device in self._devices:
+      device.thread = threading.Thread(target=self._run, args=(device,))
+      device.thread.daemon = True
+      device.thread.start()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  @property
+  def devices(self):
+    """The device strings, in the order given to the constructor."""
+    return [device.name for device in self._devices]
+
+  def submit(self, inputs, postprocess=None):
+    """Queues an inference on the least busy device.
+
+    Args:
+      inputs: The input tensor as :obj:`numpy.array`, or a dict of input
+        tensors keyed by tensor name for models with several inputs. Each
+        array must have the size of its tensor; it's reshaped as needed.
+      postprocess: An optional function that takes the interpreter (an
+        :obj:`~pycoral.adapters.common.InterpreterView`) after the
+        inference, and returns the result of the request, such as
+        ``lambda interpreter: classify.get_classes(interpreter, top_k=1)``.
+        It runs on the device's worker thread.
+
+    Returns:
+      A :obj:`concurrent.futures.Future` for the result of the request: what
+      ``postprocess`` returns, or by default a dict of output tensor copies
+      keyed by tensor name.
+    """
+    future = concurrent.futures.Future()
+    with self._lock:
+      if self._closed:
+        raise RuntimeError('Cannot submit to a closed MultiDeviceRunner')
+      device = min(self._devices, key=lambda d: d.pending)
+      device.pending += 1
+      device.requests.put((inputs, postprocess, future))
+    return future
+
+  def _run(self, device):
+    while True:
+      request = device.requests.get()
+      if request is None:
+        return
+      inputs, postprocess, future = request
+      start = time.perf_counter()
+      ran = _run_request(device.view, inputs, postprocess, future)
+      with self._lock:
+        device.pending -= 1
+        if ran:
+          device.completed += 1
+          device.busy_time += time.perf_counter() - start
+
+  def stats(self):
+    """Gets the current statistics of each device.
+
+    Returns:
+      A list of :obj:`DeviceStats`, one per device.
+    """
+    with self._lock:
+      elapsed = time.perf_counter() - self._start_time
+      return [
+          DeviceStats(
+              device=d.name,
+              queue_depth=d.pending,
+              completed=d.completed,
+              busy_time=d.busy_time,
+              throughput=d.completed / elapsed if elapsed > 0 else 0.0)
+          for d in self._devices
+      ]
+
+  def close(self):
+    """Finishes the queued requests and stops the worker threads."""
+    with self._lock:
+      if self._closed:
+        return
+      self._closed = True
+    for device in self._devices:
+      device.requests.put(None)
+    for device in self._devices:
+      device.thread.join()
+
+
+ModelStats = collections.namedtuple(
+    'ModelStats', ['queue_depth', 'completed', 'mean_latency', 'max_latency'])
+"""Statistics of one model of a :obj:`ModelScheduler`.
+
+  .. py:attribute:: queue_depth
+
+      The number of requests waiting for the model.
+
+  .. py:attribute:: completed
+
+      The number of requests completed by the model.
+
+  .. py:attribute:: mean_latency
+
+      The mean time from submission to result, in seconds.
+
+  .. py:attribute:: max_latency
+
+      The maximum time from submission to result, in seconds.
+"""
+
+SchedulerStats = collections.namedtuple('SchedulerStats',
+                                        ['switches', 'runs', 'models'])
+"""Statistics of a :obj:`ModelScheduler`.
+
+  .. py:attribute:: switches
+
+      The number of times the device switched from one model to another.
+
+  .. py:attribute:: runs
+
+      The number of runs, where a run is a sequence of requests for the same
+      model.
+
+  .. py:attribute:: models
+
+      A dict of :obj:`ModelStats` keyed by model name.
+"""
+
+
+class _Model:
+  """An interpreter with its pending requests and latency statistics."""
+
+  def __init__(self, name, interpreter):
+    self.name = name
+    self.view = common.InterpreterView(interpreter)
+    self.requests = collections.deque()
+    self.completed = 0
+    self.total_latency = 0.0
+    self.max_latency = 0.0
+
+
+class ModelScheduler:
+  """Runs requests for several models on one device, grouped by model.
+
+  Alternating models on one Edge TPU is cache unfriendly: each model evicts
+  the other's parameters from the device memory, so they must be reloaded on
+  every switch. The scheduler keeps running requests for the same model
+  while any are pending, and only switches to another model when:
+
+  + the current model has no pending requests, even after waiting up to
+    ``linger`` seconds for one,
+  + it ran ``max_batch_size`` requests in a row, or
+  + a request for another model has waited more than ``max_wait`` seconds.
+
+  In the last two cases it switches to the model with the oldest pending
+  request. Results are delivered through :obj:`concurrent.futures.Future`
+  objects. Use the scheduler as a context manager, or call :func:`close`
+  when done, to stop its worker thread.
+  """
+
+  def __init__(self,
+               models,
+               device=None,
+               interpreter_factory=None,
+               max_batch_size=8,
+               max_wait=0.02,
+               linger=0.005):
+    """
+    Args:
+      models: A dict of models keyed by name, each as accepted by
+        :func:`~pycoral.utils.edgetpu.make_interpreter`.
+      device (str): The device shared by all models, or 'cpu'.
+      interpreter_factory: A function that takes a model and a device string
+        and returns a ``tf.lite.Interpreter``. Defaults to
+        :func:`~pycoral.utils.edgetpu.make_interpreter`.
+      max_batch_size (int): The maximum number of requests for one model to
+        run in a row while other models have pending requests, or None for no
+        limit.
+      max_wait (float): The maximum time, in seconds, that a request waits
+        for another model's run before forcing a switch, or None for no
+        limit.
+      linger (float): The maximum time, in seconds, that the device stays
+        idle waiting for another request of the current model, instead of
+        switching to a model with pending requests. Lingering groups requests
+        that arrive interleaved, at the cost of some latency for the other
+        models. Set to 0 to switch as soon as the current model has no
+        pending requests.
+    """
+    if not models:
+      raise ValueError('At least one model expected')
+    if interpreter_factory is None:
+      interpreter_factory = _make_edgetpu_interpreter
+
+    self._max_batch_size = max_batch_size
+    self._max_wait = max_wait
+    self._linger = linger
+    self._models = {}
+    for name, model in models.items():
+      interpreter = interpreter_factory(model, device)
+      interpreter.allocate_tensors()
+      self._models[name] = _Model(name, interpreter)
+    self._cond = threading.Condition()
+    self._closed = False
+    self._switches = 0
+    self._runs = 0
+    self._thread = threading.Thread(target=self._run)
+    self._thread.daemon = True
+    self._thread.start()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def submit(self, model, inputs, postprocess=None):
+    """Queues an inference of a model.
+
+    Args:
+      model (str): The name of the model to run.
+      inputs: The input tensor as :obj:`numpy.array`, or a dict of input
+        tensors keyed by tensor name for models with several inputs.
+      postprocess: An optional function that takes the interpreter (an
+        :obj:`~pycoral.adapters.common.InterpreterView`) after the
+        inference, and returns the result of the request.
+
+    Returns:
+      A :obj:`concurrent.futures.Future` for the result of the request: what
+      ``postprocess`` returns, or by default a dict of output tensor copies
+      keyed by tensor name.
+    """
+    if model not in self._models:
+      raise ValueError('Unknown model: {}'.format(model))
+    future = concurrent.futures.Future()
+    with self._cond:
+      if self._closed:
+        raise RuntimeError('Cannot submit to a closed ModelScheduler')
+      self._models[model].requests.append(
+          (inputs, postprocess, future, time.perf_counter()))
+      self._cond.notify()
+    return future
+
+  def _next_model(self, current, run_length):
+    """Picks the model of the next request. Requires the lock."""
+    others = [
+        m for m in self._models.values() if m.requests and m is not current
+    ]
+    if not others:
+      return current
+    if current is not None and current.requests:
+      full = (
+          self._max_batch_size is not None and
+          run_length >= self._max_batch_size)
+      oldest = min(m.requests[0][3] for m in others)
+      expired = (
+          self._max_wait is not None and
+          time.perf_counter() - oldest > self._max_wait)
+      if not full and not expired:
+        return current
+    return min(others, key=lambda m: m.requests[0][3])
+
+  def _wait_for_current(self, current, run_length):
+    """Lingers on the current model, then picks the next one.
+
+    Requires the lock, which is released while waiting.
+    """
+    deadline = time.perf_counter() + self._linger
+    if self._max_wait is not None:
+      oldest = min(
+          m.requests[0][3] for m in self._models.values() if m.requests)
+      deadline = min(deadline, oldest + self._max_wait)
+    while not current.requests and not self._closed:
+      remaining = deadline - time.perf_counter()
+      if remaining <= 0:
+        break
+      self._cond.wait(remaining)
+    return self._next_model(current, run_length)
+
+  def _run(self):
+    current = None
+    run_length = 0
+    while True:
+      with self._cond:
+        while not self._closed and not any(
+            m.requests for m in self._models.values()):
+          self._cond.wait()
+        model = self._next_model(current, run_length)
+        if (model is not current and current is not None and self._linger and
+            not self._closed and
+            (self._max_batch_size is None or
+             run_length < self._max_batch_size)):
+          model = self._wait_for_current(current, run_length)
+        if model is None or not model.requests:
+          return  # Closed and drained.
+        if model is not current:
+          if current is not None:
+            self._switches += 1
+          self._runs += 1
+          current = model
+          run_length = 0
+        run_length += 1
+        inputs, postprocess, future, submit_time = model.requests.popleft()
+
+      if _run_request(model.view, inputs, postprocess, future):
+        latency = time.perf_counter() - submit_time
+        with self._cond:
+          model.completed += 1
+          model.total_latency += latency
+          model.max_latency = max(model.max_latency, latency)
+
+  def stats(self):
+    """Gets the current statistics of the scheduler.
+
+    Returns:
+      A :obj:`SchedulerStats` object.
+    """
+    with self._cond:
+      return SchedulerStats(
+          switches=self._switches,
+          runs=self._runs,
+          models={
+              m.name: ModelStats(
+                  queue_depth=len(m.requests),
+                  completed=m.completed,
+                  mean_latency=(m.total_latency /
+                                m.completed if m.completed else 0.0),
+                  max_latency=m.max_latency)
+              for m in self._models.values()
+          })
+
+  def close(self):
+    """Finishes the queued requests and stops the worker thread."""
+    with self._cond:
+      self._closed = True
+      self._cond.notify()
+    self._thread.join()
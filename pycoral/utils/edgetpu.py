@@ -14,21 +14,14 @@
 # limitations under the License.
 """Utilities for using the TensorFlow Lite Interpreter with Edge TPU."""
 
+import collections
 import contextlib
 import ctypes
 import ctypes.util
+import platform
+import sys
 
 import numpy as np
-
-# pylint:disable=unused-import
-from pycoral.pybind._pywrap_coral import GetRuntimeVersion as get_runtime_version
-from pycoral.pybind._pywrap_coral import InvokeWithBytes as invoke_with_bytes
-from pycoral.pybind._pywrap_coral import InvokeWithDmaBuffer as invoke_with_dmabuffer
-from pycoral.pybind._pywrap_coral import InvokeWithMemBuffer as invoke_with_membuffer
-from pycoral.pybind._pywrap_coral import ListEdgeTpus as list_edge_tpus
-from pycoral.pybind._pywrap_coral import SetVerbosity as set_verbosity
-from pycoral.pybind._pywrap_coral import SupportsDmabuf as supports_dmabuf
-import platform
 import tflite_runtime.interpreter as tflite
 
 _EDGETPU_SHARED_LIB = {
@@ -37,6 +30,126 @@ _EDGETPU_SHARED_LIB = {
   'Windows': 'edgetpu.dll'
 }[platform.system()]
 
+# The native extension loads the Edge TPU runtime, so it's only imported once
+# one of its functions is called.
+_pywrap_coral = None
+
+
+def _native():
+  """Returns the native extension module, importing it on first use."""
+  global _pywrap_coral
+  if _pywrap_coral is None:
+    # pylint:disable=g-import-not-at-top
+    from pycoral.pybind import _pywrap_coral as pywrap_coral
+    _pywrap_coral = pywrap_coral
+  return _pywrap_coral
+
+
+def get_runtime_version():
+  """Returns the Edge TPU runtime (libedgetpu.so) version.
+
+  This runtime version is dynamically retrieved from the shared object.
+
+  Returns:
+    A string for the version name.
+  """
+  return _native().GetRuntimeVersion()
+
+
+def list_edge_tpus():
+  """Lists all available Edge TPU devices.
+
+  Returns:
+    A list of dictionary items, each representing an Edge TPU in the system.
+    Each dictionary includes a "type" (either "usb" or "pci") and a
+    "path" (the device location in the system). Note: The order of the
+    Edge TPUs in this list are not guaranteed to be consistent across
+    system reboots.
+  """
+  return _native().ListEdgeTpus()
+
+
+def set_verbosity(verbosity):
+  """Sets the verbosity of operating logs related to each Edge TPU.
+
+  10 is the most verbose; 0 is the default.
+
+  Args:
+    verbosity(int): Desired verbosity 0-10.
+  Returns:
+    A boolean indicating if verbosity was succesfully set.
+  """
+  return _native().SetVerbosity(verbosity)
+
+
+def supports_dmabuf(interpreter_handle):
+  """Checks whether the device supports Linux dma-buf.
+
+  Args:
+    interpreter_handle: The native handle of the ``tf.lite:Interpreter``
+      that's bound to the Edge TPU you want to query.
+  Returns:
+    True if the device supports DMA buffers.
+  """
+  return _native().SupportsDmabuf(interpreter_handle)
+
+
+def invoke_with_bytes(interpreter_handle, input_data):
+  """Invokes an interpreter with bytes as input.
+
+  Args:
+    interpreter_handle: The native handle of the ``tf.lite:Interpreter`` to
+      invoke.
+    input_data (bytes): Raw bytes as input data.
+  """
+  _native().InvokeWithBytes(interpreter_handle, input_data)
+
+
+def invoke_with_membuffer(interpreter_handle, buffer, size):
+  """Invokes an interpreter with a pointer to a native memory allocation.
+
+  Args:
+    interpreter_handle: The native handle of the ``tf.lite:Interpreter`` to
+      invoke.
+    buffer (int): Pointer to memory buffer with input data.
+    size (int): The buffer size.
+  """
+  _native().InvokeWithMemBuffer(interpreter_handle, buffer, size)
+
+
+def invoke_with_dmabuffer(interpreter_handle, dma_fd, size):
+  """Invokes an interpreter with a Linux dma-buf file descriptor as input.
+
+  Works only for Edge TPU models running on PCIe-based Coral devices.
+  You can verify device support with :func:`supports_dmabuf`.
+
+  Args:
+    interpreter_handle: The native handle of the ``tf.lite:Interpreter`` to
+      invoke.
+    dma_fd (int): DMA file descriptor.
+    size (int): DMA buffer size.
+  """
+  _native().InvokeWithDmaBuffer(interpreter_handle, dma_fd, size)
+
+
+def invoke_batch_with_membuffers(interpreter_handle, inputs, input_size,
+                                 output_indices, outputs, output_strides):
+  """Invokes an interpreter once per input buffer, copying outputs each time.
+
+  Args:
+    interpreter_handle: The native handle of the ``tf.lite:Interpreter`` to
+      invoke.
+    inputs (list): Pointers to the memory buffers with input data.
+    input_size (int): The size of each input buffer.
+    output_indices (list): The indices of the output tensors to copy.
+    outputs (list): For each output tensor, a pointer to the memory buffer
+      that receives its values for all inputs.
+    output_strides (list): For each output tensor, the distance in bytes
+      between the values of consecutive inputs.
+  """
+  _native().InvokeBatchWithMemBuffers(interpreter_handle, inputs, input_size,
+                                      output_indices, outputs, output_strides)
+
 
 def load_edgetpu_delegate(options=None):
   """Loads the Edge TPU delegate with the given options.
@@ -52,7 +165,11 @@ def load_edgetpu_delegate(options=None):
   return tflite.load_delegate(_EDGETPU_SHARED_LIB, options or {})
 
 
-def make_interpreter(model_path_or_content, device=None, delegate=None):
+def make_interpreter(model_path_or_content,
+                     device=None,
+                     delegate=None,
+                     num_threads=None,
+                     use_xnnpack=True):
   """Creates a new ``tf.lite.Interpreter`` instance using the given model.
 
   **Note:** If you have multiple Edge TPUs, you should always specify the
@@ -70,6 +187,8 @@ def make_interpreter(model_path_or_content, device=None, delegate=None):
        + "usb:<N>" -- use N-th USB Edge TPU
        + "pci"     -- use any PCIe Edge TPU
        + "pci:<N>" -- use N-th PCIe Edge TPU
+       + "cpu"     -- use no Edge TPU: the model runs on the CPU only, so it
+         must not be compiled for the Edge TPU
 
        If left as None, you cannot reliably predict which device you'll get.
        So if you have multiple Edge TPUs and want to run a specific model on
@@ -77,20 +196,30 @@ def make_interpreter(model_path_or_content, device=None, delegate=None):
      delegate: A pre-loaded Edge TPU delegate object, as provided by
        :func:`load_edgetpu_delegate`. If provided, the `device` argument
        is ignored.
+     num_threads (int): The number of threads for the operations that run on
+       the CPU. If left as None, the TensorFlow Lite default is used.
+     use_xnnpack (bool): Whether operations that run on the CPU may use the
+       XNNPACK delegate, which TensorFlow Lite applies by default.
 
   Returns:
      New ``tf.lite.Interpreter`` instance.
   """
   if delegate:
     delegates = [delegate]
+  elif device == 'cpu':
+    delegates = []
   else:
     delegates = [load_edgetpu_delegate({'device': device} if device else {})]
+  kwargs = {'experimental_delegates': delegates}
+  if num_threads is not None:
+    kwargs['num_threads'] = num_threads
+  if not use_xnnpack:
+    kwargs['experimental_op_resolver_type'] = (
+        tflite.OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES)
   if isinstance(model_path_or_content, bytes):
-    return tflite.Interpreter(
-        model_content=model_path_or_content, experimental_delegates=delegates)
+    return tflite.Interpreter(model_content=model_path_or_content, **kwargs)
   else:
-    return tflite.Interpreter(
-        model_path=model_path_or_content, experimental_delegates=delegates)
+    return tflite.Interpreter(model_path=model_path_or_content, **kwargs)
 
 
 # ctypes definition of GstMapInfo. This is a stable API, guaranteed to be
@@ -109,28 +238,47 @@ class _GstMapInfo(ctypes.Structure):
   ]  # GST_PADDING
 
 
-# Try to import GStreamer but don't fail if it's not available. If not available
-# we're probably not getting GStreamer buffers as input anyway.
-_libgst = None
-try:
-  # pylint:disable=g-import-not-at-top
-  import gi
-  gi.require_version('Gst', '1.0')
-  gi.require_version('GstAllocators', '1.0')
-  # pylint:disable=g-multiple-import
-  from gi.repository import Gst, GstAllocators
-  _libgst = ctypes.CDLL(ctypes.util.find_library('gstreamer-1.0'))
-  _libgst.gst_buffer_map.argtypes = [
-      ctypes.c_void_p,
-      ctypes.POINTER(_GstMapInfo), ctypes.c_int
-  ]
-  _libgst.gst_buffer_map.restype = ctypes.c_int
-  _libgst.gst_buffer_unmap.argtypes = [
-      ctypes.c_void_p, ctypes.POINTER(_GstMapInfo)
-  ]
-  _libgst.gst_buffer_unmap.restype = None
-except (ImportError, ValueError, OSError):
-  pass
+_GStreamer = collections.namedtuple('_GStreamer',
+                                    ['Gst', 'GstAllocators', 'libgst'])
+
+# GStreamer is imported on first use, and set to False if it's not available.
+_gstreamer = None
+
+
+def _load_gstreamer():
+  """Returns the GStreamer modules, or None if GStreamer is not available."""
+  global _gstreamer
+  if _gstreamer is None:
+    try:
+      # pylint:disable=g-import-not-at-top
+      import gi
+      gi.require_version('Gst', '1.0')
+      gi.require_version('GstAllocators', '1.0')
+      # pylint:disable=g-multiple-import
+      from gi.repository import Gst, GstAllocators
+      libgst = ctypes.CDLL(ctypes.util.find_library('gstreamer-1.0'))
+      libgst.gst_buffer_map.argtypes = [
+          ctypes.c_void_p,
+          ctypes.POINTER(_GstMapInfo), ctypes.c_int
+      ]
+      libgst.gst_buffer_map.restype = ctypes.c_int
+      libgst.gst_buffer_unmap.argtypes = [
+          ctypes.c_void_p, ctypes.POINTER(_GstMapInfo)
+      ]
+      libgst.gst_buffer_unmap.restype = None
+      _gstreamer = _GStreamer(Gst, GstAllocators, libgst)
+    except (ImportError, ValueError, OSError):
+      _gstreamer = False
+  return _gstreamer or None
+
+
+def _is_gst_buffer(input_data):
+  # A Gst.Buffer can't exist before gi is imported, so there's no need to load
+  # GStreamer until then.
+  if 'gi' not in sys.modules:
+    return False
+  gstreamer = _load_gstreamer()
+  return gstreamer is not None and isinstance(input_data, gstreamer.Gst.Buffer)
 
 
 def _is_valid_ctypes_input(input_data):
@@ -145,15 +293,17 @@ def _is_valid_ctypes_input(input_data):
 @contextlib.contextmanager
 def _gst_buffer_map(buffer):
   """Yields gst buffer map."""
+  gstreamer = _load_gstreamer()
   mapping = _GstMapInfo()
   ptr = hash(buffer)
-  success = _libgst.gst_buffer_map(ptr, mapping, Gst.MapFlags.READ)
+  success = gstreamer.libgst.gst_buffer_map(ptr, mapping,
+                                            gstreamer.Gst.MapFlags.READ)
   if not success:
     raise RuntimeError('gst_buffer_map failed')
   try:
     yield ctypes.c_void_p(mapping.data), mapping.size
   finally:
-    _libgst.gst_buffer_unmap(ptr, mapping)
+    gstreamer.libgst.gst_buffer_unmap(ptr, mapping)
 
 
 def _check_input_size(input_size, expected_input_size):
@@ -162,47 +312,253 @@ def _check_input_size(input_size, expected_input_size):
         input_size, expected_input_size))
 
 
-def run_inference(interpreter, input_data):
-  """Performs interpreter ``invoke()`` with a raw input tensor.
+class InferenceHandle:
+  """Runs inferences with raw input on one interpreter, with cached setup.
 
-  Args:
-    interpreter: The ``tf.lite.Interpreter`` to invoke.
-    input_data: A 1-D array as the input tensor. Input data must be uint8
-      format. Data may be ``Gst.Buffer`` or :obj:`numpy.ndarray`.
+  :func:`run_inference` looks up the input tensor size, the native
+  interpreter handle and (for ``Gst.Buffer`` input) the dma-buf support on
+  every call. An ``InferenceHandle`` does that once for an interpreter, and
+  if a dma-buf inference ever fails, it sticks to mapping buffers from then
+  on instead of retrying dma-buf on every frame::
+
+    handle = edgetpu.InferenceHandle(interpreter)
+    for buffer in buffers:
+      handle.run(buffer)
+      ...
+
+  **Note:** Create a new handle if you resize the interpreter's input tensor.
   """
-  input_shape = interpreter.get_input_details()[0]['shape']
-  expected_input_size = np.prod(input_shape)
-
-  interpreter_handle = interpreter._native_handle()  # pylint:disable=protected-access
-  if isinstance(input_data, bytes):
-    _check_input_size(len(input_data), expected_input_size)
-    invoke_with_bytes(interpreter_handle, input_data)
-  elif _is_valid_ctypes_input(input_data):
-    pointer, actual_size = input_data
-    _check_input_size(actual_size, expected_input_size)
-    invoke_with_membuffer(interpreter_handle, pointer.value,
-                          expected_input_size)
-  elif _libgst and isinstance(input_data, Gst.Buffer):
+
+  def __init__(self, interpreter):
+    """
+    Args:
+      interpreter: The ``tf.lite.Interpreter`` to invoke, with its tensors
+        already allocated.
+    """
+    self._interpreter = interpreter
+    self._handle = interpreter._native_handle()  # pylint:disable=protected-access
+    self._expected_input_size = int(
+        np.prod(interpreter.get_input_details()[0]['shape']))
+    # Only needed by run_batch(), so looked up on its first call.
+    self._output_details = None
+    # Whether to try dma-buf for dma-buf memory. None until the first
+    # Gst.Buffer, then False for good once it's unsupported or has failed.
+    self._use_dmabuf = None
+    self._copy_count = 0
+
+  @property
+  def interpreter(self):
+    """The ``tf.lite.Interpreter`` this handle invokes."""
+    return self._interpreter
+
+  @property
+  def expected_input_size(self):
+    """The size of the input tensor, in bytes."""
+    return self._expected_input_size
+
+  def _run_gst_buffer(self, input_data):
+    gst_allocators = _load_gstreamer().GstAllocators
     memory = input_data.peek_memory(0)
-    map_buffer = not GstAllocators.is_dmabuf_memory(
-        memory) or not supports_dmabuf(interpreter_handle)
-    if not map_buffer:
-      _check_input_size(memory.size, expected_input_size)
-      fd = GstAllocators.dmabuf_memory_get_fd(memory)
+    use_dmabuf = (
+        self._use_dmabuf is not False and
+        gst_allocators.is_dmabuf_memory(memory))
+    if use_dmabuf and self._use_dmabuf is None:
+      self._use_dmabuf = bool(supports_dmabuf(self._handle))
+    if use_dmabuf and self._use_dmabuf:
+      _check_input_size(memory.size, self._expected_input_size)
+      fd = gst_allocators.dmabuf_memory_get_fd(memory)
       try:
-        invoke_with_dmabuffer(interpreter_handle, fd, expected_input_size)
+        invoke_with_dmabuffer(self._handle, fd, self._expected_input_size)
+        return
       except RuntimeError:
         # dma-buf input didn't work, likely due to old kernel driver. This
-        # situation can't be detected until one inference has been tried.
-        map_buffer = True
-    if map_buffer:
-      with _gst_buffer_map(input_data) as (pointer, actual_size):
-        assert actual_size >= expected_input_size
-        invoke_with_membuffer(interpreter_handle, pointer.value,
-                              expected_input_size)
-  elif isinstance(input_data, np.ndarray):
-    _check_input_size(len(input_data), expected_input_size)
-    invoke_with_membuffer(interpreter_handle, input_data.ctypes.data,
-                          expected_input_size)
-  else:
-    raise TypeError('input data type is not supported.')
+        # situation can't be detected until one inference has been tried,
+        # and won't change, so map buffers from now on.
+        self._use_dmabuf = False
+    with _gst_buffer_map(input_data) as (pointer, actual_size):
+      assert actual_size >= self._expected_input_size
+      invoke_with_membuffer(self._handle, pointer.value,
+                            self._expected_input_size)
+
+  @property
+  def copy_count(self):
+    """The number of inputs that had to be copied (see :func:`run`)."""
+    return self._copy_count
+
+  def _as_input_array(self, input_data, allow_copy):
+    """Returns a C-contiguous uint8 array sharing the input data's memory."""
+    if isinstance(input_data, np.ndarray) or hasattr(input_data,
+                                                      '__array_interface__'):
+      array = np.asarray(input_data)
+    else:
+      try:
+        array = np.asarray(memoryview(input_data))
+      except TypeError:
+        raise TypeError('input data type is not supported.')
+    if array.dtype != np.uint8:
+      raise ValueError('Input data must be uint8, but got {}.'.format(
+          array.dtype))
+    if not array.flags.c_contiguous:
+      if not allow_copy:
+        raise ValueError('Input data must be C-contiguous; pass '
+                         'allow_copy=True to copy it.')
+      array = np.ascontiguousarray(array)
+      self._copy_count += 1
+    return array
+
+  def run(self, input_data, allow_copy=False):
+    """Performs interpreter ``invoke()`` with a raw input tensor.
+
+    Args:
+      input_data: The input tensor data, with the same types as accepted by
+        :func:`run_inference`.
+      allow_copy (bool): Whether to copy input data that isn't C-contiguous,
+        instead of raising an error. Copies are counted in
+        :attr:`copy_count`.
+    """
+    if isinstance(input_data, bytes):
+      _check_input_size(len(input_data), self._expected_input_size)
+      invoke_with_bytes(self._handle, input_data)
+    elif _is_valid_ctypes_input(input_data):
+      pointer, actual_size = input_data
+      _check_input_size(actual_size, self._expected_input_size)
+      invoke_with_membuffer(self._handle, pointer.value,
+                            self._expected_input_size)
+    elif _is_gst_buffer(input_data):
+      self._run_gst_buffer(input_data)
+    else:
+      array = self._as_input_array(input_data, allow_copy)
+      _check_input_size(array.nbytes, self._expected_input_size)
+      invoke_with_membuffer(self._handle, array.ctypes.data,
+                            self._expected_input_size)
+
+  def _get_output_details(self):
+    if self._output_details is None:
+      self._output_details = self._interpreter.get_output_details()
+    return self._output_details
+
+  def _batch_outputs(self, num_inputs):
+    outputs = []
+    for details in self._get_output_details():
+      shape = tuple(details['shape'])
+      if shape and shape[0] == 1:
+        shape = shape[1:]
+      outputs.append(np.empty((num_inputs,) + shape, dtype=details['dtype']))
+    return outputs
+
+  def run_batch(self, inputs, outputs_out=None):
+    """Runs one inference per input, and collects all the output tensors.
+
+    All the inferences run in a single native call that doesn't hold the
+    GIL, and each output tensor is copied straight into its output array.
+
+    Args:
+      inputs: The input tensors, either as a C-contiguous uint8
+        :obj:`numpy.array` with one input per row (of shape (N, ...)), or as a
+        sequence of N inputs of any type accepted by :func:`run`, except
+        ``(ctypes.c_void_p, size)`` tuples and ``Gst.Buffer``.
+      outputs_out: An optional list of pre-allocated, C-contiguous arrays,
+        one per output tensor, each of shape (N, ...) and of the tensor's
+        dtype, to receive the outputs.
+
+    Returns:
+      The list of output arrays: ``outputs_out``, or new arrays of shape
+      (N, ...) where the rest of the shape is the tensor's shape without its
+      batch dimension.
+    """
+    if isinstance(inputs, np.ndarray):
+      array = self._as_input_array(inputs, allow_copy=False)
+      num_inputs = len(array)
+      arrays = [array]
+      item_size = array.nbytes // num_inputs if num_inputs else 0
+      pointers = [array.ctypes.data + i * item_size for i in range(num_inputs)]
+    else:
+      # Keep the arrays alive until the native call returns.
+      arrays = [self._as_input_array(x, allow_copy=False) for x in inputs]
+      num_inputs = len(arrays)
+      item_size = min([a.nbytes for a in arrays], default=0)
+      pointers = [a.ctypes.data for a in arrays]
+    if num_inputs:
+      _check_input_size(item_size, self._expected_input_size)
+
+    output_details = self._get_output_details()
+    if outputs_out is None:
+      outputs_out = self._batch_outputs(num_inputs)
+    if len(outputs_out) != len(output_details):
+      raise ValueError('Expected {} output arrays, but got {}.'.format(
+          len(output_details), len(outputs_out)))
+    for out, details in zip(outputs_out, output_details):
+      if (len(out) != num_inputs or out.dtype != details['dtype'] or
+          not out.flags.c_contiguous or not out.flags.writeable):
+        raise ValueError(
+            'Output array for {} must be a writable C-contiguous array of {} '
+            'rows of type {}.'.format(details['name'], num_inputs,
+                                      np.dtype(details['dtype']).name))
+
+    if num_inputs:
+      invoke_batch_with_membuffers(
+          self._handle, pointers, self._expected_input_size,
+          [d['index'] for d in output_details],
+          [out.ctypes.data for out in outputs_out],
+          [out.nbytes // num_inputs for out in outputs_out])
+    return outputs_out
+
+
+def run_inference(interpreter, input_data, allow_copy=False):
+  """Performs interpreter ``invoke()`` with a raw input tensor.
+
+  The input data is read in place, without an intermediate copy, from a
+  :obj:`numpy.ndarray` or an object supporting the buffer protocol (such as
+  ``memoryview``, ``bytearray``, ``mmap`` or a
+  ``multiprocessing.shared_memory`` buffer). Other objects with an
+  ``__array_interface__`` are accepted too, but may be copied to build it: a
+  PIL image, for instance, is copied on every call.
+
+  To run many inferences on the same interpreter, use an
+  :obj:`InferenceHandle` instead, to skip the per-call setup.
+
+  Args:
+    interpreter: The ``tf.lite.Interpreter`` to invoke, or an
+      :obj:`InferenceHandle` bound to it.
+    input_data: The input tensor data, in uint8 format and with at least as
+      many bytes as the input tensor. Data may be ``bytes``, a
+      ``(ctypes.c_void_p, size)`` tuple, a ``Gst.Buffer`` or any of the
+      objects listed above.
+    allow_copy (bool): Whether to copy input data that isn't C-contiguous,
+      instead of raising an error.
+
+  Raises:
+    TypeError: If the input data type is not supported.
+    ValueError: If the input data is too small, isn't uint8, or isn't
+      C-contiguous and ``allow_copy`` is False.
+  """
+  if not isinstance(interpreter, InferenceHandle):
+    interpreter = InferenceHandle(interpreter)
+  interpreter.run(input_data, allow_copy)
+
+
+def run_inference_batch(interpreter, inputs, outputs_out=None):
+  """Runs one inference per input, and collects all the output tensors.
+
+  Compared to calling :func:`run_inference` in a loop, all the inferences
+  run in a single native call that releases the GIL for the whole batch, and
+  output tensors are copied straight into pre-allocated arrays::
+
+    embeddings, = edgetpu.run_inference_batch(interpreter, images)
+
+  Args:
+    interpreter: The ``tf.lite.Interpreter`` to invoke, or an
+      :obj:`InferenceHandle` bound to it.
+    inputs: The input tensors, either as a C-contiguous uint8
+      :obj:`numpy.array` with one input per row, or as a sequence of inputs
+      supported by :func:`run_inference` (except ``(ctypes.c_void_p, size)``
+      tuples and ``Gst.Buffer``).
+    outputs_out: An optional list of pre-allocated arrays, one per output
+      tensor, each with one row per input and of the tensor's dtype.
+
+  Returns:
+    The list of output arrays, one per output tensor, each of shape (N, ...).
+  """
+  if not isinstance(interpreter, InferenceHandle):
+    interpreter = InferenceHandle(interpreter)
+  return interpreter.run_batch(inputs, outputs_out)
@@ -0,0 +1,170 @@
+# Lint as: python3
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""A pool of ready-to-use interpreters, shared by many threads.
+
+:func:`~pycoral.utils.edgetpu.make_interpreter` loads a new Edge TPU delegate
+each time, and a new interpreter must also allocate its tensors before it can
+run. An :obj:`InterpreterPool` does both ahead of time: it loads one delegate
+per device and keeps a fixed number of allocated interpreters per model and
+device, which threads check out and return::
+
+  pool = InterpreterPool(size=2)
+  pool.preload(model_file, device='pci:0')
+  ...
+  # In any thread:
+  with pool.interpreter(model_file, device='pci:0') as interpreter:
+    common.set_input(interpreter, image)
+    interpreter.invoke()
+    classes = classify.get_classes(interpreter, top_k=1)
+"""
+
+import contextlib
+import queue
+import threading
+
+from pycoral.utils import edgetpu
+
+
+class InterpreterPool:
+  """Caches Edge TPU delegates and pre-allocated interpreters.
+
+  Interpreters are created with their tensors allocated, the first time a
+  (model, device) pair is requested or when calling :func:`preload`. Each
+  interpreter is used by one thread at a time: :func:`interpreter` blocks
+  until one of the pair's interpreters is available.
+  """
+
+  def __init__(self, size=1, registry=None):
+    """
+    Args:
+      size (int): The number of interpreters to keep for each (model, device)
+        pair, so the maximum number of threads that can run the same model on
+        the same device at once.
+      registry: An optional :obj:`~pycoral.utils.registry.ModelRegistry`
+        that loads each model once for all the interpreters of the pool (and
+        of anything else that shares the registry). By default, each
+        interpreter loads its model separately.
+    """
+    if size < 1:
+      raise ValueError('Pool size must be at least 1, but got {}'.format(size))
+    self._size = size
+    self._registry = registry
+    self._lock = threading.Lock()
+    self._delegates = {}
+    self._idle = {}
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  @property
+  def size(self):
+    """The number of interpreters for each (model, device) pair."""
+    return self._size
+
+  def delegate(self, device=None):
+    """Gets the Edge TPU delegate of a device, loading it on first use.
+
+    Args:
+      device (str): The Edge TPU device, in the format accepted by
+        :func:`~pycoral.utils.edgetpu.make_interpreter`.
+
+    Returns:
+      The Edge TPU delegate object, or None for the 'cpu' device.
+    """
+    with self._lock:
+      return self._delegate(device)
+
+  def _delegate(self, device):
+    if device == 'cpu':
+      return None
+    delegate = self._delegates.get(device)
+    if delegate is None:
+      delegate = edgetpu.load_edgetpu_delegate(
+          {'device': device} if device else {})
+      self._delegates[device] = delegate
+    return delegate
+
+  def preload(self, model_path_or_content, device=None):
+    """Creates the interpreters of a (model, device) pair, if not done yet.
+
+    Args:
+      model_path_or_content (str or bytes): The model, as accepted by
+        :func:`~pycoral.utils.edgetpu.make_interpreter`.
+      device (str): The Edge TPU device to run the model on, or 'cpu'.
+    """
+    self._idle_interpreters(model_path_or_content, device)
+
+  def _idle_interpreters(self, model_path_or_content, device):
+    key = (model_path_or_content, device)
+    idle = self._idle.get(key)
+    if idle is not None:
+      return idle
+    with self._lock:
+      idle = self._idle.get(key)
+      if idle is None:
+        delegate = self._delegate(device)
+        model = model_path_or_content
+        if self._registry is not None:
+          model = self._registry.get(model_path_or_content)
+        idle = queue.LifoQueue()
+        for _ in range(self._size):
+          interpreter = edgetpu.make_interpreter(
+              model, device=device, delegate=delegate)
+          interpreter.allocate_tensors()
+          idle.put(interpreter)
+        self._idle[key] = idle
+      return idle
+
+  @contextlib.contextmanager
+  def interpreter(self, model_path_or_content, device=None, timeout=None):
+    """Checks out an interpreter for a model, and returns it to the pool after.
+
+    Args:
+      model_path_or_content (str or bytes): The model, as accepted by
+        :func:`~pycoral.utils.edgetpu.make_interpreter`.
+      device (str): The Edge TPU device to run the model on, or 'cpu'.
+      timeout (float): The maximum time to wait for an interpreter, in
+        seconds, or None to wait forever.
+
+    Yields:
+      A ``tf.lite.Interpreter`` with its tensors allocated. Its tensors still
+      hold the data of the previous user.
+
+    Raises:
+      TimeoutError: If no interpreter became available in time.
+    """
+    idle = self._idle_interpreters(model_path_or_content, device)
+    try:
+      interpreter = idle.get(timeout=timeout)
+    except queue.Empty:
+      raise TimeoutError(
+          'No interpreter available after {} seconds'.format(timeout))
+    try:
+      yield interpreter
+    finally:
+      idle.put(interpreter)
+
+  def close(self):
+    """Releases all the interpreters, then all the delegates.
+
+    Interpreters that are checked out when this is called are released when
+    they are returned.
+    """
+    with self._lock:
+      self._idle = {}
+      self._delegates = {}
@@ -0,0 +1,194 @@
+# Lint as: python3
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""A cache of model contents shared by all the interpreters of a process.
+
+An interpreter created from a model path reads and verifies the file again,
+and an interpreter created from model content keeps a reference to the
+``bytes`` object it was given, without copying it. So the cheapest way to
+create many interpreters for the same model is to load the model once and
+pass the same ``bytes`` object to all of them, which a :obj:`ModelRegistry`
+does::
+
+  registry = ModelRegistry()
+  interpreters = [registry.make_interpreter(model_file, device=device)
+                  for device in devices]
+"""
+
+import collections
+import hashlib
+import os
+import threading
+
+from pycoral.utils import edgetpu
+
+RegistryStats = collections.namedtuple(
+    'RegistryStats', ['hits', 'misses', 'models', 'total_bytes'])
+"""Statistics of a :obj:`ModelRegistry`.
+
+  .. py:attribute:: hits
+
+      The number of requests served from the cache.
+
+  .. py:attribute:: misses
+
+      The number of requests that loaded a model.
+
+  .. py:attribute:: models
+
+      The number of models in the cache.
+
+  .. py:attribute:: total_bytes
+
+      The total size of the models in the cache.
+"""
+
+
+class ModelRegistry:
+  """An LRU cache of model contents, bounded by their total size.
+
+  Model files are keyed by their real path, modification time and size, so an
+  updated file is loaded again. Model contents given as ``bytes`` (such as
+  the output of
+  :func:`~pycoral.learn.imprinting.engine.ImprintingEngine.serialize_model`)
+  are keyed by their SHA-256 hash, so identical contents share one object.
+  Only new objects are hashed: pass the object returned by :func:`get` to
+  look it up again in constant time.
+
+  The registry only drops its own reference to evicted models: interpreters
+  created from them keep them alive.
+  """
+
+  def __init__(self, max_bytes=256 * 1024 * 1024):
+    """
+    Args:
+      max_bytes (int): The maximum total size of the cached models. The most
+        recently used model is always kept, even if it's larger.
+    """
+    self._max_bytes = max_bytes
+    self._lock = threading.Lock()
+    self._models = collections.OrderedDict()
+    # Keys of the cached contents by object id, so they aren't hashed again.
+    # The cache keeps the contents alive, so their ids stay unique.
+    self._content_keys = {}
+    self._total_bytes = 0
+    self._hits = 0
+    self._misses = 0
+
+  def _key(self, model_path_or_content):
+    if isinstance(model_path_or_content, bytes):
+      return ('sha256', hashlib.sha256(model_path_or_content).hexdigest())
+    path = os.path.realpath(model_path_or_content)
+    stat = os.stat(path)
+    return ('path', path, stat.st_mtime_ns, stat.st_size)
+
+  def _drop(self, key):
+    """Drops a model. Requires the lock."""
+    content = self._models.pop(key)
+    self._total_bytes -= len(content)
+    if self._content_keys.get(id(content)) == key:
+      del self._content_keys[id(content)]
+
+  def _evict(self):
+    """Drops the least recently used models. Requires the lock."""
+    while self._total_bytes > self._max_bytes and len(self._models) > 1:
+      self._drop(next(iter(self._models)))
+
+  def _insert(self, key, content):
+    """Caches a model and returns the cached content. Requires the lock."""
+    cached = self._models.get(key)
+    if cached is not None:
+      self._models.move_to_end(key)
+      return cached
+    if key[0] == 'path':
+      # Drop the previous versions of the file.
+      for old in [k for k in self._models if k[:2] == key[:2]]:
+        self._drop(old)
+    else:
+      self._content_keys[id(content)] = key
+    self._models[key] = content
+    self._total_bytes += len(content)
+    self._evict()
+    return content
+
+  def get(self, model_path_or_content):
+    """Gets the shared content of a model, loading it if needed.
+
+    Args:
+      model_path_or_content (str or bytes): A model path, or model content.
+
+    Returns:
+      The model content as ``bytes``, the same object for all requests of the
+      same model while it stays in the cache.
+    """
+    if isinstance(model_path_or_content, bytes):
+      with self._lock:
+        key = self._content_keys.get(id(model_path_or_content))
+        if key is not None:
+          self._hits += 1
+          self._models.move_to_end(key)
+          return model_path_or_content
+    key = self._key(model_path_or_content)
+    with self._lock:
+      content = self._models.get(key)
+      if content is not None:
+        self._hits += 1
+        self._models.move_to_end(key)
+        return content
+      self._misses += 1
+    if isinstance(model_path_or_content, bytes):
+      content = model_path_or_content
+    else:
+      # Read outside the lock; if another thread loaded the same model
+      # meanwhile, its copy wins and this one is dropped.
+      with open(key[1], 'rb') as f:
+        content = f.read()
+    with self._lock:
+      return self._insert(key, content)
+
+  def make_interpreter(self, model_path_or_content, device=None,
+                       delegate=None):
+    """Creates an interpreter from the shared content of a model.
+
+    Args:
+      model_path_or_content (str or bytes): A model path, or model content.
+      device (str): The device, as accepted by
+        :func:`~pycoral.utils.edgetpu.make_interpreter`.
+      delegate: A pre-loaded Edge TPU delegate object.
+
+    Returns:
+      New ``tf.lite.Interpreter`` instance.
+    """
+    return edgetpu.make_interpreter(
+        self.get(model_path_or_content), device=device, delegate=delegate)
+
+  def clear(self):
+    """Drops all cached models."""
+    with self._lock:
+      self._models.clear()
+      self._content_keys.clear()
+      self._total_bytes = 0
+
+  def stats(self):
+    """Gets the current statistics of the registry.
+
+    Returns:
+      A :obj:`RegistryStats` object.
+    """
+    with self._lock:
+      return RegistryStats(
+          hits=self._hits,
+          misses=self._misses,
+          models=len(self._models),
+          total_bytes=self._total_bytes)
@@ -29,10 +29,19 @@ limitations under the License.
 #include <Python.h>
 #include <numpy/arrayobject.h>
 
+#include <atomic>
+#include <chrono>
+#include <condition_variable>
+#include <cstdint>
+#include <cstring>
+#include <deque>
+#include <functional>
 #include <memory>
+#include <mutex>
 #include <numeric>
 #include <stdexcept>
 #include <string>
+#include <thread>
 #include <type_traits>
 #include <unordered_map>
 #include <vector>
@@ -185,31 +194,422 @@ py::dtype TfLiteTypeToNumpyDtype(const TfLiteType& type) {
   }
 }
 
-class MallocBuffer : public coral::Buffer {
+// Buffer of malloc'ed memory, recycled by a BufferPool.
+class PooledBuffer : public coral::Buffer {
  public:
-  explicit MallocBuffer(void* ptr) : ptr_(ptr) {}
+  explicit PooledBuffer(size_t size) : ptr_(std::malloc(size)), size_(size) {}
+  ~PooledBuffer() override { std::free(ptr_); }
 
   void* ptr() override { return ptr_; }
+  size_t size() const { return size_; }
 
  private:
   void* ptr_ = nullptr;
+  size_t size_ = 0;
 };
 
-// Allocator with leaky `free` function. Caller should use std::free() to free
-// the underlying memory allocated by std::malloc; otherwise there will be
-// memory leaks.
-class LeakyMallocAllocator : public coral::Allocator {
+// Thread-safe pool of buffers. Released buffers are kept for reuse, up to
+// `max_idle` buffers of each size.
+class BufferPool {
  public:
-  LeakyMallocAllocator() = default;
+  struct Stats {
+    uint64_t hits = 0;    // Buffers reused.
+    uint64_t misses = 0;  // Buffers allocated.
+    size_t idle = 0;      // Buffers kept for reuse.
+  };
 
-  coral::Buffer* Alloc(size_t size) override {
-    return new MallocBuffer(std::malloc(size));
+  explicit BufferPool(size_t max_idle) : max_idle_(max_idle) {}
+
+  ~BufferPool() {
+    for (auto& item : idle_)
+      for (auto* buffer : item.second) delete buffer;
   }
 
-  void Free(coral::Buffer* buffer) override {
-    // Note: the memory allocated by std::malloc is not freed here.
+  PooledBuffer* Acquire(size_t size) {
+    {
+      std::lock_guard<std::mutex> lock(mutex_);
+      auto& idle = idle_[size];
+      if (!idle.empty()) {
+        auto* buffer = idle.back();
+        idle.pop_back();
+        ++stats_.hits;
+        --stats_.idle;
+        return buffer;
+      }
+      ++stats_.misses;
+    }
+    return new PooledBuffer(size);
+  }
+
+  void Release(PooledBuffer* buffer) {
+    {
+      std::lock_guard<std::mutex> lock(mutex_);
+      auto& idle = idle_[buffer->size()];
+      if (idle.size() < max_idle_) {
+        idle.push_back(buffer);
+        ++stats_.idle;
+        return;
+      }
+    }
     delete buffer;
   }
+
+  Stats GetStats() {
+    std::lock_guard<std::mutex> lock(mutex_);
+    return stats_;
+  }
+
+ private:
+  std::mutex mutex_;
+  const size_t max_idle_;
+  std::unordered_map<size_t, std::vector<PooledBuffer*>> idle_;
+  Stats stats_;
+};
+
+// Buffer referencing the memory of a Python object, which it keeps alive.
+// Must be created and deleted with the GIL held.
+class PyObjectBuffer : public coral::Buffer {
+ public:
+  PyObjectBuffer(PyObject* owner, void* ptr) : owner_(owner), ptr_(ptr) {
+    Py_INCREF(owner_);
+  }
+  ~PyObjectBuffer() override { Py_DECREF(owner_); }
+
+  void* ptr() override { return ptr_; }
+
+ private:
+  PyObject* owner_ = nullptr;
+  void* ptr_ = nullptr;
+};
+
+// Allocator of pipeline input tensors, which either come from a BufferPool or
+// reference the memory of Python objects (see Wrap()).
+//
+// The pipeline frees input tensors from its own threads, without the GIL, once
+// the first segment has consumed them. So references to Python objects are
+// only dropped by the next call to ReleaseObjects(), with the GIL held.
+class InputTensorAllocator : public coral::Allocator {
+ public:
+  explicit InputTensorAllocator(size_t pool_size) : pool_(pool_size) {}
+
+  coral::Buffer* Alloc(size_t size) override { return pool_.Acquire(size); }
+
+  // Returns a buffer that references `ptr`, the memory of `owner`, and keeps
+  // `owner` alive until the buffer is freed. Requires the GIL.
+  coral::Buffer* Wrap(PyObject* owner, void* ptr) {
+    return new PyObjectBuffer(owner, ptr);
+  }
+
+  void Free(coral::Buffer* buffer) override {
+    if (auto* object_buffer = dynamic_cast<PyObjectBuffer*>(buffer)) {
+      std::lock_guard<std::mutex> lock(mutex_);
+      freed_objects_.push_back(object_buffer);
+    } else {
+      pool_.Release(static_cast<PooledBuffer*>(buffer));
+    }
+  }
+
+  // Drops the references of the freed buffers to Python objects. Requires the
+  // GIL.
+  void ReleaseObjects() {
+    std::vector<PyObjectBuffer*> freed;
+    {
+      std::lock_guard<std::mutex> lock(mutex_);
+      freed.swap(freed_objects_);
+    }
+    for (auto* buffer : freed) delete buffer;
+  }
+
+  BufferPool& pool() { return pool_; }
+
+ private:
+  BufferPool pool_;
+  std::mutex mutex_;
+  std::vector<PyObjectBuffer*> freed_objects_;
+};
+
+// Allocator of pipeline output tensors. Its pool is shared with the numpy
+// arrays returned by Pop(), which may outlive the pipeline.
+class OutputTensorAllocator : public coral::Allocator {
+ public:
+  explicit OutputTensorAllocator(size_t pool_size)
+      : pool_(std::make_shared<BufferPool>(pool_size)) {}
+
+  coral::Buffer* Alloc(size_t size) override { return pool_->Acquire(size); }
+
+  void Free(coral::Buffer* buffer) override {
+    pool_->Release(static_cast<PooledBuffer*>(buffer));
+  }
+
+  const std::shared_ptr<BufferPool>& pool() const { return pool_; }
+
+ private:
+  std::shared_ptr<BufferPool> pool_;
+};
+
+// Owner of the memory of a numpy array returned by Pop(), which gives the
+// buffer back to the pool when the array is released.
+struct PooledArrayOwner {
+  std::shared_ptr<BufferPool> pool;
+  PooledBuffer* buffer;
+};
+
+py::dict PoolStatsToDict(const BufferPool::Stats& stats) {
+  py::dict result;
+  result["hits"] = stats.hits;
+  result["misses"] = stats.misses;
+  result["idle"] = stats.idle;
+  return result;
+}
+
+// Returns the shapes of the output tensors of an interpreter, by name.
+std::unordered_map<std::string, std::vector<ssize_t>> OutputShapes(
+    const tflite::Interpreter& interpreter) {
+  std::unordered_map<std::string, std::vector<ssize_t>> shapes;
+  for (int index : interpreter.outputs()) {
+    const auto* tensor = interpreter.tensor(index);
+    shapes[tensor->name] = std::vector<ssize_t>(
+        tensor->dims->data, tensor->dims->data + tensor->dims->size);
+  }
+  return shapes;
+}
+
+// Pushes slower than this, with an input queue size limit, are counted as
+// blocked by the limit: a push that finds room only enqueues the request.
+constexpr std::chrono::microseconds kBlockedPushTime(100);
+
+// PipelinedModelRunner with the allocators it uses, which must outlive it.
+//
+// PipelinedModelRunner::Pop() can only block, so a receiver thread pops the
+// results as they come, into a queue that TakeResults() can wait on with a
+// timeout. The receiver stops popping while that queue is full, so the output
+// queue size limit still blocks the pipeline.
+struct PipelinedModelRunnerWrapper {
+  using Result = std::vector<coral::PipelineTensor>;
+
+  PipelinedModelRunnerWrapper(
+      const std::vector<tflite::Interpreter*>& interpreters,
+      size_t input_pool_size, size_t output_pool_size)
+      : input_tensor_allocator(input_pool_size),
+        output_tensor_allocator(output_pool_size),
+        runner(absl::make_unique<coral::PipelinedModelRunner>(
+            interpreters, &input_tensor_allocator, &output_tensor_allocator)),
+        output_shapes(OutputShapes(*interpreters.back())),
+        receiver([this] { Receive(); }) {}
+
+  // Called with the GIL held, when the Python object is destroyed.
+  ~PipelinedModelRunnerWrapper() {
+    {
+      std::lock_guard<std::mutex> lock(mutex);
+      stopping = true;
+    }
+    cv.notify_all();
+    // Turns the pipeline off in case it's still on, so that the receiver gets
+    // the end of the results. This fails if it's already off.
+    runner->Push({}).IgnoreError();
+    receiver.join();
+    for (const auto& result : results) FreeTensors(result);
+    runner.reset();
+    input_tensor_allocator.ReleaseObjects();
+  }
+
+  void Receive() {
+    const auto has_room = [this] {
+      return stopping || output_queue_size == 0 ||
+             results.size() < output_queue_size;
+    };
+    while (true) {
+      {
+        std::unique_lock<std::mutex> lock(mutex);
+        if (!has_room()) {
+          // Results aren't consumed fast enough: the pipeline will block once
+          // its own output queue is full too.
+          const auto start = std::chrono::steady_clock::now();
+          cv.wait(lock, has_room);
+          ++stats.full_outputs;
+          stats.output_full_time += std::chrono::duration<double>(
+              std::chrono::steady_clock::now() - start).count();
+        }
+      }
+      Result result;
+      const auto status = runner->Pop(&result);
+      const bool end = !status.ok() || result.empty();
+      {
+        std::lock_guard<std::mutex> lock(mutex);
+        if (!status.ok()) error = std::string(status.message());
+        if (end) {
+          done = true;
+        } else {
+          results.push_back(std::move(result));
+        }
+      }
+      cv.notify_all();
+      if (end) return;
+    }
+  }
+
+  void SetInputQueueSize(size_t size) {
+    input_queue_size = size;
+    runner->SetInputQueueSize(size);
+  }
+
+  // Pushes a request with the GIL released. Only atomic counters are updated
+  // here; GetStats() derives everything else.
+  absl::Status Push(const std::vector<coral::PipelineTensor>& input_tensors) {
+    // Counts pushed requests before the pipeline can see them, so that
+    // GetStats() never finds more consumed requests than pushed ones.
+    if (!input_tensors.empty()) ++pushes;
+    py::gil_scoped_release release;
+    const auto start = std::chrono::steady_clock::now();
+    const auto status = runner->Push(input_tensors);
+    const auto elapsed = std::chrono::steady_clock::now() - start;
+    push_time_ns +=
+        std::chrono::duration_cast<std::chrono::nanoseconds>(elapsed).count();
+    if (!input_tensors.empty()) {
+      if (!status.ok()) {
+        --pushes;
+      } else if (input_queue_size != 0 && elapsed > kBlockedPushTime) {
+        ++blocked_pushes;
+      }
+    }
+    py::gil_scoped_acquire acquire;
+    return status;
+  }
+
+  void SetOutputQueueSize(size_t size) {
+    {
+      std::lock_guard<std::mutex> lock(mutex);
+      output_queue_size = size;
+    }
+    cv.notify_all();
+    runner->SetOutputQueueSize(size);
+  }
+
+  // Takes up to `max_n` results, waiting up to `timeout` seconds (forever if
+  // negative) for the first one, with the GIL released. Returns false if there
+  // are no more results.
+  bool TakeResults(size_t max_n, double timeout, std::vector<Result>* taken) {
+    input_tensor_allocator.ReleaseObjects();
+    bool end = false;
+    std::string end_error;
+    {
+      py::gil_scoped_release release;
+      std::unique_lock<std::mutex> lock(mutex);
+      const auto ready = [this] { return !results.empty() || done; };
+      if (!ready() && timeout != 0) {
+        // The pipeline doesn't produce results fast enough.
+        const auto start = std::chrono::steady_clock::now();
+        if (timeout < 0) {
+          cv.wait(lock, ready);
+        } else {
+          cv.wait_for(lock, std::chrono::duration<double>(timeout), ready);
+        }
+        ++stats.waiting_pops;
+        stats.pop_wait_time += std::chrono::duration<double>(
+            std::chrono::steady_clock::now() - start).count();
+      }
+      while (!results.empty() && taken->size() < max_n) {
+        taken->push_back(std::move(results.front()));
+        results.pop_front();
+      }
+      stats.pops += taken->size();
+      end = taken->empty() && done;
+      if (end) end_error = error;
+    }
+    // There's room in the queue for the receiver.
+    cv.notify_all();
+    if (!end_error.empty()) throw std::runtime_error(end_error);
+    return !end;
+  }
+
+  // Returns the output tensors of a result as shaped numpy arrays, by name.
+  // Each array gives its buffer back to the pool when it's released.
+  py::dict ToDict(const Result& result) {
+    const auto& pool = output_tensor_allocator.pool();
+    py::dict tensors;
+    for (const auto& tensor : result) {
+      // The numpy array owns the buffer until it's released.
+      auto* buffer = static_cast<PooledBuffer*>(tensor.buffer);
+      py::capsule release_when_done(
+          new PooledArrayOwner{pool, buffer}, [](void* ptr) {
+            auto* owner = static_cast<PooledArrayOwner*>(ptr);
+            owner->pool->Release(owner->buffer);
+            delete owner;
+          });
+      const auto dtype = TfLiteTypeToNumpyDtype(tensor.type);
+      std::vector<ssize_t> shape = {
+          static_cast<ssize_t>(tensor.bytes / dtype.itemsize())};
+      const auto it = output_shapes.find(tensor.name);
+      if (it != output_shapes.end() &&
+          std::accumulate(it->second.begin(), it->second.end(), ssize_t{1},
+                          std::multiplies<ssize_t>()) == shape[0]) {
+        shape = it->second;
+      }
+      tensors[py::str(tensor.name)] =
+          py::array(dtype, shape, buffer->ptr(), release_when_done);
+    }
+    return tensors;
+  }
+
+  void FreeTensors(const Result& result) {
+    for (const auto& tensor : result) {
+      output_tensor_allocator.Free(tensor.buffer);
+    }
+  }
+
+  InputTensorAllocator input_tensor_allocator;
+  OutputTensorAllocator output_tensor_allocator;
+  std::unique_ptr<coral::PipelinedModelRunner> runner;
+  const std::unordered_map<std::string, std::vector<ssize_t>> output_shapes;
+
+  // Counters reported by GetStats(), guarded by `mutex`.
+  struct Stats {
+    uint64_t pops = 0;            // Results taken by the caller.
+    uint64_t waiting_pops = 0;    // Pops that had to wait for a result.
+    double pop_wait_time = 0;     // Time pops waited for results.
+    uint64_t full_outputs = 0;    // Times the receiver waited for room.
+    double output_full_time = 0;  // Time the receiver waited for room.
+  };
+
+  // Returns the pipeline statistics as a dict.
+  py::dict GetStats() {
+    // Segment stats are read first, so no counter is behind them.
+    const auto segment_stats = runner->GetSegmentStats();
+    py::list segments;
+    for (const auto& segment : segment_stats) {
+      segments.append(py::make_tuple(segment.total_time_ns / 1e9,
+                                     segment.num_inferences));
+    }
+    std::lock_guard<std::mutex> lock(mutex);
+    py::dict result;
+    result["segments"] = segments;
+    result["pushes"] = static_cast<uint64_t>(pushes);
+    result["blocked_pushes"] = static_cast<uint64_t>(blocked_pushes);
+    result["push_time"] = push_time_ns / 1e9;
+    result["pops"] = stats.pops;
+    result["waiting_pops"] = stats.waiting_pops;
+    result["pop_wait_time"] = stats.pop_wait_time;
+    result["full_outputs"] = stats.full_outputs;
+    result["output_full_time"] = stats.output_full_time;
+    result["done"] = done && results.empty();
+    return result;
+  }
+
+  // Results popped by the receiver, guarded by `mutex`.
+  std::mutex mutex;
+  std::condition_variable cv;
+  std::deque<Result> results;
+  size_t output_queue_size = 0;  // Unlimited if 0.
+  bool done = false;             // No more results.
+  std::string error;             // The error that ended the results, if any.
+  bool stopping = false;
+  Stats stats;
+  // Updated by Push() without taking `mutex`.
+  std::atomic<uint64_t> pushes{0};
+  std::atomic<uint64_t> blocked_pushes{0};
+  std::atomic<int64_t> push_time_ns{0};
+  std::atomic<size_t> input_queue_size{0};  // Unlimited if 0.
+  std::thread receiver;
 };
 
 }  // namespace
@@ -274,6 +674,59 @@ PYBIND11_MODULE(_pywrap_coral, m) {
           input_data (bytes): Raw bytes as input data.
       )pbdoc");
 
+  m.def(
+      "InvokeBatchWithMemBuffers",
+      [](py::object interpreter_handle, const std::vector<uintptr_t>& inputs,
+         size_t input_size, const std::vector<int>& output_indices,
+         const std::vector<uintptr_t>& outputs,
+         const std::vector<size_t>& output_strides) {
+        if (output_indices.size() != outputs.size() ||
+            outputs.size() != output_strides.size())
+          throw std::invalid_argument(
+              "Output indices, buffers and strides must have the same size.");
+        auto* interpreter = reinterpret_cast<tflite::Interpreter*>(
+            interpreter_handle.cast<intptr_t>());
+        auto* error_reporter = static_cast<tflite::StatefulErrorReporter*>(
+            interpreter->error_reporter());
+        for (size_t j = 0; j < output_indices.size(); ++j) {
+          const auto* tensor = interpreter->tensor(output_indices[j]);
+          if (!tensor || tensor->bytes > output_strides[j])
+            throw std::invalid_argument(absl::StrFormat(
+                "Output buffer %d is too small for tensor %d.", j,
+                output_indices[j]));
+        }
+        py::gil_scoped_release release;
+        for (size_t i = 0; i < inputs.size(); ++i) {
+          auto status = coral::InvokeWithMemBuffer(
+              interpreter, reinterpret_cast<void*>(inputs[i]), input_size,
+              error_reporter);
+          if (!status.ok())
+            throw std::runtime_error(absl::StrFormat(
+                "Input %d: %s", i, std::string(status.message())));
+          for (size_t j = 0; j < output_indices.size(); ++j) {
+            const auto* tensor = interpreter->tensor(output_indices[j]);
+            std::memcpy(
+                reinterpret_cast<char*>(outputs[j] + i * output_strides[j]),
+                tensor->data.raw, tensor->bytes);
+          }
+        }
+      },
+      R"pbdoc(
+        Invoke the given ``tf.lite.Interpreter`` once per input buffer, and
+        copy the output tensors after each inference, without acquiring the
+        GIL in between.
+
+        Args:
+          interpreter: The ``tf.lite:Interpreter`` to invoke.
+          inputs (list): Pointers to the memory buffers with input data.
+          input_size (size_t): The size of each input buffer.
+          output_indices (list): The indices of the output tensors to copy.
+          outputs (list): For each output tensor, a pointer to the memory
+            buffer that receives its values for all inputs.
+          output_strides (list): For each output tensor, the distance in bytes
+            between the values of consecutive inputs in its buffer.
+      )pbdoc");
+
   m.def(
       "InvokeWithDmaBuffer",
       [](py::object interpreter_handle, int dma_fd, size_t size) {
@@ -447,75 +900,135 @@ PYBIND11_MODULE(_pywrap_coral, m) {
                               fbb.GetSize());
            });
 
-  py::class_<coral::PipelinedModelRunner>(m, "PipelinedModelRunnerWrapper")
-      .def(py::init([](const py::list& list) {
-        static coral::Allocator* output_tensor_allocator =
-            new LeakyMallocAllocator();
-        std::vector<tflite::Interpreter*> interpreters(list.size());
-        for (int i = 0; i < list.size(); ++i) {
-          interpreters[i] =
-              reinterpret_cast<tflite::Interpreter*>(list[i].cast<intptr_t>());
-        }
-        return absl::make_unique<coral::PipelinedModelRunner>(
-            interpreters, /*input_tensor_allocator=*/nullptr,
-            output_tensor_allocator);
-      }))
-      .def("SetInputQueueSize", &coral::PipelinedModelRunner::SetInputQueueSize)
+  py::class_<PipelinedModelRunnerWrapper>(m, "PipelinedModelRunnerWrapper")
+      .def(py::init([](const py::list& list, size_t input_pool_size,
+                       size_t output_pool_size) {
+             std::vector<tflite::Interpreter*> interpreters(list.size());
+             for (int i = 0; i < list.size(); ++i) {
+               interpreters[i] = reinterpret_cast<tflite::Interpreter*>(
+                   list[i].cast<intptr_t>());
+             }
+             return absl::make_unique<PipelinedModelRunnerWrapper>(
+                 interpreters, input_pool_size, output_pool_size);
+           }),
+           py::arg("interpreters"), py::arg("input_pool_size") = 8,
+           py::arg("output_pool_size") = 8)
+      .def("SetInputQueueSize",
+           [](PipelinedModelRunnerWrapper& self, size_t size) {
+             self.SetInputQueueSize(size);
+           })
       .def("SetOutputQueueSize",
-           &coral::PipelinedModelRunner::SetOutputQueueSize)
-      .def("Push",
-           [](coral::PipelinedModelRunner& self, py::dict& input_tensor_dict) {
-             std::vector<coral::PipelineTensor> input_tensors(
-                 input_tensor_dict.size());
-             int i = 0;
-             for (const auto& item : input_tensor_dict) {
-               input_tensors[i].name = item.first.cast<std::string>();
-               const auto info = item.second.cast<py::buffer>().request();
-               input_tensors[i].type = NumpyDtypeToTfLiteType(info.format);
-               input_tensors[i].bytes = info.size * info.itemsize;
-               input_tensors[i].buffer = self.GetInputTensorAllocator()->Alloc(
-                   input_tensors[i].bytes);
-               std::memcpy(input_tensors[i].buffer->ptr(), info.ptr,
-                           input_tensors[i].bytes);
-               ++i;
+           [](PipelinedModelRunnerWrapper& self, size_t size) {
+             self.SetOutputQueueSize(size);
+           })
+      .def(
+          "Push",
+          [](PipelinedModelRunnerWrapper& self, py::dict& input_tensor_dict,
+             bool copy) {
+            auto& allocator = self.input_tensor_allocator;
+            allocator.ReleaseObjects();
+            std::vector<coral::PipelineTensor> input_tensors(
+                input_tensor_dict.size());
+            int i = 0;
+            for (const auto& item : input_tensor_dict) {
+              input_tensors[i].name = item.first.cast<std::string>();
+              const auto info = item.second.cast<py::buffer>().request();
+              input_tensors[i].type = NumpyDtypeToTfLiteType(info.format);
+              input_tensors[i].bytes = info.size * info.itemsize;
+              if (copy) {
+                input_tensors[i].buffer =
+                    allocator.Alloc(input_tensors[i].bytes);
+                std::memcpy(input_tensors[i].buffer->ptr(), info.ptr,
+                            input_tensors[i].bytes);
+              } else {
+                // The caller checked that the buffer is contiguous.
+                input_tensors[i].buffer =
+                    allocator.Wrap(item.second.ptr(), info.ptr);
+              }
+              ++i;
+            }
+            // Push releases the GIL because it can be blocking (if input queue
+            // size is bigger than input queue size threshold).
+            const auto push_status = self.Push(input_tensors);
+            if (!push_status.ok()) {
+              // The pipeline didn't take the tensors.
+              for (auto& tensor : input_tensors) allocator.Free(tensor.buffer);
+              allocator.ReleaseObjects();
+              throw std::runtime_error(std::string(push_status.message()));
+            }
+          },
+          py::arg("input_tensors"), py::arg("copy") = true)
+      .def(
+          "PopMany",
+          [](PipelinedModelRunnerWrapper& self, size_t max_n,
+             double timeout) -> py::object {
+            std::vector<PipelinedModelRunnerWrapper::Result> taken;
+            if (!self.TakeResults(max_n, timeout, &taken)) return py::none();
+            py::list results;
+            for (const auto& result : taken) {
+              results.append(self.ToDict(result));
+            }
+            return results;
+          },
+          py::arg("max_n"), py::arg("timeout") = -1.0)
+      .def("PopInto",
+           [](PipelinedModelRunnerWrapper& self, py::dict& output_tensor_dict) {
+             // Gets every destination before popping, so an invalid one
+             // doesn't consume a result.
+             std::unordered_map<std::string, py::buffer_info> destinations;
+             for (const auto& output : self.output_shapes) {
+               const py::str name(output.first);
+               if (!output_tensor_dict.contains(name)) {
+                 throw std::invalid_argument("Missing output: " + output.first);
+               }
+               try {
+                 destinations.emplace(
+                     output.first,
+                     output_tensor_dict[name].cast<py::buffer>().request(
+                         /*writable=*/true));
+               } catch (const std::exception& e) {
+                 throw std::invalid_argument(absl::StrFormat(
+                     "Output %s must be a writable buffer: %s", output.first,
+                     e.what()));
+               }
              }
-             // Release GIL because Push can be blocking (if input queue size is
-             // bigger than input queue size threshold).
-             py::gil_scoped_release release;
-             const auto push_status = self.Push(input_tensors);
-             py::gil_scoped_acquire acquire;
-             if (!push_status.ok()) {
-               throw std::runtime_error(std::string(push_status.message()));
+
+             std::vector<PipelinedModelRunnerWrapper::Result> taken;
+             if (!self.TakeResults(1, -1.0, &taken)) return false;
+             const auto& output_tensors = taken.front();
+             try {
+               for (const auto& tensor : output_tensors) {
+                 const auto it = destinations.find(tensor.name);
+                 if (it == destinations.end()) {
+                   throw std::invalid_argument("Missing output: " +
+                                               tensor.name);
+                 }
+                 const auto& info = it->second;
+                 if (info.size * info.itemsize != tensor.bytes) {
+                   throw std::invalid_argument(absl::StrFormat(
+                       "Output %s has %d bytes, but got an array of %d bytes.",
+                       tensor.name, tensor.bytes, info.size * info.itemsize));
+                 }
+                 // The caller checked that the array is contiguous.
+                 std::memcpy(info.ptr, tensor.buffer->ptr(), tensor.bytes);
+               }
+             } catch (...) {
+               // Gives the buffers back to the pool on every error.
+               self.FreeTensors(output_tensors);
+               throw;
              }
+             self.FreeTensors(output_tensors);
+             return true;
            })
-      .def("Pop", [](coral::PipelinedModelRunner& self) -> py::object {
-        std::vector<coral::PipelineTensor> output_tensors;
-
-        // Release GIL because Pop is blocking.
-        py::gil_scoped_release release;
-        const auto pop_status = self.Pop(&output_tensors);
-        py::gil_scoped_acquire acquire;
-
-        if (!pop_status.ok()) {
-          throw std::runtime_error(std::string(pop_status.message()));
-        }
-
-        if (output_tensors.empty()) {
-          return py::none();
-        }
-
-        py::dict result;
-        for (auto tensor : output_tensors) {
-          // Underlying memory's ownership is passed to numpy object.
-          py::capsule free_when_done(tensor.buffer->ptr(),
-                                     [](void* ptr) { std::free(ptr); });
-          result[PyUnicode_DecodeLatin1(tensor.name.data(), tensor.name.size(),
-                                        nullptr)] =
-              py::array(TfLiteTypeToNumpyDtype(tensor.type),
-                        /*shape=*/{tensor.bytes},
-                        /*strides=*/{1}, tensor.buffer->ptr(), free_when_done);
-          self.GetOutputTensorAllocator()->Free(tensor.buffer);
-        }
-        return result;
-      });
+      .def("PoolStats",
+           [](PipelinedModelRunnerWrapper& self) {
+             py::dict result;
+             result["input"] = PoolStatsToDict(
+                 self.input_tensor_allocator.pool().GetStats());
+             result["output"] = PoolStatsToDict(
+                 self.output_tensor_allocator.pool()->GetStats());
+             return result;
+           })
+      .def("Stats",
+           [](PipelinedModelRunnerWrapper& self) { return self.GetStats(); });
 }
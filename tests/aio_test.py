@@ -0,0 +1,113 @@
+# Lint as: python3
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+
+import numpy as np
+
+import pycoral.pipeline.pipelined_model_runner as pipeline
+from pycoral.utils import aio
+from pycoral.utils import edgetpu
+from tests import test_utils
+import unittest
+
+
+def model_path():
+  return test_utils.test_data_path('mobilenet_v1_1.0_224_quant_edgetpu.tflite')
+
+
+def random_input(interpreter, seed):
+  size = np.prod(interpreter.get_input_details()[0]['shape'])
+  return np.array(test_utils.generate_random_input(seed, size), dtype=np.uint8)
+
+
+def run(coroutine):
+  return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+def reference_output(interpreter, input_data):
+  edgetpu.run_inference(interpreter, input_data)
+  output_index = interpreter.get_output_details()[0]['index']
+  return np.copy(interpreter.tensor(output_index)())
+
+
+class AioTest(unittest.TestCase):
+
+  @classmethod
+  def setUpClass(cls):
+    super(AioTest, cls).setUpClass()
+    cls.interpreter = edgetpu.make_interpreter(model_path())
+    cls.interpreter.allocate_tensors()
+
+  def test_run_inference(self):
+    input_data = random_input(self.interpreter, 0)
+    expected = reference_output(self.interpreter, input_data)
+    run(aio.run_inference(self.interpreter, random_input(self.interpreter, 1)))
+    run(aio.run_inference(self.interpreter, input_data))
+    output_index = self.interpreter.get_output_details()[0]['index']
+    np.testing.assert_array_equal(
+        self.interpreter.tensor(output_index)(), expected)
+
+  def test_pool_run_inference(self):
+    inputs = [random_input(self.interpreter, seed) for seed in range(4)]
+    expected = [reference_output(self.interpreter, x) for x in inputs]
+
+    async def run_all():
+      async with aio.AsyncInterpreterPool(size=2) as pool:
+        return await asyncio.gather(
+            *[pool.run_inference(model_path(), x) for x in inputs])
+
+    for (output,), expected_output in zip(run(run_all()), expected):
+      np.testing.assert_array_equal(output, expected_output)
+
+  def test_pool_run(self):
+
+    async def run_one():
+      async with aio.AsyncInterpreterPool() as pool:
+        return await pool.run(model_path(), lambda interpreter: interpreter)
+
+    self.assertIsNotNone(run(run_one()))
+
+  def test_pipeline_results(self):
+    segments = [
+        'pipeline/inception_v3_299_quant_segment_0_of_2_edgetpu.tflite',
+        'pipeline/inception_v3_299_quant_segment_1_of_2_edgetpu.tflite',
+    ]
+    interpreters = [
+        edgetpu.make_interpreter(test_utils.test_data_path(segment))
+        for segment in segments
+    ]
+    for interpreter in interpreters:
+      interpreter.allocate_tensors()
+    runner = pipeline.PipelinedModelRunner(interpreters)
+
+    shape = interpreters[0].get_input_details()[0]['shape']
+    num_inputs = 5
+    for _ in range(num_inputs):
+      runner.push({
+          'input': np.random.randint(0, 256, size=shape, dtype=np.uint8)
+      })
+    runner.push({})
+
+    async def pop_all():
+      results = []
+      async for result in aio.PipelineResults(runner):
+        results.append(result)
+      return results
+
+    self.assertEqual(len(run(pop_all())), num_inputs)
+
+
+if __name__ == '__main__':
+  test_utils.coral_test_main()
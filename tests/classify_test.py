@@ -98,6 +98,61 @@ def efficientnet(input_type):
   return 'efficientnet-edgetpu-%s_quant_edgetpu.tflite' % input_type
 
 
+class BatchedClassesTest(unittest.TestCase):
+
+  def setUp(self):
+    super(BatchedClassesTest, self).setUp()
+    self.scores = np.random.RandomState(0).rand(8, 100)
+
+  def test_matches_single(self):
+    ids, scores = classify.get_batched_classes_from_scores(
+        self.scores, top_k=5, score_threshold=0.9)
+    self.assertEqual(ids.shape, (8, 5))
+    self.assertEqual(scores.shape, (8, 5))
+    for row, row_ids, row_scores in zip(self.scores, ids, scores):
+      classes = classify.get_classes_from_scores(
+          row, top_k=5, score_threshold=0.9)
+      self.assertEqual(list(row_ids[:len(classes)]), [c.id for c in classes])
+      self.assertEqual(
+          list(row_scores[:len(classes)]), [c.score for c in classes])
+      self.assertTrue(np.all(row_ids[len(classes):] == -1))
+      self.assertTrue(np.all(row_scores[len(classes):] == -np.inf))
+
+  def test_per_row_threshold(self):
+    thresholds = np.linspace(0.0, 1.0, 8)
+    ids, scores = classify.get_batched_classes_from_scores(
+        self.scores, top_k=10, score_threshold=thresholds)
+    for row_ids, row_scores, threshold in zip(ids, scores, thresholds):
+      kept = row_ids >= 0
+      self.assertTrue(np.all(row_scores[kept] >= threshold))
+    self.assertTrue(np.all(ids[0] >= 0))
+    self.assertTrue(np.all(ids[-1] == -1))
+
+  def test_unsorted(self):
+    ids, scores = classify.get_batched_classes_from_scores(
+        self.scores, top_k=3, sort=False)
+    sorted_ids, _ = classify.get_batched_classes_from_scores(
+        self.scores, top_k=3)
+    np.testing.assert_array_equal(np.sort(ids, axis=1),
+                                  np.sort(sorted_ids, axis=1))
+    np.testing.assert_array_equal(
+        scores, np.take_along_axis(self.scores, ids, axis=1))
+
+  def test_all_classes(self):
+    ids, _ = classify.get_batched_classes_from_scores(self.scores)
+    np.testing.assert_array_equal(ids, np.argsort(-self.scores, axis=1))
+
+  def test_top_k_zero(self):
+    ids, scores = classify.get_batched_classes_from_scores(
+        self.scores, top_k=0)
+    self.assertEqual(ids.shape, (8, 0))
+    self.assertEqual(scores.shape, (8, 0))
+
+  def test_invalid_shape(self):
+    with self.assertRaisesRegex(ValueError, 'Expected scores of shape'):
+      classify.get_batched_classes_from_scores(np.zeros(10))
+
+
 class TestClassify(unittest.TestCase):
 
   @classmethod
@@ -123,6 +178,42 @@ class TestClassify(unittest.TestCase):
     self.assertEqual(index, EGYPTIAN_CAT)
     self.assertGreater(score, 0.7)
 
+  def test_interpreter_view(self):
+    interpreter = edgetpu.make_interpreter(
+        test_utils.test_data_path(mobilenet_v1(1.0, 224)),
+        delegate=self.delegate)
+    interpreter.allocate_tensors()
+    view = common.InterpreterView(interpreter)
+    self.assertEqual(common.input_size(view), common.input_size(interpreter))
+    self.assertEqual(classify.num_classes(view),
+                     classify.num_classes(interpreter))
+
+    common.set_input(view, test_image('cat.bmp', common.input_size(view)))
+    for _ in range(3):
+      view.invoke()
+      classes = classify.get_classes(view, top_k=5)
+      self.assertEqual(classes, classify.get_classes(interpreter, top_k=5))
+      self.assertEqual(classes[0].id, EGYPTIAN_CAT)
+
+  def test_quantized_top_k(self):
+    interpreter = edgetpu.make_interpreter(
+        test_utils.test_data_path(mobilenet_v1(1.0, 224)),
+        delegate=self.delegate)
+    interpreter.allocate_tensors()
+    common.set_input(interpreter,
+                     test_image('cat.bmp', common.input_size(interpreter)))
+    interpreter.invoke()
+    scores = classify.get_scores(interpreter)
+    for top_k in (1, 5, float('inf')):
+      for score_threshold in (-float('inf'), 0.0, 0.1, 2.0):
+        classes = classify.get_classes(interpreter, top_k, score_threshold)
+        expected = classify.get_classes_from_scores(scores, top_k,
+                                                    score_threshold)
+        self.assertEqual([c.score for c in classes],
+                         [c.score for c in expected])
+        for c in classes:
+          self.assertEqual(scores[c.id], c.score)
+
   def test_efficientnet_l(self):
     index, score = classify_image(
         efficientnet('L'), self.delegate, 'cat.bmp',
@@ -13,6 +13,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import numpy as np
 from PIL import Image
 
 import unittest
@@ -103,6 +104,166 @@ class BBoxTest(unittest.TestCase):
         BBox(0, 0, 60, 70))
 
 
+class BBoxArrayTest(unittest.TestCase):
+
+  def test_basic(self):
+    boxes = detect.BBoxArray([[100, 110, 200, 210], [0, 0, 10, 20]])
+    self.assertEqual(len(boxes), 2)
+    self.assertEqual(boxes[0], BBox(100, 110, 200, 210))
+    self.assertEqual(boxes.width.tolist(), [100, 10])
+    self.assertEqual(boxes.height.tolist(), [100, 20])
+    self.assertEqual(boxes.area.tolist(), [10000, 200])
+    self.assertEqual(boxes.valid.tolist(), [True, True])
+    self.assertEqual(
+        detect.BBoxArray([[10, 10, 0, 0]]).valid.tolist(), [False])
+
+  def test_invalid_shape(self):
+    with self.assertRaisesRegex(ValueError, 'Expected boxes of shape'):
+      detect.BBoxArray([1, 2, 3])
+
+  def test_bboxes_round_trip(self):
+    bboxes = [BBox(1, 2, 3, 4), BBox(5, 6, 7, 8)]
+    self.assertEqual(detect.BBoxArray.from_bboxes(bboxes).to_bboxes(), bboxes)
+    self.assertEqual(len(detect.BBoxArray.from_bboxes([])), 0)
+
+  def test_scale(self):
+    self.assertEqual(
+        detect.BBoxArray([[1, 1, 10, 20]]).scale(3, 4).to_bboxes(),
+        [BBox(3, 4, 30, 80)])
+
+  def test_translate(self):
+    self.assertEqual(
+        detect.BBoxArray([[1, 1, 10, 20]]).translate(10, 20).to_bboxes(),
+        [BBox(11, 21, 20, 40)])
+
+  def test_clip(self):
+    boxes = detect.BBoxArray([[-5, 10, 50, 200], [300, 300, 400, 400]])
+    self.assertEqual(
+        boxes.clip(BBox(0, 0, 100, 100)).to_bboxes(),
+        [BBox(0, 10, 50, 100), BBox(100, 100, 100, 100)])
+
+  def test_astype(self):
+    boxes = detect.BBoxArray([[1.9, 2.9, 3.9, 4.9]]).astype(int)
+    self.assertEqual(boxes.to_bboxes(), [BBox(1, 2, 3, 4)])
+
+  def test_iou(self):
+    a = [BBox(0, 0, 200, 200), BBox(0, 0, 10, 20)]
+    b = [BBox(100, 100, 300, 300), BBox(20, 30, 25, 35), BBox(0, 0, 200, 200)]
+    iou = detect.BBoxArray.iou(
+        detect.BBoxArray.from_bboxes(a), detect.BBoxArray.from_bboxes(b))
+    self.assertEqual(iou.shape, (2, 3))
+    for i, box_a in enumerate(a):
+      for j, box_b in enumerate(b):
+        self.assertAlmostEqual(iou[i, j], BBox.iou(box_a, box_b))
+
+  def test_intersection(self):
+    a = detect.BBoxArray([[0, 0, 200, 200]])
+    b = detect.BBoxArray([[100, 100, 300, 300], [300, 300, 400, 400]])
+    self.assertEqual(
+        detect.BBoxArray.intersection(a, b).tolist(), [[10000, 0]])
+
+  def test_iou_empty(self):
+    a = detect.BBoxArray([[0, 0, 200, 200]])
+    self.assertEqual(
+        detect.BBoxArray.iou(a, detect.BBoxArray([])).shape, (1, 0))
+
+
+class DetectionsTest(unittest.TestCase):
+
+  def test_to_objects(self):
+    detections = detect.Detections(
+        ids=np.array([3, 7]),
+        scores=np.array([0.9, 0.5], dtype=np.float32),
+        boxes=np.array([[10, 20, 30, 40], [0, 0, 5, 5]]))
+    objs = detections.to_objects()
+    self.assertEqual(len(objs), 2)
+    self.assertEqual(objs[0].id, 3)
+    self.assertAlmostEqual(objs[0].score, 0.9, places=6)
+    self.assertEqual(objs[0].bbox, BBox(10, 20, 30, 40))
+    self.assertEqual(objs[1].bbox, BBox(0, 0, 5, 5))
+
+  def test_to_objects_empty(self):
+    detections = detect.Detections(
+        ids=np.zeros(0, dtype=int),
+        scores=np.zeros(0, dtype=np.float32),
+        boxes=np.zeros((0, 4), dtype=int))
+    self.assertEqual(detections.to_objects(), [])
+
+
+class NmsTest(unittest.TestCase):
+
+  def setUp(self):
+    super(NmsTest, self).setUp()
+    # IoU(0, 1) = IoU(0, 3) = 0.81, IoU(1, 3) = 0.65, box 2 overlaps none.
+    self.boxes = np.array([[0, 0, 100, 100], [0, 0, 90, 90],
+                           [200, 200, 300, 300], [10, 10, 100, 100]])
+    self.scores = np.array([0.9, 0.8, 0.7, 0.95])
+
+  def test_nms(self):
+    self.assertEqual(
+        detect.nms(self.boxes, self.scores, 0.5).tolist(), [3, 2])
+    self.assertEqual(
+        detect.nms(self.boxes, self.scores, 0.7).tolist(), [3, 1, 2])
+    self.assertEqual(
+        detect.nms(self.boxes, self.scores, 1.0).tolist(), [3, 0, 1, 2])
+
+  def test_nms_top_k(self):
+    self.assertEqual(
+        detect.nms(self.boxes, self.scores, 1.0, top_k=2).tolist(), [3, 0])
+
+  def test_nms_bbox_array(self):
+    self.assertEqual(
+        detect.nms(detect.BBoxArray(self.boxes), self.scores, 0.5).tolist(),
+        [3, 2])
+
+  def test_nms_empty(self):
+    self.assertEqual(len(detect.nms(np.zeros((0, 4)), [], 0.5)), 0)
+    self.assertEqual(len(detect.batched_nms(np.zeros((0, 4)), [], [], 0.5)), 0)
+
+  def test_nms_matches_bbox_iou(self):
+    np.random.seed(12345)
+    xy = np.random.rand(300, 2) * 500
+    boxes = np.concatenate([xy, xy + np.random.rand(300, 2) * 100 + 1], 1)
+    scores = np.random.rand(300)
+    keep = detect.nms(boxes, scores, 0.3)
+    bboxes = detect.BBoxArray(boxes).to_bboxes()
+    # No two selected boxes overlap more than the threshold.
+    for i in keep:
+      for j in keep:
+        if i != j:
+          self.assertLessEqual(BBox.iou(bboxes[i], bboxes[j]), 0.3)
+    # Every rejected box overlaps a higher-scored selected box.
+    for i in set(range(300)) - set(keep):
+      self.assertTrue(
+          any(scores[j] >= scores[i] and BBox.iou(bboxes[i], bboxes[j]) > 0.3
+              for j in keep))
+
+  def test_batched_nms(self):
+    class_ids = np.array([1, 2, 1, 1])
+    self.assertEqual(
+        detect.batched_nms(self.boxes, self.scores, class_ids, 0.5).tolist(),
+        [3, 1, 2])
+
+  def test_soft_nms_linear(self):
+    keep, scores = detect.soft_nms(
+        self.boxes, self.scores, iou_threshold=0.5, method='linear')
+    self.assertEqual(keep.tolist(), [3, 2, 1, 0])
+    self.assertAlmostEqual(scores[0], 0.95)
+    self.assertAlmostEqual(scores[1], 0.7)
+    self.assertAlmostEqual(scores[2], 0.8 * (1 - 6400 / 9800))
+    self.assertAlmostEqual(scores[3], 0.9 * (1 - 0.81) * (1 - 0.81))
+
+  def test_soft_nms_gaussian(self):
+    keep, scores = detect.soft_nms(
+        self.boxes, self.scores, sigma=0.5, score_threshold=0.5)
+    self.assertEqual(keep.tolist(), [3, 2])
+    self.assertEqual(scores.tolist(), [0.95, 0.7])
+
+  def test_soft_nms_invalid_method(self):
+    with self.assertRaisesRegex(ValueError, 'Unsupported soft-NMS method'):
+      detect.soft_nms(self.boxes, self.scores, method='foo')
+
+
 class DetectTest(unittest.TestCase):
 
   @classmethod
@@ -159,6 +320,64 @@ class DetectTest(unittest.TestCase):
     self.assert_bbox_almost_equal(obj.bbox,
                                   BBox(xmin=43, ymin=35, xmax=358, ymax=333))
 
+  def test_interpreter_view(self):
+    interpreter = edgetpu.make_interpreter(
+        test_utils.test_data_path(tf2_coco_model(version=2)),
+        delegate=self.delegate)
+    interpreter.allocate_tensors()
+    view = common.InterpreterView(interpreter)
+    image = Image.open(test_utils.test_data_path('cat.bmp'))
+    _, scale = common.set_resized_input(
+        view, image.size, lambda size: image.resize(size, Image.LANCZOS))
+    view.invoke()
+    objs = detect.get_objects(view, score_threshold=0.0, image_scale=scale)
+    self.assertEqual(
+        objs,
+        detect.get_objects(interpreter, score_threshold=0.0, image_scale=scale))
+    self.assertEqual(objs[0].id, CAT)
+
+  def test_get_detections(self):
+    interpreter = edgetpu.make_interpreter(
+        test_utils.test_data_path(tf1_coco_model(version=2)),
+        delegate=self.delegate)
+    interpreter.allocate_tensors()
+    image = Image.open(test_utils.test_data_path('cat.bmp'))
+    _, scale = common.set_resized_input(
+        interpreter, image.size,
+        lambda size: image.resize(size, Image.LANCZOS))
+    interpreter.invoke()
+    detections = detect.get_detections(
+        interpreter, score_threshold=0.5, image_scale=scale)
+    self.assertGreater(len(detections.ids), 0)
+    self.assertEqual(detections.scores.shape, detections.ids.shape)
+    self.assertEqual(detections.boxes.shape, (len(detections.ids), 4))
+    self.assertEqual(detections.ids[0], CAT)
+    self.assertGreater(detections.scores[0], 0.9)
+    self.assert_bbox_almost_equal(
+        BBox(*detections.boxes[0]), BBox(xmin=43, ymin=35, xmax=358, ymax=333))
+    self.assertTrue(np.all(detections.scores >= 0.5))
+    self.assertTrue(np.all(np.diff(detections.scores) <= 0))
+
+    all_detections = detect.get_detections(interpreter, image_scale=scale)
+    self.assertGreaterEqual(len(all_detections.ids), len(detections.ids))
+    np.testing.assert_array_equal(all_detections.ids[:len(detections.ids)],
+                                  detections.ids)
+
+  def test_output_layout(self):
+    for model in (tf1_coco_model(version=2), tf2_coco_model(version=2)):
+      interpreter = edgetpu.make_interpreter(
+          test_utils.test_data_path(model), delegate=self.delegate)
+      interpreter.allocate_tensors()
+      layout = detect.get_output_layout(interpreter)
+      self.assertIs(layout, detect.get_output_layout(interpreter))
+      interpreter.invoke()
+      boxes, class_ids, scores = layout.tensors()
+      self.assertEqual(boxes.shape, (len(scores), 4))
+      self.assertEqual(class_ids.shape, scores.shape)
+      self.assertEqual(
+          detect.DetectionOutputLayout(interpreter).tensors()[0].shape,
+          boxes.shape)
+
   def test_fine_tuned(self):
     objs = get_objects(fine_tuned_model(), self.delegate, 'cat.bmp')
     self.assertGreater(len(objs), 0)
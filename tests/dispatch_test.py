@@ -0,0 +1,204 @@
+# Lint as: python3
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import threading
+
+import numpy as np
+import tflite_runtime.interpreter as tflite
+
+import unittest
+from pycoral.adapters import classify
+from pycoral.utils import dispatch
+from tests import test_utils
+
+CPU_DEVICES = ['cpu:0', 'cpu:1', 'cpu:2']
+
+
+def cpu_model_path():
+  return test_utils.test_data_path('mobilenet_v1_1.0_224_quant.tflite')
+
+
+def make_cpu_interpreter(model_path, device):
+  del device  # All CPU interpreters are the same.
+  return tflite.Interpreter(model_path=model_path)
+
+
+def random_input(seed):
+  return np.array(
+      test_utils.generate_random_input(seed, 224 * 224 * 3), dtype=np.uint8)
+
+
+def make_runner():
+  return dispatch.MultiDeviceRunner(cpu_model_path(), CPU_DEVICES,
+                                    make_cpu_interpreter)
+
+
+class MultiDeviceRunnerTest(unittest.TestCase):
+
+  def test_no_devices(self):
+    with self.assertRaisesRegex(ValueError, 'At least one device expected'):
+      dispatch.MultiDeviceRunner(cpu_model_path(), [], make_cpu_interpreter)
+
+  def test_results(self):
+    inputs = [random_input(seed) for seed in range(6)]
+    interpreter = make_cpu_interpreter(cpu_model_path(), None)
+    interpreter.allocate_tensors()
+    with make_runner() as runner:
+      self.assertEqual(runner.devices, CPU_DEVICES)
+      futures = [runner.submit(x) for x in inputs]
+      for x, future in zip(inputs, futures):
+        interpreter.tensor(interpreter.get_input_details()[0]['index'])()[
+            ...] = x.reshape(1, 224, 224, 3)
+        interpreter.invoke()
+        output = interpreter.get_output_details()[0]
+        result = future.result()
+        np.testing.assert_array_equal(
+            result[output['name']], interpreter.get_tensor(output['index']))
+
+  def test_postprocess(self):
+    with make_runner() as runner:
+      future = runner.submit(
+          random_input(1),
+          postprocess=lambda interpreter: classify.get_classes(interpreter, 1))
+      self.assertEqual(len(future.result()), 1)
+
+  def test_error(self):
+    with make_runner() as runner:
+      future = runner.submit(np.zeros(10, dtype=np.uint8))
+      self.assertIsInstance(future.exception(), ValueError)
+
+  def test_stats(self):
+    with make_runner() as runner:
+      futures = [runner.submit(random_input(i)) for i in range(12)]
+      for future in futures:
+        future.result()
+      stats = runner.stats()
+    self.assertEqual([s.device for s in stats], CPU_DEVICES)
+    self.assertEqual(sum(s.completed for s in stats), 12)
+    for s in stats:
+      self.assertEqual(s.queue_depth, 0)
+      self.assertGreaterEqual(s.busy_time, 0)
+
+  def test_least_busy(self):
+    release = threading.Event()
+    with make_runner() as runner:
+      # Each blocked request keeps its device busy, so each new request goes
+      # to another device.
+      futures = [
+          runner.submit(random_input(i), postprocess=lambda _: release.wait())
+          for i in range(len(CPU_DEVICES))
+      ]
+      self.assertEqual([s.queue_depth for s in runner.stats()],
+                       [1] * len(CPU_DEVICES))
+      release.set()
+      for future in futures:
+        future.result()
+      self.assertEqual([s.completed for s in runner.stats()],
+                       [1] * len(CPU_DEVICES))
+
+  def test_cpu_devices(self):
+    with dispatch.MultiDeviceRunner(cpu_model_path(), ['cpu', 'cpu']) as runner:
+      futures = [runner.submit(random_input(i)) for i in range(4)]
+      for future in futures:
+        self.assertEqual(len(future.result()), 1)
+      self.assertEqual(sum(s.completed for s in runner.stats()), 4)
+
+  def test_submit_after_close(self):
+    runner = make_runner()
+    runner.close()
+    with self.assertRaisesRegex(RuntimeError, 'closed'):
+      runner.submit(np.zeros(224 * 224 * 3, dtype=np.uint8))
+
+
+class ModelSchedulerTest(unittest.TestCase):
+
+  def make_scheduler(self, **kwargs):
+    models = {'a': cpu_model_path(), 'b': cpu_model_path()}
+    return dispatch.ModelScheduler(
+        models, interpreter_factory=make_cpu_interpreter, **kwargs)
+
+  def test_unknown_model(self):
+    with self.make_scheduler() as scheduler:
+      with self.assertRaisesRegex(ValueError, 'Unknown model'):
+        scheduler.submit('c', random_input(0))
+
+  def test_results(self):
+    with self.make_scheduler() as scheduler:
+      futures = [
+          scheduler.submit('ab'[i % 2], random_input(i)) for i in range(6)
+      ]
+      for future in futures:
+        self.assertEqual(len(future.result()), 1)
+      stats = scheduler.stats()
+    self.assertEqual(stats.models['a'].completed, 3)
+    self.assertEqual(stats.models['b'].completed, 3)
+    self.assertGreater(stats.models['a'].max_latency, 0)
+
+  def test_groups_by_model(self):
+    release = threading.Event()
+    with self.make_scheduler(max_batch_size=None,
+                             max_wait=None) as scheduler:
+      # Keep the device busy while alternating requests queue up.
+      blocker = scheduler.submit(
+          'a', random_input(0), postprocess=lambda _: release.wait())
+      futures = [
+          scheduler.submit('ab'[i % 2], random_input(i)) for i in range(10)
+      ]
+      release.set()
+      for future in [blocker] + futures:
+        future.result()
+      stats = scheduler.stats()
+    # All 'a' requests run first, then all 'b' requests.
+    self.assertEqual(stats.switches, 1)
+    self.assertEqual(stats.runs, 2)
+
+  def test_max_batch_size(self):
+    release = threading.Event()
+    with self.make_scheduler(max_batch_size=2, max_wait=None) as scheduler:
+      blocker = scheduler.submit(
+          'a', random_input(0), postprocess=lambda _: release.wait())
+      futures = [
+          scheduler.submit('ab'[i % 2], random_input(i)) for i in range(8)
+      ]
+      release.set()
+      for future in [blocker] + futures:
+        future.result()
+      stats = scheduler.stats()
+    # a a | b b | a a | b b | a
+    self.assertEqual(stats.switches, 4)
+
+  def test_linger(self):
+    x = random_input(0)
+    order = []
+
+    def submit(model):
+      return scheduler.submit(
+          model, x, postprocess=lambda _: order.append(model))
+
+    # The linger is long enough to only end when a request arrives.
+    with self.make_scheduler(max_batch_size=4, max_wait=None,
+                             linger=60) as scheduler:
+      submit('a').result()
+      b = submit('b')
+      # Each 'a' request arrives while 'b' waits and the device is idle.
+      for _ in range(3):
+        submit('a').result()
+      b.result()
+      stats = scheduler.stats()
+    self.assertEqual(order, ['a'] * 4 + ['b'])
+    self.assertEqual(stats.switches, 1)
+
+
+if __name__ == '__main__':
+  test_utils.coral_test_main()
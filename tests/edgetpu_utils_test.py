@@ -16,8 +16,12 @@
 import ctypes
 import ctypes.util
 import io
+import mmap
+import subprocess
+import sys
 
 import numpy as np
+from PIL import Image
 
 from pycoral.utils import edgetpu
 from tests import test_utils
@@ -106,6 +110,23 @@ class TestEdgeTpuUtils(unittest.TestCase):
     with self.assertRaisesRegex(ValueError, 'Failed to load delegate'):
       edgetpu.make_interpreter(self._default_test_model_path(), device='foo')
 
+  def test_load_on_cpu(self):
+    interpreter = edgetpu.make_interpreter(
+        test_utils.test_data_path('mobilenet_v1_1.0_224_quant.tflite'),
+        device='cpu',
+        num_threads=2)
+    interpreter.allocate_tensors()
+    input_data = test_utils.generate_random_input(1, 224 * 224 * 3)
+    edgetpu.run_inference(interpreter, np.asarray(input_data, dtype=np.uint8))
+
+  def test_load_on_cpu_without_xnnpack(self):
+    interpreter = edgetpu.make_interpreter(
+        test_utils.test_data_path('mobilenet_v1_1.0_224_quant.tflite'),
+        device='cpu',
+        use_xnnpack=False)
+    interpreter.allocate_tensors()
+    interpreter.invoke()
+
   def _run_inference_with_different_input_types(self, interpreter, input_data):
     """Tests inference with different input types.
 
@@ -157,6 +178,113 @@ class TestEdgeTpuUtils(unittest.TestCase):
     input_data = test_utils.generate_random_input(1, input_size)
     self._run_inference_with_different_input_types(interpreter, input_data)
 
+  def test_inference_handle(self):
+    interpreter = edgetpu.make_interpreter(
+        self._default_test_model_path(), delegate=self.delegate)
+    interpreter.allocate_tensors()
+    handle = edgetpu.InferenceHandle(interpreter)
+    self.assertIs(handle.interpreter, interpreter)
+    input_size = required_input_array_size(interpreter)
+    self.assertEqual(handle.expected_input_size, input_size)
+    input_data = test_utils.generate_random_input(1, input_size)
+    output_index = interpreter.get_output_details()[0]['index']
+    edgetpu.run_inference(interpreter, np.asarray(input_data, np.uint8))
+    expected = np.copy(interpreter.tensor(output_index)())
+    for data in (np.asarray(input_data, np.uint8), bytes(input_data)):
+      handle.run(data)
+      self.assertTrue(
+          np.array_equal(expected, interpreter.tensor(output_index)()))
+      # run_inference also accepts the handle in place of the interpreter.
+      edgetpu.run_inference(handle, data)
+      self.assertTrue(
+          np.array_equal(expected, interpreter.tensor(output_index)()))
+
+  def test_inference_handle_unsupported_type(self):
+    interpreter = edgetpu.make_interpreter(
+        self._default_test_model_path(), delegate=self.delegate)
+    interpreter.allocate_tensors()
+    handle = edgetpu.InferenceHandle(interpreter)
+    with self.assertRaisesRegex(TypeError, 'not supported'):
+      handle.run([0] * handle.expected_input_size)
+
+  def test_run_inference_with_buffer_protocol(self):
+    interpreter = edgetpu.make_interpreter(
+        self._default_test_model_path(), delegate=self.delegate)
+    interpreter.allocate_tensors()
+    input_size = required_input_array_size(interpreter)
+    np_input = np.asarray(
+        test_utils.generate_random_input(1, input_size), np.uint8)
+    output_index = interpreter.get_output_details()[0]['index']
+    edgetpu.run_inference(interpreter, np_input)
+    expected = np.copy(interpreter.tensor(output_index)())
+
+    shared = mmap.mmap(-1, input_size)
+    shared[:] = np_input.tobytes()
+    for input_data in (bytearray(np_input.tobytes()), memoryview(np_input),
+                       shared, np_input.reshape(224, 224, 3),
+                       Image.fromarray(np_input.reshape(224, 224, 3))):
+      edgetpu.run_inference(interpreter, input_data)
+      self.assertTrue(
+          np.array_equal(expected, interpreter.tensor(output_index)()))
+
+  def test_run_inference_non_contiguous(self):
+    interpreter = edgetpu.make_interpreter(
+        self._default_test_model_path(), delegate=self.delegate)
+    interpreter.allocate_tensors()
+    input_size = required_input_array_size(interpreter)
+    np_input = np.asarray(
+        test_utils.generate_random_input(1, 2 * input_size), np.uint8)
+    output_index = interpreter.get_output_details()[0]['index']
+    edgetpu.run_inference(interpreter, np.copy(np_input[::2]))
+    expected = np.copy(interpreter.tensor(output_index)())
+
+    handle = edgetpu.InferenceHandle(interpreter)
+    with self.assertRaisesRegex(ValueError, 'must be C-contiguous'):
+      handle.run(np_input[::2])
+    handle.run(np_input[::2], allow_copy=True)
+    self.assertEqual(handle.copy_count, 1)
+    self.assertTrue(np.array_equal(expected, interpreter.tensor(output_index)()))
+
+  def test_run_inference_non_uint8(self):
+    interpreter = edgetpu.make_interpreter(
+        self._default_test_model_path(), delegate=self.delegate)
+    interpreter.allocate_tensors()
+    input_size = required_input_array_size(interpreter)
+    with self.assertRaisesRegex(ValueError, 'must be uint8'):
+      edgetpu.run_inference(interpreter, np.zeros(input_size, np.float32))
+
+  def test_run_inference_batch(self):
+    interpreter = edgetpu.make_interpreter(
+        self._default_test_model_path(), delegate=self.delegate)
+    interpreter.allocate_tensors()
+    input_size = required_input_array_size(interpreter)
+    inputs = np.array(
+        [test_utils.generate_random_input(seed, input_size)
+         for seed in range(4)], dtype=np.uint8)
+    output_index = interpreter.get_output_details()[0]['index']
+    expected = []
+    for input_data in inputs:
+      edgetpu.run_inference(interpreter, input_data)
+      expected.append(np.copy(interpreter.tensor(output_index)()[0]))
+
+    outputs, = edgetpu.run_inference_batch(interpreter, inputs)
+    self.assertTrue(np.array_equal(outputs, expected))
+
+    outputs_out = [np.zeros_like(outputs)]
+    result = edgetpu.run_inference_batch(interpreter, list(inputs),
+                                         outputs_out)
+    self.assertIs(result, outputs_out)
+    self.assertTrue(np.array_equal(outputs_out[0], expected))
+
+  def test_run_inference_batch_invalid_outputs(self):
+    interpreter = edgetpu.make_interpreter(
+        self._default_test_model_path(), delegate=self.delegate)
+    interpreter.allocate_tensors()
+    inputs = np.zeros((2, required_input_array_size(interpreter)), np.uint8)
+    with self.assertRaisesRegex(ValueError, 'Output array'):
+      edgetpu.run_inference_batch(interpreter, inputs,
+                                  [np.zeros((2, 1001), np.float32)])
+
   def test_run_inference_larger_input_size(self):
     interpreter = edgetpu.make_interpreter(
         self._default_test_model_path(), delegate=self.delegate)
@@ -211,6 +339,15 @@ class TestEdgeTpuUtils(unittest.TestCase):
       edgetpu.invoke_with_membuffer(interpreter._native_handle(),
                                     np_input.ctypes.data, input_size)
 
+  def test_lazy_imports(self):
+    script = ('import sys\n'
+              'from pycoral.adapters import classify, common, detect\n'
+              'from pycoral.utils import dispatch, edgetpu, pool\n'
+              'print("gi" in sys.modules, '
+              '"pycoral.pybind._pywrap_coral" in sys.modules)\n')
+    output = subprocess.check_output([sys.executable, '-c', script])
+    self.assertEqual(output.split(), [b'False', b'False'])
+
   def test_list_edge_tpu_paths(self):
     self.assertGreater(len(edgetpu.list_edge_tpus()), 0)
 
@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import sys
 import threading
 import time
 
@@ -152,6 +153,193 @@ class PipelinedModelRunnerTest(unittest.TestCase):
       self.runner.push(self.input_tensors)
     self.assertIsNone(self.runner.pop())
 
+  def test_push_without_copy(self):
+    self._prepare_pipeline_inference(self._MODEL_SEGMENTS, self._REF_MODEL)
+    input_tensor = self.input_tensors['input']
+    refcount = sys.getrefcount(input_tensor)
+    self.runner.push(self.input_tensors, copy=False)
+    self.assertGreater(sys.getrefcount(input_tensor), refcount)
+    np.testing.assert_equal(self.runner.pop(), self.ref_result)
+    # The reference to the consumed input is dropped by the next call.
+    self.runner.push({})
+    self.assertEqual(sys.getrefcount(input_tensor), refcount)
+    self.assertIsNone(self.runner.pop())
+
+  def test_push_non_contiguous_without_copy(self):
+    self._prepare_pipeline_inference(self._MODEL_SEGMENTS)
+    input_tensor = np.asfortranarray(self.input_tensors['input'][0])
+    with self.assertRaisesRegex(ValueError, 'must be C-contiguous'):
+      self.runner.push({'input': input_tensor}, copy=False)
+
+  def test_pop_into(self):
+    self._prepare_pipeline_inference(self._MODEL_SEGMENTS, self._REF_MODEL)
+    outputs = {k: np.zeros_like(v) for k, v in self.ref_result.items()}
+    self.runner.push(self.input_tensors)
+    self.assertTrue(self.runner.pop_into(outputs))
+    np.testing.assert_equal(outputs, self.ref_result)
+    self.runner.push({})
+    self.assertFalse(self.runner.pop_into(outputs))
+
+  def test_pop_into_invalid_output(self):
+    self._prepare_pipeline_inference(self._MODEL_SEGMENTS, self._REF_MODEL)
+    outputs = {
+        k: np.zeros(10, dtype=v.dtype) for k, v in self.ref_result.items()
+    }
+    with self.assertRaisesRegex(ValueError, 'should be a numpy array of shape'):
+      self.runner.pop_into(outputs)
+    with self.assertRaisesRegex(ValueError, 'Expected outputs'):
+      self.runner.pop_into({})
+
+  def test_pop_into_read_only_output(self):
+    self._prepare_pipeline_inference(self._MODEL_SEGMENTS, self._REF_MODEL)
+    outputs = {k: np.zeros_like(v) for k, v in self.ref_result.items()}
+    read_only = {k: np.zeros_like(v) for k, v in self.ref_result.items()}
+    for tensor in read_only.values():
+      tensor.flags.writeable = False
+    self.runner.push(self.input_tensors)
+    with self.assertRaisesRegex(ValueError, 'writable'):
+      self.runner.pop_into(read_only)
+    # The native call checks the outputs too, before taking a result.
+    with self.assertRaisesRegex(ValueError, 'writable buffer'):
+      self.runner._runner.PopInto(read_only)  # pylint: disable=protected-access
+    # The result is still there, and its buffer goes back to the pool.
+    self.assertTrue(self.runner.pop_into(outputs))
+    np.testing.assert_equal(outputs, self.ref_result)
+    self.assertEqual(self.runner.pool_stats()['output'],
+                     pipeline.PoolStats(hits=0, misses=1, idle=1))
+
+  def test_pool_stats(self):
+    self._prepare_pipeline_inference(self._MODEL_SEGMENTS)
+    for _ in range(2):
+      self.runner.push(self.input_tensors)
+      result = self.runner.pop()
+      del result  # Gives the output buffer back to the pool.
+    stats = self.runner.pool_stats()
+    self.assertEqual(stats['input'],
+                     pipeline.PoolStats(hits=1, misses=1, idle=1))
+    self.assertEqual(stats['output'],
+                     pipeline.PoolStats(hits=1, misses=1, idle=1))
+
+  def test_pop_timeout(self):
+    self._prepare_pipeline_inference(self._MODEL_SEGMENTS)
+    with self.assertRaises(TimeoutError):
+      self.runner.pop(timeout=0.01)
+    self.assertIsNone(self.runner.try_pop())
+    self.assertEqual(self.runner.pop_many(4, timeout=0.01), [])
+
+  def test_pop_many(self):
+    self._prepare_pipeline_inference(self._MODEL_SEGMENTS, self._REF_MODEL)
+    num_requests = 5
+    for _ in range(num_requests):
+      self.runner.push(self.input_tensors)
+    self.runner.push({})
+    results = []
+    while True:
+      popped = self.runner.pop_many(3)
+      if popped is None:
+        break
+      self.assertLessEqual(len(popped), 3)
+      results.extend(popped)
+    self.assertEqual(len(results), num_requests)
+    for result in results:
+      np.testing.assert_equal(result, self.ref_result)
+    self.assertIsNone(self.runner.try_pop())
+
+  def test_submit(self):
+    self._prepare_pipeline_inference(self._MODEL_SEGMENTS, self._REF_MODEL)
+    futures = []
+    lock = threading.Lock()
+
+    def producer(camera_id):
+      for frame in range(3):
+        future = self.runner.submit(self.input_tensors, tag=(camera_id, frame))
+        with lock:
+          futures.append((future, (camera_id, frame)))
+
+    threads = [threading.Thread(target=producer, args=(i,)) for i in range(3)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    self.runner.close()
+
+    self.assertEqual(len(futures), 9)
+    for future, tag in futures:
+      result = future.result()
+      self.assertEqual(result.tag, tag)
+      self.assertGreater(result.latency, 0)
+      np.testing.assert_equal(result.outputs, self.ref_result)
+
+  def test_pop_after_submit(self):
+    self._prepare_pipeline_inference(self._MODEL_SEGMENTS)
+    future = self.runner.submit(self.input_tensors)
+    with self.assertRaisesRegex(RuntimeError, 'through their futures'):
+      self.runner.pop()
+    with self.assertRaisesRegex(RuntimeError, 'through their futures'):
+      self.runner.push(self.input_tensors)
+    self.runner.close()
+    self.assertIsNone(future.result().tag)
+    with self.assertRaisesRegex(RuntimeError, 'Pipeline was turned off'):
+      self.runner.submit(self.input_tensors)
+
+  def test_stats(self):
+    self._prepare_pipeline_inference(self._MODEL_SEGMENTS)
+    snapshots = []
+    reported = threading.Event()
+
+    def callback(stats):
+      snapshots.append(stats)
+      reported.set()
+
+    self.runner.set_stats_callback(callback, interval=0.01)
+    num_requests = 5
+    for _ in range(num_requests):
+      self.runner.push(self.input_tensors)
+    for _ in range(num_requests):
+      self.runner.pop()
+
+    stats = self.runner.stats()
+    self.assertEqual(len(stats.segments), len(self._MODEL_SEGMENTS))
+    for segment in stats.segments:
+      self.assertEqual(segment.count, num_requests)
+      self.assertEqual(segment.queue_size, 0)
+      self.assertGreater(segment.busy_time, 0)
+    self.assertEqual(stats.pushes, num_requests)
+    self.assertEqual(stats.pops, num_requests)
+    self.assertEqual(stats.input_queue_size, 0)
+    self.assertEqual(stats.output_queue_size, 0)
+    self.assertEqual(stats.blocked_pushes, 0)
+
+    self.assertTrue(reported.wait(5))
+    self.runner.set_stats_callback(None)
+    self.assertIsInstance(snapshots[0], pipeline.PipelineStats)
+
+  def test_submit_after_push(self):
+    self._prepare_pipeline_inference(self._MODEL_SEGMENTS, self._REF_MODEL)
+    self.runner.push(self.input_tensors)
+    with self.assertRaisesRegex(RuntimeError, '1 results of push'):
+      self.runner.submit(self.input_tensors, tag='submitted')
+    np.testing.assert_equal(self.runner.pop(), self.ref_result)
+    future = self.runner.submit(self.input_tensors, tag='submitted')
+    self.runner.close()
+    result = future.result()
+    self.assertEqual(result.tag, 'submitted')
+    np.testing.assert_equal(result.outputs, self.ref_result)
+
+  def test_blocked_pushes(self):
+    self._prepare_pipeline_inference(self._MODEL_SEGMENTS)
+    self.runner.set_input_queue_size(1)
+    num_requests = 5
+    for _ in range(num_requests):
+      self.runner.push(self.input_tensors)
+    for _ in range(num_requests):
+      self.runner.pop()
+    stats = self.runner.stats()
+    # The pushes after the first ones wait for the first segment.
+    self.assertGreater(stats.blocked_pushes, 0)
+    self.assertLess(stats.blocked_pushes, num_requests)
+    self.assertGreater(stats.push_time, 0)
+
   def test_producer_and_consumer_threads(self):
     self._prepare_pipeline_inference(self._MODEL_SEGMENTS, self._REF_MODEL)
     num_requests = 5
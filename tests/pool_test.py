@@ -0,0 +1,81 @@
+# Lint as: python3
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import concurrent.futures
+import threading
+
+import unittest
+from pycoral.utils import pool
+from tests import test_utils
+
+
+def model_path():
+  return test_utils.test_data_path('mobilenet_v1_1.0_224_quant_edgetpu.tflite')
+
+
+class InterpreterPoolTest(unittest.TestCase):
+
+  def test_invalid_size(self):
+    with self.assertRaisesRegex(ValueError, 'Pool size must be at least 1'):
+      pool.InterpreterPool(size=0)
+
+  def test_delegate_cached(self):
+    with pool.InterpreterPool() as interpreter_pool:
+      self.assertIs(interpreter_pool.delegate(), interpreter_pool.delegate())
+
+  def test_interpreter_reused(self):
+    with pool.InterpreterPool() as interpreter_pool:
+      with interpreter_pool.interpreter(model_path()) as interpreter:
+        first = interpreter
+        interpreter.invoke()
+      with interpreter_pool.interpreter(model_path()) as interpreter:
+        self.assertIs(interpreter, first)
+
+  def test_timeout(self):
+    with pool.InterpreterPool(size=1) as interpreter_pool:
+      with interpreter_pool.interpreter(model_path()):
+        with self.assertRaises(TimeoutError):
+          with interpreter_pool.interpreter(model_path(), timeout=0.01):
+            pass
+
+  def test_cpu_device(self):
+    cpu_model = test_utils.test_data_path('mobilenet_v1_1.0_224_quant.tflite')
+    with pool.InterpreterPool() as interpreter_pool:
+      self.assertIsNone(interpreter_pool.delegate('cpu'))
+      with interpreter_pool.interpreter(cpu_model, 'cpu') as interpreter:
+        interpreter.invoke()
+
+  def test_threads(self):
+    with pool.InterpreterPool(size=2) as interpreter_pool:
+      interpreter_pool.preload(model_path())
+      lock = threading.Lock()
+      in_use = set()
+
+      def job():
+        with interpreter_pool.interpreter(model_path()) as interpreter:
+          with lock:
+            self.assertNotIn(id(interpreter), in_use)
+            in_use.add(id(interpreter))
+          interpreter.invoke()
+          with lock:
+            in_use.remove(id(interpreter))
+          return id(interpreter)
+
+      with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        used = set(executor.map(lambda _: job(), range(20)))
+      self.assertLessEqual(len(used), 2)
+
+
+if __name__ == '__main__':
+  test_utils.coral_test_main()
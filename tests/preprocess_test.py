@@ -0,0 +1,131 @@
+# Lint as: python3
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import numpy as np
+
+import unittest
+from pycoral.adapters import preprocess
+from tests import test_utils
+
+
+def random_image(width, height):
+  return np.random.RandomState(0).randint(
+      0, 256, size=(height, width, 3)).astype(np.uint8)
+
+
+class MakeLutTest(unittest.TestCase):
+
+  def test_quantized(self):
+    lut = preprocess.make_lut((1 / 128, 128), mean=127.5, std=127.5)
+    self.assertEqual(lut.dtype, np.uint8)
+    np.testing.assert_array_equal(lut[[0, 255]], [0, 255])
+
+  def test_int8(self):
+    lut = preprocess.make_lut((1 / 128, 0), mean=127.5, std=127.5,
+                              dtype=np.int8)
+    np.testing.assert_array_equal(lut[[0, 255]], [-128, 127])
+
+  def test_float(self):
+    lut = preprocess.make_lut(mean=127.5, std=127.5, dtype=np.float32)
+    np.testing.assert_allclose(lut[[0, 255]], [-1.0, 1.0])
+
+
+class InputTransformTest(unittest.TestCase):
+
+  def test_to_image(self):
+    transform = preprocess.InputTransform(0.5, (10, 20))
+    self.assertEqual(transform.image_scale, (0.5, 0.5))
+    np.testing.assert_allclose(
+        transform.to_image([[10, 20, 60, 70]]), [[0, 0, 100, 100]])
+
+
+class PreprocessorTest(unittest.TestCase):
+
+  def test_identity(self):
+    image = random_image(30, 20)
+    tensor = np.full((20, 30, 3), 7, dtype=np.uint8)
+    for method in ('nearest', 'bilinear'):
+      transform = preprocess.Preprocessor((30, 20), (30, 20),
+                                          method).apply(image, tensor)
+      self.assertEqual(transform, (1.0, (0, 0)))
+      np.testing.assert_array_equal(tensor, image)
+
+  def test_nearest(self):
+    image = random_image(40, 20)
+    tensor = np.full((10, 10, 3), 7, dtype=np.uint8)
+    transform = preprocess.Preprocessor((40, 20), (10, 10),
+                                        'nearest').apply(image, tensor)
+    self.assertEqual(transform, (0.25, (0, 0)))
+    np.testing.assert_array_equal(tensor[:5], image[2::4, 2::4])
+    np.testing.assert_array_equal(tensor[5:], 0)
+
+  def test_bilinear_constant(self):
+    image = np.full((48, 64, 3), 100, dtype=np.uint8)
+    tensor = np.zeros((30, 30, 3), dtype=np.uint8)
+    preprocess.Preprocessor((64, 48), (30, 30),
+                            'bilinear').apply(image, tensor)
+    np.testing.assert_array_equal(tensor[:22], 100)
+    np.testing.assert_array_equal(tensor[22:], 0)
+
+  def test_bilinear_downscale_by_two(self):
+    image = random_image(40, 40)
+    tensor = np.zeros((20, 20, 3), dtype=np.uint8)
+    preprocess.Preprocessor((40, 40), (20, 20),
+                            'bilinear').apply(image, tensor)
+    # Each output pixel is the average of a 2x2 block.
+    expected = image.astype(float).reshape(20, 2, 20, 2, 3).mean(axis=(1, 3))
+    self.assertLessEqual(np.abs(tensor - expected).max(), 1.0)
+
+  def test_center(self):
+    image = np.full((20, 40, 3), 100, dtype=np.uint8)
+    tensor = np.full((10, 10, 3), 7, dtype=np.uint8)
+    transform = preprocess.Preprocessor(
+        (40, 20), (10, 10), 'nearest', align='center').apply(image, tensor)
+    self.assertEqual(transform, (0.25, (0, 2)))
+    np.testing.assert_array_equal(tensor[:2], 0)
+    np.testing.assert_array_equal(tensor[2:7], 100)
+    np.testing.assert_array_equal(tensor[7:], 0)
+
+  def test_skewed_image(self):
+    image = random_image(1000, 2)
+    for method in ('nearest', 'bilinear'):
+      tensor = np.full((300, 300, 3), 7, dtype=np.uint8)
+      preprocess.Preprocessor((1000, 2), (300, 300),
+                              method).apply(image, tensor)
+      # The image shrinks to a single row of pixels.
+      self.assertFalse(np.all(tensor[0] == 0))
+      np.testing.assert_array_equal(tensor[1:], 0)
+
+  def test_lut(self):
+    image = random_image(20, 20)
+    tensor = np.zeros((20, 20, 3), dtype=np.int8)
+    lut = preprocess.make_lut((1 / 128, 0), 127.5, 127.5, dtype=np.int8)
+    preprocess.Preprocessor((20, 20), (20, 20), lut=lut).apply(image, tensor)
+    np.testing.assert_array_equal(tensor, lut[image])
+
+  def test_invalid_image(self):
+    preprocessor = preprocess.Preprocessor((20, 20), (10, 10))
+    tensor = np.zeros((10, 10, 3), dtype=np.uint8)
+    with self.assertRaisesRegex(ValueError, 'Expected uint8 image'):
+      preprocessor.apply(np.zeros((10, 20, 3), dtype=np.uint8), tensor)
+    with self.assertRaisesRegex(ValueError, 'Expected uint8 image'):
+      preprocessor.apply(np.zeros((20, 20, 3), dtype=np.float32), tensor)
+
+  def test_invalid_method(self):
+    with self.assertRaisesRegex(ValueError, 'Unsupported resize method'):
+      preprocess.Preprocessor((20, 20), (10, 10), 'bicubic')
+
+
+if __name__ == '__main__':
+  test_utils.coral_test_main()
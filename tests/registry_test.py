@@ -0,0 +1,113 @@
+# Lint as: python3
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import hashlib
+import os
+
+import unittest
+from unittest import mock
+from pycoral.utils import pool
+from pycoral.utils import registry
+from tests import test_utils
+
+
+def model_path():
+  return test_utils.test_data_path('mobilenet_v1_1.0_224_quant_edgetpu.tflite')
+
+
+class ModelRegistryTest(unittest.TestCase):
+
+  def test_file_shared(self):
+    with test_utils.temporary_file() as f:
+      f.write(b'model')
+      f.flush()
+      models = registry.ModelRegistry()
+      content = models.get(f.name)
+      self.assertEqual(content, b'model')
+      self.assertIs(models.get(f.name), content)
+      self.assertEqual(models.stats(), registry.RegistryStats(1, 1, 1, 5))
+
+  def test_file_updated(self):
+    with test_utils.temporary_file() as f:
+      f.write(b'model')
+      f.flush()
+      models = registry.ModelRegistry()
+      self.assertEqual(models.get(f.name), b'model')
+      f.write(b' v2')
+      f.flush()
+      stat = os.stat(f.name)
+      os.utime(f.name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+      self.assertEqual(models.get(f.name), b'model v2')
+      stats = models.stats()
+      self.assertEqual(stats.models, 1)
+      self.assertEqual(stats.total_bytes, 8)
+
+  def test_content_deduplicated(self):
+    models = registry.ModelRegistry()
+    content = models.get(b'model')
+    self.assertIs(models.get(bytes(bytearray(b'model'))), content)
+    self.assertEqual(models.stats().hits, 1)
+
+  def test_content_hashed_once(self):
+    models = registry.ModelRegistry(max_bytes=10)
+    with mock.patch.object(
+        registry.hashlib, 'sha256', wraps=hashlib.sha256) as sha256:
+      content = models.get(bytes(bytearray(b'model')))
+      for _ in range(3):
+        self.assertIs(models.get(content), content)
+      self.assertEqual(sha256.call_count, 1)
+      # Once evicted, the content is hashed again.
+      models.get(b'other model')
+      self.assertIs(models.get(content), content)
+      self.assertEqual(sha256.call_count, 3)
+    self.assertEqual(models.stats().hits, 3)
+
+  def test_lru_eviction(self):
+    models = registry.ModelRegistry(max_bytes=10)
+    a = models.get(b'a' * 4)
+    models.get(b'b' * 4)
+    models.get(a)  # Makes 'b' the least recently used.
+    models.get(b'c' * 4)
+    stats = models.stats()
+    self.assertEqual(stats.models, 2)
+    self.assertEqual(stats.total_bytes, 8)
+    models.get(b'b' * 4)
+    self.assertEqual(models.stats().misses, 4)
+
+  def test_oversized_model_kept(self):
+    models = registry.ModelRegistry(max_bytes=1)
+    content = models.get(b'model')
+    self.assertIs(models.get(b'model'), content)
+    self.assertEqual(models.stats().models, 1)
+
+  def test_clear(self):
+    models = registry.ModelRegistry()
+    models.get(b'model')
+    models.clear()
+    self.assertEqual(models.stats().total_bytes, 0)
+
+  def test_interpreters_share_content(self):
+    models = registry.ModelRegistry()
+    with pool.InterpreterPool(size=2, registry=models) as interpreter_pool:
+      interpreter_pool.preload(model_path())
+      self.assertEqual(models.stats().misses, 1)
+      with interpreter_pool.interpreter(model_path()) as interpreter:
+        interpreter.invoke()
+    interpreter = models.make_interpreter(model_path())
+    interpreter.allocate_tensors()
+    self.assertEqual(models.stats().hits, 1)
+
+
+if __name__ == '__main__':
+  test_utils.coral_test_main()
@@ -0,0 +1,253 @@
+# Lint as: python3
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import math
+
+import numpy as np
+
+import unittest
+from pycoral.adapters import ssd
+from tests import test_utils
+
+
+class GenerateAnchorsTest(unittest.TestCase):
+
+  def test_ssd_mobilenet_300x300(self):
+    anchors = ssd.generate_anchors([19, 10, 5, 3, 2, 1])
+    self.assertEqual(anchors.shape, (1917, 4))
+    # First layer: 3 anchors per location, the first one with scale 0.1.
+    np.testing.assert_allclose(anchors[0], [0.5 / 19, 0.5 / 19, 0.1, 0.1])
+    np.testing.assert_allclose(
+        anchors[1], [0.5 / 19, 0.5 / 19, 0.2 / math.sqrt(2),
+                     0.2 * math.sqrt(2)])
+    np.testing.assert_allclose(anchors[3, :2], [0.5 / 19, 1.5 / 19])
+    # Last layer: a single location, 6 anchors, the last one interpolated
+    # between scale 0.95 and 1.0.
+    np.testing.assert_allclose(anchors[-1],
+                               [0.5, 0.5, math.sqrt(0.95), math.sqrt(0.95)])
+
+  def test_rectangular_feature_map(self):
+    anchors = ssd.generate_anchors([(2, 3)],
+                                   aspect_ratios=(1.0,),
+                                   interpolated_scale_aspect_ratio=0,
+                                   reduce_boxes_in_lowest_layer=False)
+    self.assertEqual(anchors.shape, (6, 4))
+    np.testing.assert_allclose(anchors[:, 0], [0.25] * 3 + [0.75] * 3)
+    np.testing.assert_allclose(anchors[:, 1], [1 / 6, 0.5, 5 / 6] * 2)
+
+
+class LoadAnchorsTest(unittest.TestCase):
+
+  def test_load_text(self):
+    with test_utils.temporary_file(suffix='.txt') as f:
+      f.write(b'0.1, 0.2, 0.3, 0.4\n0.5 0.6 0.7 0.8\n')
+      f.flush()
+      anchors = ssd.load_anchors(f.name)
+    np.testing.assert_allclose(anchors,
+                               [[0.1, 0.2, 0.3, 0.4], [0.5, 0.6, 0.7, 0.8]])
+
+  def test_load_npy(self):
+    expected = ssd.generate_anchors([3, 1])
+    with test_utils.temporary_file(suffix='.npy') as f:
+      f.close()
+      np.save(f.name, expected)
+      np.testing.assert_array_equal(ssd.load_anchors(f.name), expected)
+
+  def test_load_invalid_shape(self):
+    with test_utils.temporary_file(suffix='.txt') as f:
+      f.write(b'0.1 0.2 0.3\n')
+      f.flush()
+      with self.assertRaisesRegex(ValueError, 'Expected anchors of shape'):
+        ssd.load_anchors(f.name)
+
+
+class DecodeBoxesTest(unittest.TestCase):
+
+  def test_zero_encoding_is_anchor(self):
+    anchors = np.array([[0.5, 0.5, 0.2, 0.4]])
+    np.testing.assert_allclose(
+        ssd.decode_boxes(np.zeros((1, 4)), anchors), [[0.4, 0.3, 0.6, 0.7]])
+
+  def test_encoding(self):
+    anchors = np.array([[0.5, 0.5, 0.2, 0.4]])
+    encodings = np.array([[10.0 * 0.5, -10.0 * 0.25, 5.0 * math.log(2), 0]])
+    # ycenter = 0.5 + 0.5 * 0.2, xcenter = 0.5 - 0.25 * 0.4, height = 0.4.
+    np.testing.assert_allclose(
+        ssd.decode_boxes(encodings, anchors), [[0.4, 0.2, 0.8, 0.6]])
+
+
+class FakeSsdInterpreter:
+  """Serves fixed raw outputs, like an SSD interpreter after invoke()."""
+
+  def __init__(self, raw_boxes, raw_classes, box_quantization,
+               class_quantization, input_size=(100, 100)):
+    width, height = input_size
+    self._input_details = [{
+        'index': 0,
+        'shape': np.array([1, height, width, 3])
+    }]
+    self._outputs = {1: raw_boxes[np.newaxis], 2: raw_classes[np.newaxis]}
+    self.output_details_calls = 0
+    self._output_details = [
+        {'index': 1, 'shape': np.array(self._outputs[1].shape),
+         'quantization': box_quantization},
+        {'index': 2, 'shape': np.array(self._outputs[2].shape),
+         'quantization': class_quantization},
+    ]
+
+  def get_input_details(self):
+    return self._input_details
+
+  def get_output_details(self):
+    self.output_details_calls += 1
+    return self._output_details
+
+  def tensor(self, index):
+    return lambda: self._outputs[index]
+
+
+def grid_anchors(size):
+  """Returns size x size disjoint anchors, so NMS never suppresses any."""
+  return ssd.generate_anchors([size],
+                              min_scale=0.5 / size,
+                              max_scale=0.5 / size,
+                              aspect_ratios=(1.0,),
+                              interpolated_scale_aspect_ratio=0,
+                              reduce_boxes_in_lowest_layer=False)
+
+
+def sigmoid(x):
+  return 1 / (1 + np.exp(-x))
+
+
+class SsdDecoderTest(unittest.TestCase):
+
+  # (scale, zero_point) of the class predictions.
+  _CLASS_QUANTIZATION = (0.05, 128)
+
+  def setUp(self):
+    super(SsdDecoderTest, self).setUp()
+    self.anchors = grid_anchors(8)
+    rng = np.random.RandomState(0)
+    self.raw_classes = rng.randint(0, 256, (len(self.anchors), 5)).astype(
+        np.uint8)
+    # Zero box encodings decode to the anchors themselves.
+    self.interpreter = FakeSsdInterpreter(
+        np.full((len(self.anchors), 4), 128, dtype=np.uint8),
+        self.raw_classes, (0.1, 128), self._CLASS_QUANTIZATION)
+
+  def dequantized_classes(self):
+    scale, zero_point = self._CLASS_QUANTIZATION
+    return scale * (self.raw_classes.astype(np.float64) - zero_point)
+
+  def assert_detections(self, detections, ids, scores):
+    order = np.argsort(-scores, kind='stable')
+    np.testing.assert_array_equal(detections.ids, ids[order])
+    np.testing.assert_allclose(detections.scores, scores[order])
+
+  def test_invalid_score_converter(self):
+    with self.assertRaisesRegex(ValueError, 'Unsupported score converter'):
+      ssd.SsdDecoder(ssd.generate_anchors([1]), score_converter='tanh')
+
+  def test_sigmoid_threshold(self):
+    decoder = ssd.SsdDecoder(self.anchors)
+    logits = self.dequantized_classes()[:, 1:]
+    ids = np.argmax(logits, axis=1)
+    scores = sigmoid(logits.max(axis=1))
+    # Exact scores of some quantized values, where rounding matters most.
+    exact = [sigmoid(v) for v in np.sort(logits.max(axis=1))[::13]]
+    thresholds = [0.0, 1e-12, 1e-3, 0.25, 0.5, 0.75, 1 - 1e-12, 1.0]
+    for threshold in thresholds + exact:
+      keep = scores >= threshold
+      detections = decoder.decode(
+          self.interpreter,
+          score_threshold=threshold,
+          iou_threshold=1.0,
+          top_k=None)
+      self.assert_detections(detections, ids[keep], scores[keep])
+
+  def test_softmax(self):
+    logits = self.dequantized_classes()
+    probabilities = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+    ids = np.argmax(probabilities[:, 1:], axis=1)
+    scores = probabilities[:, 1:].max(axis=1)
+    detections = ssd.SsdDecoder(
+        self.anchors, score_converter='softmax').decode(
+            self.interpreter, score_threshold=0.2, top_k=None)
+    keep = scores >= 0.2
+    self.assert_detections(detections, ids[keep], scores[keep])
+    # Both converters pick the same class for each anchor, with different
+    # scores.
+    detections = ssd.SsdDecoder(self.anchors).decode(
+        self.interpreter, top_k=None)
+    self.assert_detections(detections, ids,
+                           sigmoid(logits[:, 1:].max(axis=1)))
+
+  def test_has_background(self):
+    anchors = grid_anchors(1)
+    raw_classes = np.array([[250, 200, 100]], dtype=np.uint8)
+    interpreter = FakeSsdInterpreter(
+        np.full((1, 4), 128, dtype=np.uint8), raw_classes, (0.1, 128),
+        self._CLASS_QUANTIZATION)
+    # The background class is dropped, and ids don't count it.
+    detections = ssd.SsdDecoder(anchors).decode(interpreter)
+    self.assertEqual(detections.ids.tolist(), [0])
+    np.testing.assert_allclose(detections.scores, [sigmoid(0.05 * 72)])
+    detections = ssd.SsdDecoder(anchors, has_background=False).decode(
+        interpreter)
+    self.assertEqual(detections.ids.tolist(), [0])
+    np.testing.assert_allclose(detections.scores, [sigmoid(0.05 * 122)])
+    raw_classes[0] = [100, 200, 250]
+    detections = ssd.SsdDecoder(anchors, has_background=False).decode(
+        interpreter)
+    self.assertEqual(detections.ids.tolist(), [2])
+    detections = ssd.SsdDecoder(anchors).decode(interpreter)
+    self.assertEqual(detections.ids.tolist(), [1])
+
+  def test_class_agnostic(self):
+    # Two identical anchors with different classes.
+    anchors = np.repeat(grid_anchors(1), 2, axis=0)
+    raw_classes = np.array([[0, 250, 0], [0, 0, 200]], dtype=np.uint8)
+    interpreter = FakeSsdInterpreter(
+        np.full((2, 4), 128, dtype=np.uint8), raw_classes, (0.1, 128),
+        self._CLASS_QUANTIZATION)
+    decoder = ssd.SsdDecoder(anchors)
+    detections = decoder.decode(interpreter, iou_threshold=0.5)
+    self.assertEqual(detections.ids.tolist(), [0, 1])
+    detections = decoder.decode(
+        interpreter, iou_threshold=0.5, class_agnostic=True)
+    self.assertEqual(detections.ids.tolist(), [0])
+    self.assertEqual(detections.boxes.tolist(), [[25, 25, 75, 75]])
+
+  def test_top_k(self):
+    scores = sigmoid(self.dequantized_classes()[:, 1:].max(axis=1))
+    detections = ssd.SsdDecoder(self.anchors).decode(self.interpreter, top_k=5)
+    np.testing.assert_allclose(detections.scores, np.sort(scores)[::-1][:5])
+
+  def test_output_details_cached(self):
+    decoder = ssd.SsdDecoder(self.anchors)
+    first = decoder.decode(self.interpreter, top_k=None)
+    second = ssd.SsdDecoder(self.anchors).decode(self.interpreter, top_k=None)
+    np.testing.assert_array_equal(first.ids, second.ids)
+    self.assertEqual(self.interpreter.output_details_calls, 1)
+
+  def test_nothing_above_threshold(self):
+    detections = ssd.SsdDecoder(self.anchors).decode(
+        self.interpreter, score_threshold=0.9999)
+    self.assertEqual(len(detections.ids), 0)
+    self.assertEqual(detections.boxes.shape, (0, 4))
+
+
+if __name__ == '__main__':
+  test_utils.coral_test_main()
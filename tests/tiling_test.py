@@ -0,0 +1,136 @@
+# Lint as: python3
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import numpy as np
+from PIL import Image
+
+import unittest
+from pycoral.adapters import common
+from pycoral.adapters import tiling
+from pycoral.utils import edgetpu
+from tests import test_utils
+
+PERSON = 0  # coco_labels.txt
+KITE = 37  # coco_labels.txt
+
+
+def no_nms_model():
+  return 'ssd_mobilenet_v2_coco_quant_no_nms_edgetpu.tflite'
+
+
+class TileLocationsTest(unittest.TestCase):
+
+  def test_exact_fit(self):
+    self.assertEqual(
+        tiling.tile_locations((200, 100), (100, 100), 0).tolist(),
+        [[0, 0, 100, 100], [100, 0, 200, 100]])
+
+  def test_overlap(self):
+    self.assertEqual(
+        tiling.tile_locations((250, 100), (100, 100), 20).tolist(),
+        [[0, 0, 100, 100], [80, 0, 180, 100], [160, 0, 250, 100],
+         [240, 0, 250, 100], [0, 80, 100, 100], [80, 80, 180, 100],
+         [160, 80, 250, 100], [240, 80, 250, 100]])
+
+  def test_tile_larger_than_image(self):
+    self.assertEqual(
+        tiling.tile_locations((50, 40), (100, 100), 10).tolist(),
+        [[0, 0, 50, 40]])
+
+  def test_invalid_overlap(self):
+    with self.assertRaisesRegex(ValueError, 'must be larger than overlap'):
+      tiling.tile_locations((200, 100), (100, 100), 100)
+
+
+class TileGridTest(unittest.TestCase):
+
+  def test_layers(self):
+    grid = tiling.TileGrid((200, 100), [(200, 100), (100, 100)],
+                           overlap=0, input_size=(50, 50))
+    self.assertEqual(len(grid), 3)
+    self.assertEqual(grid.image_size, (200, 100))
+    self.assertEqual(grid.tiles.boxes.tolist(),
+                     [[0, 0, 200, 100], [0, 0, 100, 100], [100, 0, 200, 100]])
+
+
+class TiledDetectorTest(unittest.TestCase):
+
+  @classmethod
+  def setUpClass(cls):
+    super(TiledDetectorTest, cls).setUpClass()
+    cls.delegate = edgetpu.load_edgetpu_delegate()
+    with test_utils.test_image('kite_and_cold.jpg') as image:
+      cls.image = np.asarray(image.convert('RGB'))
+
+  def make_interpreter(self):
+    interpreter = edgetpu.make_interpreter(
+        test_utils.test_data_path(no_nms_model()), delegate=self.delegate)
+    interpreter.allocate_tensors()
+    return interpreter
+
+  def test_set_input(self):
+    interpreter = self.make_interpreter()
+    height, width, _ = self.image.shape
+    grid = tiling.TileGrid((width, height), [(500, 500)], 50,
+                           common.input_size(interpreter))
+    xmin, ymin, xmax, ymax = grid.tiles.boxes[0]
+    scale = grid.set_input(interpreter, self.image, 0)
+    tensor = common.input_tensor(interpreter).copy()
+    # A 500x500 tile resized to 300x300 has no sample centers on pixel edges,
+    # where PIL may round differently.
+    tile = Image.fromarray(self.image[ymin:ymax, xmin:xmax])
+    _, expected_scale = common.set_resized_input(
+        interpreter, tile.size, lambda size: tile.resize(size, Image.NEAREST))
+    self.assertEqual(scale, expected_scale)
+    np.testing.assert_array_equal(tensor, common.input_tensor(interpreter))
+
+  def test_detect(self):
+    height, width, _ = self.image.shape
+    with tiling.TiledDetector([self.make_interpreter()], (width, height),
+                              [(1352, 900), (500, 500), (250, 250)],
+                              tile_overlap=50) as detector:
+      detections = detector.detect(
+          self.image, score_threshold=0.5, iou_threshold=0.1)
+    ids = detections.ids.tolist()
+    self.assertIn(PERSON, ids)
+    self.assertGreater(ids.count(KITE), 1)
+    self.assertTrue(np.all(detections.boxes >= 0))
+    self.assertTrue(np.all(detections.boxes[:, [0, 2]] <= width))
+    self.assertTrue(np.all(detections.boxes[:, [1, 3]] <= height))
+    self.assertEqual(detections.scores.tolist(),
+                     sorted(detections.scores.tolist(), reverse=True))
+
+  def test_detect_multiple_interpreters(self):
+    height, width, _ = self.image.shape
+    tile_sizes = [(500, 500), (250, 250)]
+    with tiling.TiledDetector([self.make_interpreter()], (width, height),
+                              tile_sizes, 50) as detector:
+      expected = detector.detect(self.image, score_threshold=0.5)
+    with tiling.TiledDetector(
+        [self.make_interpreter() for _ in range(3)], (width, height),
+        tile_sizes, 50) as detector:
+      detections = detector.detect(self.image, score_threshold=0.5)
+    self.assertEqual(
+        sorted(map(tuple, detections.boxes.tolist())),
+        sorted(map(tuple, expected.boxes.tolist())))
+
+  def test_detect_wrong_image_size(self):
+    with tiling.TiledDetector([self.make_interpreter()], (100, 100),
+                              [(50, 50)], 10) as detector:
+      with self.assertRaisesRegex(ValueError, 'Expected image of size'):
+        detector.detect(np.zeros((50, 50, 3), dtype=np.uint8))
+
+
+if __name__ == '__main__':
+  test_utils.coral_test_main()